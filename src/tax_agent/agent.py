@@ -1,5 +1,12 @@
 """Claude agent for tax document analysis."""
 
+import asyncio
+import logging
+import time
+from collections.abc import Iterator
+from functools import partial
+from typing import Any
+
 from tax_agent.config import AI_PROVIDER_ANTHROPIC, AI_PROVIDER_AWS_BEDROCK, get_config
 
 # Model mapping for different providers
@@ -7,6 +14,7 @@ from tax_agent.config import AI_PROVIDER_ANTHROPIC, AI_PROVIDER_AWS_BEDROCK, get
 ANTHROPIC_MODELS = {
     "claude-opus-4-5": "claude-opus-4-5-20251101",
     "claude-sonnet-4-5": "claude-sonnet-4-5-20250929",
+    "claude-haiku-4-5": "claude-haiku-4-5-20251001",
     "claude-3-5-sonnet": "claude-3-5-sonnet-20241022",
     "claude-3-opus": "claude-3-opus-20240229",
     "claude-3-sonnet": "claude-3-sonnet-20240229",
@@ -16,6 +24,7 @@ ANTHROPIC_MODELS = {
 BEDROCK_MODELS = {
     "claude-opus-4-5": "anthropic.claude-opus-4-5-20251101-v1:0",
     "claude-sonnet-4-5": "anthropic.claude-sonnet-4-5-20250929-v1:0",
+    "claude-haiku-4-5": "anthropic.claude-haiku-4-5-20251001-v1:0",
     "claude-3-5-sonnet": "anthropic.claude-3-5-sonnet-20241022-v2:0",
     "claude-3-opus": "anthropic.claude-3-opus-20240229-v1:0",
     "claude-3-sonnet": "anthropic.claude-3-sonnet-20240229-v1:0",
@@ -25,6 +34,8 @@ BEDROCK_MODELS = {
 # Default model
 DEFAULT_MODEL = "claude-sonnet-4-5"
 
+logger = logging.getLogger(__name__)
+
 
 class TaxAgent:
     """Claude-powered agent for tax document processing and analysis."""
@@ -41,6 +52,9 @@ class TaxAgent:
         config = get_config()
         self.provider = config.ai_provider
         self.config = config
+        self._async_client = None
+        self._async_client_loop = None
+        self._async_semaphore = None
 
         # Default to Claude 3.5 Sonnet
         base_model = model or config.get("model", DEFAULT_MODEL)
@@ -52,23 +66,26 @@ class TaxAgent:
 
     def _init_anthropic(self, base_model: str) -> None:
         """Initialize with Anthropic API."""
-        from anthropic import Anthropic
+        from anthropic import Anthropic, AsyncAnthropic
 
         api_key = self.config.get_api_key()
         if not api_key:
             raise ValueError("Anthropic API key not configured. Run 'tax-agent init' first.")
 
-        self.client = Anthropic(api_key=api_key)
-        self.model = ANTHROPIC_MODELS.get(base_model, base_model)
+        retries = self.config.api_max_retries
+        self.client = Anthropic(api_key=api_key, max_retries=retries)
+        self._async_client_factory = partial(AsyncAnthropic, api_key=api_key, max_retries=retries)
+        self.model = self._resolve_model(base_model)
 
     def _init_bedrock(self, base_model: str) -> None:
         """Initialize with AWS Bedrock."""
         import boto3
-        from anthropic import AnthropicBedrock
+        from anthropic import AnthropicBedrock, AsyncAnthropicBedrock
 
         # Get AWS credentials - try keyring first, then fall back to environment/IAM
         access_key, secret_key = self.config.get_aws_credentials()
         region = self.config.aws_region
+        retries = self.config.api_max_retries
 
         if access_key and secret_key:
             # Use explicit credentials from keyring
@@ -76,18 +93,37 @@ class TaxAgent:
                 aws_access_key=access_key,
                 aws_secret_key=secret_key,
                 aws_region=region,
+                max_retries=retries,
+            )
+            self._async_client_factory = partial(
+                AsyncAnthropicBedrock,
+                aws_access_key=access_key,
+                aws_secret_key=secret_key,
+                aws_region=region,
+                max_retries=retries,
             )
         else:
             # Fall back to default AWS credential chain (env vars, IAM role, etc.)
-            self.client = AnthropicBedrock(aws_region=region)
+            self.client = AnthropicBedrock(aws_region=region, max_retries=retries)
+            self._async_client_factory = partial(
+                AsyncAnthropicBedrock, aws_region=region, max_retries=retries
+            )
 
-        self.model = BEDROCK_MODELS.get(base_model, f"anthropic.{base_model}-v1:0")
+        self.model = self._resolve_model(base_model)
+
+    def _resolve_model(self, base_model: str) -> str:
+        """Map a short model name to the provider-specific model ID."""
+        if self.provider == AI_PROVIDER_AWS_BEDROCK:
+            return BEDROCK_MODELS.get(base_model, f"anthropic.{base_model}-v1:0")
+        return ANTHROPIC_MODELS.get(base_model, base_model)
 
     def _call(
         self,
         system: str,
         user_message: str,
         max_tokens: int = 4096,
+        cache_system: bool = False,
+        model: str | None = None,
     ) -> str:
         """
         Make a call to the Claude API.
@@ -96,19 +132,332 @@ class TaxAgent:
             system: System prompt
             user_message: User message
             max_tokens: Maximum tokens in response
+            cache_system: Mark the system prompt as a prompt-cache breakpoint.
+                Only use this for static prompts; per-call data belongs in
+                user_message so it stays outside the cached prefix.
+            model: Short model name overriding the configured model
 
         Returns:
             Response text
         """
         response = self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            system=system,
-            messages=[{"role": "user", "content": user_message}],
+            **self._request_params(system, user_message, max_tokens, cache_system, model)
         )
 
+        if cache_system:
+            self._log_cache_usage(response)
+
+        return response.content[0].text
+
+    def _call_tool(
+        self,
+        system: str,
+        user_message: str,
+        tool: dict,
+        max_tokens: int = 4096,
+        cache_system: bool = False,
+        model: str | None = None,
+    ) -> dict:
+        """
+        Make a call that must answer through a single tool.
+
+        Forcing the tool makes Claude return its answer as the tool's input,
+        shaped by the tool's JSON schema, so no text parsing is needed.
+
+        Args:
+            system: System prompt
+            user_message: User message
+            tool: Tool definition with 'name', 'description' and 'input_schema'
+            max_tokens: Maximum tokens in response
+            cache_system: Mark the system prompt as a prompt-cache breakpoint
+            model: Short model name overriding the configured model
+
+        Returns:
+            The tool input as a dictionary
+
+        Raises:
+            ValueError: If the response was cut off at max_tokens or has no tool call
+        """
+        response = self.client.messages.create(
+            **self._request_params(system, user_message, max_tokens, cache_system, model, tool)
+        )
+
+        if cache_system:
+            self._log_cache_usage(response)
+
+        return self._tool_input(response)
+
+    def _stream(
+        self,
+        system: str,
+        user_message: str,
+        max_tokens: int = 4096,
+        cache_system: bool = False,
+        model: str | None = None,
+    ) -> Iterator[str]:
+        """
+        Stream response text from the Claude API as it is generated.
+
+        Args:
+            system: System prompt
+            user_message: User message
+            max_tokens: Maximum tokens in response
+            cache_system: Mark the system prompt as a prompt-cache breakpoint
+            model: Short model name overriding the configured model
+
+        Yields:
+            Response text deltas
+        """
+        with self.client.messages.stream(
+            **self._request_params(system, user_message, max_tokens, cache_system, model)
+        ) as stream:
+            yield from stream.text_stream
+            if cache_system:
+                self._log_cache_usage(stream.get_final_message())
+
+    def _stream_tool(
+        self,
+        system: str,
+        user_message: str,
+        tool: dict,
+        max_tokens: int = 4096,
+        cache_system: bool = False,
+        model: str | None = None,
+    ) -> Iterator[str]:
+        """
+        Stream the JSON input of a forced tool call as it is generated.
+
+        Args:
+            system: System prompt
+            user_message: User message
+            tool: Tool definition with 'name', 'description' and 'input_schema'
+            max_tokens: Maximum tokens in response
+            cache_system: Mark the system prompt as a prompt-cache breakpoint
+            model: Short model name overriding the configured model
+
+        Yields:
+            Fragments of the tool input JSON
+        """
+        with self.client.messages.stream(
+            **self._request_params(system, user_message, max_tokens, cache_system, model, tool)
+        ) as stream:
+            for event in stream:
+                if event.type == "input_json":
+                    yield event.partial_json
+            if cache_system:
+                self._log_cache_usage(stream.get_final_message())
+
+    def _get_async_client(self):
+        """
+        Get the async API client for the running event loop.
+
+        The async client's connection pool is bound to the loop that created
+        it, so a new client is built whenever the caller is on a different
+        loop (e.g. successive asyncio.run() calls). The request semaphore is
+        rebuilt alongside it for the same reason.
+
+        Rate-limit (429), overload and 5xx responses are retried by the
+        client itself with exponential backoff that honors Retry-After; the
+        semaphore keeps bursts of concurrent requests under the account's
+        limits in the first place.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = self._async_client_factory()
+            self._async_semaphore = asyncio.Semaphore(self.config.api_concurrency)
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def _acall(
+        self,
+        system: str,
+        user_message: str,
+        max_tokens: int = 4096,
+        cache_system: bool = False,
+        model: str | None = None,
+    ) -> str:
+        """
+        Async variant of _call for overlapping independent requests.
+
+        Args:
+            system: System prompt
+            user_message: User message
+            max_tokens: Maximum tokens in response
+            cache_system: Mark the system prompt as a prompt-cache breakpoint
+            model: Short model name overriding the configured model
+
+        Returns:
+            Response text
+        """
+        client = self._get_async_client()
+        async with self._async_semaphore:
+            response = await client.messages.create(
+                **self._request_params(system, user_message, max_tokens, cache_system, model)
+            )
+
+        if cache_system:
+            self._log_cache_usage(response)
+
         return response.content[0].text
 
+    async def _acall_tool(
+        self,
+        system: str,
+        user_message: str,
+        tool: dict,
+        max_tokens: int = 4096,
+        cache_system: bool = False,
+        model: str | None = None,
+    ) -> dict:
+        """Async variant of _call_tool."""
+        client = self._get_async_client()
+        async with self._async_semaphore:
+            response = await client.messages.create(
+                **self._request_params(system, user_message, max_tokens, cache_system, model, tool)
+            )
+
+        if cache_system:
+            self._log_cache_usage(response)
+
+        return self._tool_input(response)
+
+    def _request_params(
+        self,
+        system: str,
+        user_message: str,
+        max_tokens: int,
+        cache_system: bool,
+        model: str | None,
+        tool: dict | None = None,
+    ) -> dict:
+        """Build Messages API parameters for a single-turn request."""
+        params = {
+            "model": self._resolve_model(model) if model else self.model,
+            "max_tokens": max_tokens,
+            "system": self._system_param(system, cache_system),
+            "messages": [{"role": "user", "content": user_message}],
+        }
+        if tool is not None:
+            params["tools"] = [tool]
+            params["tool_choice"] = {"type": "tool", "name": tool["name"]}
+        return params
+
+    @staticmethod
+    def _system_param(system: str, cache_system: bool) -> str | list[dict]:
+        """Build the Messages API system parameter, optionally cache-marked."""
+        if not cache_system:
+            return system
+        return [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+
+    @staticmethod
+    def _tool_input(message) -> dict:
+        """Get the input of the tool call in a response message.
+
+        A response that hit max_tokens is rejected even when it holds a tool
+        call, since that call's input was cut off and is incomplete.
+        """
+        if getattr(message, "stop_reason", None) == "max_tokens":
+            raise ValueError("Claude response was cut off at max_tokens")
+        for block in message.content:
+            if block.type == "tool_use":
+                return block.input
+        raise ValueError("Claude response did not include the requested tool call")
+
+    @staticmethod
+    def _log_cache_usage(response) -> None:
+        """Log prompt cache hit statistics for a response."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        cached = getattr(usage, "cache_read_input_tokens", None) or 0
+        written = getattr(usage, "cache_creation_input_tokens", None) or 0
+        uncached = getattr(usage, "input_tokens", None) or 0
+        total = cached + written + uncached
+        if total:
+            logger.info(
+                "Prompt cache: %d read, %d written, %d uncached (%.0f%% hit)",
+                cached, written, uncached, 100.0 * cached / total,
+            )
+
+    def _call_batch(
+        self,
+        system: str,
+        user_messages: list[str],
+        max_tokens: int = 4096,
+        cache_system: bool = True,
+        poll_interval: float = 10.0,
+        tool: dict | None = None,
+        timeout: float = 1800.0,
+    ) -> list[Any]:
+        """
+        Run several independent prompts through the Message Batches API.
+
+        Batches are billed at half the regular rate but may take minutes to
+        complete, so only use this for non-interactive work. AWS Bedrock has
+        no Message Batches endpoint; there the prompts run sequentially.
+
+        Args:
+            system: System prompt shared by every request
+            user_messages: One user message per request
+            max_tokens: Maximum tokens in each response
+            cache_system: Mark the shared system prompt as a cache breakpoint
+            poll_interval: Seconds between batch status checks
+            tool: Tool every request must answer through (see _call_tool)
+            timeout: Seconds to wait for the batch before canceling it
+
+        Returns:
+            Response texts (or tool inputs when a tool is given) in the same
+            order as user_messages; None for requests that errored, expired,
+            or were canceled
+
+        Raises:
+            TimeoutError: If the batch has not ended within timeout seconds
+        """
+        if self.provider == AI_PROVIDER_AWS_BEDROCK or len(user_messages) <= 1:
+            if tool is not None:
+                return [
+                    self._call_tool(system, msg, tool, max_tokens, cache_system)
+                    for msg in user_messages
+                ]
+            return [
+                self._call(system, msg, max_tokens=max_tokens, cache_system=cache_system)
+                for msg in user_messages
+            ]
+
+        requests = [
+            {
+                "custom_id": f"req-{i}",
+                "params": self._request_params(system, msg, max_tokens, cache_system, None, tool),
+            }
+            for i, msg in enumerate(user_messages)
+        ]
+
+        batch = self.client.messages.batches.create(requests=requests)
+        deadline = time.monotonic() + timeout
+        while batch.processing_status != "ended":
+            if time.monotonic() >= deadline:
+                self.client.messages.batches.cancel(batch.id)
+                raise TimeoutError(f"Message batch {batch.id} did not finish within {timeout:g}s")
+            time.sleep(poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        results: list[Any] = [None] * len(user_messages)
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type != "succeeded":
+                logger.warning("Batch request %s %s", entry.custom_id, entry.result.type)
+                continue
+            index = int(entry.custom_id.removeprefix("req-"))
+            message = entry.result.message
+            if tool is None:
+                results[index] = message.content[0].text
+                continue
+            try:
+                results[index] = self._tool_input(message)
+            except ValueError as e:
+                logger.warning("Batch request %s: %s", entry.custom_id, e)
+
+        return results
+
     def classify_document(self, text: str) -> dict:
         """
         Classify a tax document and identify its type.
@@ -5,31 +5,97 @@ enabling agentic loops, tool use, and more sophisticated analysis capabilities.
 """
 
 import asyncio
+import io
 import json
+import re
+from collections.abc import AsyncIterator, Callable, Iterable, Mapping
 from pathlib import Path
-from typing import Any, AsyncIterator
+from typing import Any
 
 from tax_agent.config import get_config
+from tax_agent.models.documents import TAX_RETURNS, DocumentType
+from tax_agent.subagents import get_subagent as _get_subagent
+from tax_agent.subagents import list_subagents as _list_subagents
+from tax_agent.utils import run_async
 
+try:
+    from claude_code_sdk import ClaudeCodeOptions as _SDKOptions
+    from claude_code_sdk import query as _sdk_query
+except ImportError:  # pragma: no cover - SDK is optional at runtime
+    _SDKOptions = None
+    _sdk_query = None
 
-def _run_async(coro):
-    """Run an async coroutine from sync code, handling existing event loops.
+# Resolved once at import; the SDK cannot appear mid-process.
+_SDK_AVAILABLE = _sdk_query is not None
 
-    If an event loop is already running (e.g. Jupyter, FastAPI),
-    creates a new thread to run the coroutine. Otherwise uses asyncio.run().
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _loads(text: str) -> Any:
+    """Decode JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _dumps(obj: Any) -> str:
+    """Encode compact JSON for prompts, using orjson when it is installed.
+
+    The model reads compact JSON just as well as indented output, and the
+    stdlib encoder is markedly slower when indenting.
     """
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, default=str).decode()
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+async def _collect_text(chunks: AsyncIterator[str]) -> str:
+    """Drain an async text stream into a single string."""
+    buf = io.StringIO()
+    async for chunk in chunks:
+        buf.write(chunk)
+    return buf.getvalue()
+
+
+# Per-class caches for pulling text out of streamed SDK messages. Message and
+# block classes are inspected once; later instances skip attribute probing.
+_MESSAGE_TEXT_EXTRACTORS: dict[type, Callable[[Any], Iterable[str]]] = {}
+_BLOCK_HAS_TEXT: dict[type, bool] = {}
+
+
+def _no_text(message: Any) -> Iterable[str]:
+    """Extractor for message classes that carry no content blocks."""
+    return ()
+
+
+def _content_texts(message: Any) -> Iterable[str]:
+    """Yield the text of every text-bearing block in a message."""
+    for block in message.content:
+        block_type = type(block)
+        has_text = _BLOCK_HAS_TEXT.get(block_type)
+        if has_text is None:
+            has_text = _BLOCK_HAS_TEXT[block_type] = hasattr(block, "text")
+        if has_text:
+            yield block.text
 
-    if loop and loop.is_running():
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
-            future = pool.submit(asyncio.run, coro)
-            return future.result()
-    else:
-        return asyncio.run(coro)
+
+def _iter_text(message: Any) -> Iterable[str]:
+    """Return the text chunks contained in a streamed SDK message."""
+    message_type = type(message)
+    extractor = _MESSAGE_TEXT_EXTRACTORS.get(message_type)
+    if extractor is None:
+        extractor = _content_texts if hasattr(message, "content") else _no_text
+        _MESSAGE_TEXT_EXTRACTORS[message_type] = extractor
+    return extractor(message)
+
+
+# JSON extraction for model responses: prefer a fenced block, otherwise
+# decode the first complete object found in the surrounding prose.
+_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+_JSON_DECODER = json.JSONDecoder()
 
 # Model mapping (same as agent.py for consistency)
 AGENT_SDK_MODELS = {
@@ -43,6 +109,97 @@ AGENT_SDK_MODELS = {
 
 DEFAULT_MODEL = "claude-sonnet-4-5"
 
+# Maximum characters of document text sent for classification
+MAX_CLASSIFY_CHARS = 8000
+
+# Upper bound on distinct cached SDK option sets per agent
+_OPTIONS_CACHE_SIZE = 64
+
+# Leading characters scanned for a form-title signature before calling the model
+SIGNATURE_SCAN_CHARS = 4000
+
+# Characters on either side of a matched form title searched for its tax year
+SIGNATURE_YEAR_WINDOW = 200
+
+_YEAR_RE = re.compile(r"\b(20\d\d)\b")
+
+# Form-title signatures for deterministic classification of unambiguous documents.
+# A document is only classified this way when exactly one type matches.
+_DOC_SIGNATURES: tuple[tuple[re.Pattern[str], DocumentType], ...] = tuple(
+    (re.compile(pattern, re.IGNORECASE), doc_type)
+    for pattern, doc_type in (
+        (r"\bForm\s+W-?2\b", DocumentType.W2),
+        (r"\bForm\s+W-?2\s?G\b", DocumentType.W2_G),
+        (r"\bForm\s+1099-?INT\b", DocumentType.FORM_1099_INT),
+        (r"\bForm\s+1099-?DIV\b", DocumentType.FORM_1099_DIV),
+        (r"\bForm\s+1099-?B\b", DocumentType.FORM_1099_B),
+        (r"\bForm\s+1099-?NEC\b", DocumentType.FORM_1099_NEC),
+        (r"\bForm\s+1099-?MISC\b", DocumentType.FORM_1099_MISC),
+        (r"\bForm\s+1099-?R\b", DocumentType.FORM_1099_R),
+        (r"\bForm\s+1099-?G\b", DocumentType.FORM_1099_G),
+        (r"\bForm\s+1099-?K\b", DocumentType.FORM_1099_K),
+        (r"\bForm\s+1098(?!-?\w)", DocumentType.FORM_1098),
+        (r"\bForm\s+1098-?T\b", DocumentType.FORM_1098_T),
+        (r"\bForm\s+1098-?E\b", DocumentType.FORM_1098_E),
+        (r"\bForm\s+5498(?!-?\w)", DocumentType.FORM_5498),
+        (r"\bSchedule\s+K-?1\b", DocumentType.K1),
+        (
+            r"\bForm\s+1040(?!-?\w)[\s\S]{0,80}?Individual\s+Income\s+Tax\s+Return",
+            DocumentType.FORM_1040,
+        ),
+        (r"\bForm\s+1040-?SR\b", DocumentType.FORM_1040_SR),
+        (r"\bForm\s+1040-?NR\b", DocumentType.FORM_1040_NR),
+        (r"\bForm\s+1040-?X\b", DocumentType.FORM_1040_X),
+        (r"\bSchedule\s+A\s*\(Form\s+1040", DocumentType.SCHEDULE_A),
+        (r"\bSchedule\s+B\s*\(Form\s+1040", DocumentType.SCHEDULE_B),
+        (r"\bSchedule\s+C\s*\(Form\s+1040", DocumentType.SCHEDULE_C),
+        (r"\bSchedule\s+D\s*\(Form\s+1040", DocumentType.SCHEDULE_D),
+        (r"\bSchedule\s+E\s*\(Form\s+1040", DocumentType.SCHEDULE_E),
+        (r"\bSchedule\s+SE\s*\(Form\s+1040", DocumentType.SCHEDULE_SE),
+    )
+)
+
+
+def _match_signature(text: str) -> dict | None:
+    """
+    Classify a document from its form-title signature, if unambiguous.
+
+    The tax year is read from the text around the matched title so prior-year
+    forms are not filed under the current year. Documents with no single
+    nearby year are left to the model.
+
+    Args:
+        text: Extracted document text
+
+    Returns:
+        Classification dictionary, or None if zero or several types match or
+        the tax year cannot be determined
+    """
+    header = text[:SIGNATURE_SCAN_CHARS]
+    matches = {}
+    for pattern, doc_type in _DOC_SIGNATURES:
+        match = pattern.search(header)
+        if match:
+            matches[doc_type] = match
+    if len(matches) != 1:
+        return None
+
+    doc_type, match = matches.popitem()
+    window = header[
+        max(0, match.start() - SIGNATURE_YEAR_WINDOW) : match.end() + SIGNATURE_YEAR_WINDOW
+    ]
+    years = set(_YEAR_RE.findall(window))
+    if len(years) != 1:
+        return None
+
+    return {
+        "document_type": doc_type.value,
+        "document_category": "RETURN" if doc_type in TAX_RETURNS else "SOURCE",
+        "tax_year": int(years.pop()),
+        "confidence": 0.95,
+        "reasoning": "Matched form-title signature",
+    }
+
 
 # Tax-specific system prompts
 TAX_DOCUMENT_CLASSIFIER_PROMPT = """You are a tax document classifier with access to tools for verification.
@@ -96,10 +253,68 @@ For EACH finding, provide:
 Be AGGRESSIVE in finding issues. Cross-reference everything against source documents.
 """
 
+TAX_INTERACTIVE_PROMPT = """You are an expert tax advisor with access to tools.
+You can read files, search for patterns, and look up current tax information.
+Provide specific, actionable advice based on the taxpayer's situation.
+Always verify your recommendations against source documents when available."""
+
+
+# User prompt templates, filled with %-formatting at call time
+CLASSIFY_PROMPT_TMPL = """Classify this tax document and return a JSON object with:
+- document_type: The document type (W2, 1099_INT, 1040, etc.)
+- document_category: "SOURCE" or "RETURN"
+- confidence: 0.0-1.0
+- issuer_name: Entity that issued this document
+- tax_year: Tax year
+- reasoning: Brief explanation
+
+Document text:
+%s
+"""
+
+ANALYZE_PROMPT_TMPL = """Analyze this taxpayer's situation. Verify key figures by reading
+source documents if needed. Use current IRS limits via web search when relevant.
+
+Taxpayer Information:
+%s
+
+Collected Documents Summary:
+%s
+
+Provide comprehensive analysis with verification of key figures."""
+
+REVIEW_PROMPT_TMPL = """Review this tax return against source documents.
+Cross-reference ALL amounts. Find EVERY error and optimization opportunity.
+
+Source Documents:
+%s
+
+Tax Return:
+%s
+
+Verify each amount against source documents and identify discrepancies."""
+
+COALESCED_TASKS_TMPL = """Process each of the following independent tasks separately.
+Wrap your complete answer to each task in <task id="N">...</task> tags, where N
+is the task number, and answer every task.
+
+%s"""
+
+_TASK_RESPONSE_RE = re.compile(r'<task id="?(\d+)"?>(.*?)</task>', re.DOTALL)
+
+INTERACTIVE_PROMPT_TMPL = """Context:
+%s
+
+Question/Request:
+%s"""
+
 
 class TaxAgentSDK:
     """Agent SDK-powered tax agent with tool use and agentic loops."""
 
+    _TOOLS_NO_WEB = ("Read", "Grep", "Glob")
+    _TOOLS_WEB = ("Read", "Grep", "Glob", "WebSearch", "WebFetch")
+
     def __init__(
         self,
         model: str | None = None,
@@ -119,16 +334,14 @@ class TaxAgentSDK:
         self.model = AGENT_SDK_MODELS.get(base_model, base_model)
         self.max_turns = max_turns or self.config.agent_sdk_max_turns
         self.use_hooks = use_hooks
+        self._allow_web_default = bool(self.config.agent_sdk_allow_web)
         self._sdk_available = self._check_sdk_available()
         self._hooks = None
+        self._options_cache: dict[tuple, Any] = {}
 
     def _check_sdk_available(self) -> bool:
         """Check if the Claude Agent SDK is available."""
-        try:
-            from claude_code_sdk import query
-            return True
-        except ImportError:
-            return False
+        return _SDK_AVAILABLE
 
     def _get_hooks(self) -> dict | None:
         """Get configured hooks for SDK operations."""
@@ -146,15 +359,74 @@ class TaxAgentSDK:
 
     def _get_allowed_tools(self, include_web: bool | None = None) -> list[str]:
         """Get list of allowed tools for tax operations."""
-        tools = ["Read", "Grep", "Glob"]
-
-        # Check config if not explicitly specified
+        # Fall back to the config setting captured at init if not specified
         if include_web is None:
-            include_web = self.config.agent_sdk_allow_web
+            include_web = self._allow_web_default
 
-        if include_web:
-            tools.extend(["WebSearch", "WebFetch"])
-        return tools
+        return list(self._TOOLS_WEB if include_web else self._TOOLS_NO_WEB)
+
+    def _get_options(
+        self,
+        system_prompt: str,
+        allowed_tools: tuple[str, ...],
+        max_turns: int,
+        model: str,
+        cwd: Path | None,
+    ):
+        """
+        Get SDK options for a query, reusing an identical earlier instance.
+
+        The SDK copies options (dataclasses.replace) rather than mutating
+        them, so one instance can be shared across repeated calls.
+        """
+        cwd_str = str(cwd) if cwd else None
+        key = (system_prompt, allowed_tools, max_turns, model, cwd_str)
+        options = self._options_cache.get(key)
+        if options is None:
+            if len(self._options_cache) >= _OPTIONS_CACHE_SIZE:
+                self._options_cache.clear()
+            hooks = self._get_hooks()
+            options = _SDKOptions(
+                system_prompt=system_prompt,
+                allowed_tools=list(allowed_tools),
+                max_turns=max_turns,
+                model=model,
+                cwd=cwd_str,
+                **({"hooks": hooks} if hooks else {}),
+            )
+            self._options_cache[key] = options
+        return options
+
+    async def _stream(
+        self,
+        prompt: str,
+        *,
+        system_prompt: str,
+        allowed_tools: list[str],
+        max_turns: int,
+        model: str | None = None,
+        cwd: Path | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Run a single SDK query and yield its text chunks.
+
+        Args:
+            prompt: User prompt to send
+            system_prompt: System prompt for the query
+            allowed_tools: Tools the agent may use
+            max_turns: Maximum agentic turns
+            model: Model override. Defaults to the instance model.
+            cwd: Working directory for file tools
+
+        Yields:
+            Text chunks as they're generated
+        """
+        options = self._get_options(
+            system_prompt, tuple(allowed_tools), max_turns, model or self.model, cwd
+        )
+        async for message in _sdk_query(prompt=prompt, options=options):
+            for text in _iter_text(message):
+                yield text
 
     def get_subagent(self, name: str):
         """
@@ -166,13 +438,11 @@ class TaxAgentSDK:
         Returns:
             SubagentDefinition or None
         """
-        from tax_agent.subagents import get_subagent
-        return get_subagent(name)
+        return _get_subagent(name)
 
-    def list_subagents(self) -> list[dict[str, str]]:
+    def list_subagents(self) -> tuple[Mapping[str, str], ...]:
         """List all available specialized subagents."""
-        from tax_agent.subagents import list_subagents
-        return list_subagents()
+        return _list_subagents()
 
     async def invoke_subagent_async(
         self,
@@ -191,9 +461,7 @@ class TaxAgentSDK:
         Yields:
             Response chunks from the subagent
         """
-        from tax_agent.subagents import get_subagent
-
-        subagent = get_subagent(subagent_name)
+        subagent = _get_subagent(subagent_name)
         if not subagent:
             yield f"Unknown subagent: {subagent_name}"
             return
@@ -202,26 +470,50 @@ class TaxAgentSDK:
             yield "Agent SDK not available for subagent invocation"
             return
 
-        from claude_code_sdk import query, ClaudeCodeOptions
-
         # Use subagent's model or default
-        model = subagent.model or self.model
-
-        hooks = self._get_hooks()
-        options = ClaudeCodeOptions(
+        async for text in self._stream(
+            prompt,
             system_prompt=subagent.system_prompt,
             allowed_tools=subagent.allowed_tools,
             max_turns=subagent.max_turns,
-            model=model,
-            cwd=str(source_dir) if source_dir else None,
-            **({"hooks": hooks} if hooks else {}),
-        )
+            model=subagent.model,
+            cwd=source_dir,
+        ):
+            yield text
+
+    async def invoke_subagent_batch_async(
+        self,
+        subagent_name: str,
+        prompts: list[str],
+        source_dir: Path | None = None,
+    ) -> list[str]:
+        """
+        Invoke a subagent for several prompts and collect each response.
+
+        When ``coalesce_subagents`` is enabled in config, prompts are merged
+        into shared multi-task queries via SubagentCoalescer. Otherwise they
+        run as independent queries bounded by ``agent_sdk_concurrency``.
+
+        Args:
+            subagent_name: Name of the subagent to invoke
+            prompts: Task prompts for the subagent
+            source_dir: Directory for file access
 
-        async for message in query(prompt=prompt, options=options):
-            if hasattr(message, 'content'):
-                for block in message.content:
-                    if hasattr(block, 'text'):
-                        yield block.text
+        Returns:
+            Response text for each prompt, in input order
+        """
+        if self.config.coalesce_subagents:
+            coalescer = SubagentCoalescer(self, subagent_name, source_dir=source_dir)
+            return list(await asyncio.gather(*[coalescer.submit(p) for p in prompts]))
+
+        semaphore = asyncio.Semaphore(max(1, self.config.agent_sdk_concurrency))
+
+        async def _one(prompt: str) -> str:
+            async with semaphore:
+                stream = self.invoke_subagent_async(subagent_name, prompt, source_dir)
+                return await _collect_text(stream)
+
+        return list(await asyncio.gather(*[_one(p) for p in prompts]))
 
     def invoke_subagent(
         self,
@@ -230,71 +522,103 @@ class TaxAgentSDK:
         source_dir: Path | None = None,
     ) -> str:
         """Synchronous wrapper for invoke_subagent_async."""
-        chunks = []
-        async def collect():
-            async for chunk in self.invoke_subagent_async(
-                subagent_name, prompt, source_dir
-            ):
-                chunks.append(chunk)
-        _run_async(collect())
-        return "".join(chunks)
+        stream = self.invoke_subagent_async(subagent_name, prompt, source_dir)
+        return run_async(_collect_text(stream))
 
     async def classify_document_async(
         self,
         text: str,
         file_path: Path | None = None,
+        force_llm: bool = False,
     ) -> dict:
         """
         Classify a tax document using agentic loop with verification.
 
+        Documents with a single unambiguous form-title signature are
+        classified locally without a model call.
+
         Args:
             text: Extracted text from the document
             file_path: Optional path to source file for tool access
+            force_llm: Always classify with the model, skipping signatures
 
         Returns:
             Dictionary with document classification
         """
+        if not force_llm:
+            signature_match = _match_signature(text)
+            if signature_match:
+                return signature_match
+
         if not self._sdk_available:
             # Fall back to legacy agent
             from tax_agent.agent import get_agent
             return get_agent().classify_document(text)
 
-        from claude_code_sdk import query, ClaudeCodeOptions
+        if len(text) > MAX_CLASSIFY_CHARS:
+            text = text[:MAX_CLASSIFY_CHARS]
 
-        hooks = self._get_hooks()
-        options = ClaudeCodeOptions(
+        prompt = CLASSIFY_PROMPT_TMPL % text
+
+        # Only the final text block carries the classification; earlier
+        # blocks are tool-use narration, so parse once after the stream ends.
+        final_chunk = ""
+        async for chunk in self._stream(
+            prompt,
             system_prompt=TAX_DOCUMENT_CLASSIFIER_PROMPT,
             allowed_tools=["Read", "Grep"] if file_path else [],
             max_turns=3,
-            model=self.model,
-            **({"hooks": hooks} if hooks else {}),
-        )
-
-        prompt = f"""Classify this tax document and return a JSON object with:
-- document_type: The document type (W2, 1099_INT, 1040, etc.)
-- document_category: "SOURCE" or "RETURN"
-- confidence: 0.0-1.0
-- issuer_name: Entity that issued this document
-- tax_year: Tax year
-- reasoning: Brief explanation
-
-Document text:
-{text[:8000]}
-"""
-
-        result = {}
-        async for message in query(prompt=prompt, options=options):
-            if hasattr(message, 'content'):
-                for block in message.content:
-                    if hasattr(block, 'text'):
-                        result = self._parse_json_response(block.text)
+        ):
+            final_chunk = chunk
 
+        result = self._parse_json_response(final_chunk)
         return result or {
             "document_type": "UNKNOWN",
             "confidence": 0.0,
             "reasoning": "Failed to classify document",
         }
 
+    async def classify_documents_async(
+        self,
+        items: list[tuple[str, Path | None]],
+        concurrency: int | None = None,
+    ) -> list[dict]:
+        """
+        Classify multiple documents concurrently.
+
+        Requests are fanned out with a bounded semaphore so that API rate
+        limits are respected while network latency is overlapped.
+
+        Args:
+            items: List of (text, file_path) pairs to classify
+            concurrency: Maximum in-flight requests. Defaults to config setting.
+
+        Returns:
+            List of classification dictionaries, in the same order as items
+        """
+        limit = concurrency or self.config.agent_sdk_concurrency
+        semaphore = asyncio.Semaphore(max(1, limit))
+
+        async def _one(text: str, file_path: Path | None) -> dict:
+            async with semaphore:
+                return await self.classify_document_async(text, file_path)
+
+        results = await asyncio.gather(
+            *[_one(text, file_path) for text, file_path in items],
+            return_exceptions=True,
+        )
+
+        return [
+            {
+                "document_type": "UNKNOWN",
+                "confidence": 0.0,
+                "reasoning": f"Failed to classify document: {result}",
+            }
+            if isinstance(result, BaseException)
+            else result
+            for result in results
+        ]
+
     async def analyze_documents_async(
         self,
         documents_summary: str,
@@ -318,34 +642,16 @@ Document text:
             yield result
             return
 
-        from claude_code_sdk import query, ClaudeCodeOptions
+        prompt = ANALYZE_PROMPT_TMPL % (taxpayer_info, documents_summary)
 
-        hooks = self._get_hooks()
-        options = ClaudeCodeOptions(
+        async for text in self._stream(
+            prompt,
             system_prompt=TAX_ANALYSIS_PROMPT,
             allowed_tools=self._get_allowed_tools(include_web=True),
             max_turns=self.max_turns,
-            model=self.model,
-            cwd=str(source_dir) if source_dir else None,
-            **({"hooks": hooks} if hooks else {}),
-        )
-
-        prompt = f"""Analyze this taxpayer's situation. Verify key figures by reading
-source documents if needed. Use current IRS limits via web search when relevant.
-
-Taxpayer Information:
-{taxpayer_info}
-
-Collected Documents Summary:
-{documents_summary}
-
-Provide comprehensive analysis with verification of key figures."""
-
-        async for message in query(prompt=prompt, options=options):
-            if hasattr(message, 'content'):
-                for block in message.content:
-                    if hasattr(block, 'text'):
-                        yield block.text
+            cwd=source_dir,
+        ):
+            yield text
 
     async def review_return_async(
         self,
@@ -370,34 +676,16 @@ Provide comprehensive analysis with verification of key figures."""
             yield result
             return
 
-        from claude_code_sdk import query, ClaudeCodeOptions
+        prompt = REVIEW_PROMPT_TMPL % (source_documents, return_text)
 
-        hooks = self._get_hooks()
-        options = ClaudeCodeOptions(
+        async for text in self._stream(
+            prompt,
             system_prompt=TAX_REVIEW_PROMPT,
             allowed_tools=self._get_allowed_tools(include_web=True),
             max_turns=self.max_turns,
-            model=self.model,
-            cwd=str(source_dir) if source_dir else None,
-            **({"hooks": hooks} if hooks else {}),
-        )
-
-        prompt = f"""Review this tax return against source documents.
-Cross-reference ALL amounts. Find EVERY error and optimization opportunity.
-
-Source Documents:
-{source_documents}
-
-Tax Return:
-{return_text}
-
-Verify each amount against source documents and identify discrepancies."""
-
-        async for message in query(prompt=prompt, options=options):
-            if hasattr(message, 'content'):
-                for block in message.content:
-                    if hasattr(block, 'text'):
-                        yield block.text
+            cwd=source_dir,
+        ):
+            yield text
 
     async def interactive_query_async(
         self,
@@ -420,42 +708,37 @@ Verify each amount against source documents and identify discrepancies."""
             yield "Agent SDK not available. Install claude-code-sdk for agentic features."
             return
 
-        from claude_code_sdk import query, ClaudeCodeOptions
-
-        system_prompt = """You are an expert tax advisor with access to tools.
-You can read files, search for patterns, and look up current tax information.
-Provide specific, actionable advice based on the taxpayer's situation.
-Always verify your recommendations against source documents when available."""
-
-        hooks = self._get_hooks()
-        options = ClaudeCodeOptions(
-            system_prompt=system_prompt,
-            allowed_tools=self._get_allowed_tools(include_web=True),
-            max_turns=self.max_turns,
-            model=self.model,
-            cwd=str(source_dir) if source_dir else None,
-            **({"hooks": hooks} if hooks else {}),
-        )
-
         full_prompt = query_text
         if context:
-            full_prompt = f"""Context:
-{json.dumps(context, indent=2, default=str)}
-
-Question/Request:
-{query_text}"""
+            full_prompt = INTERACTIVE_PROMPT_TMPL % (_dumps(context), query_text)
 
-        async for message in query(prompt=full_prompt, options=options):
-            if hasattr(message, 'content'):
-                for block in message.content:
-                    if hasattr(block, 'text'):
-                        yield block.text
+        async for text in self._stream(
+            full_prompt,
+            system_prompt=TAX_INTERACTIVE_PROMPT,
+            allowed_tools=self._get_allowed_tools(include_web=True),
+            max_turns=self.max_turns,
+            cwd=source_dir,
+        ):
+            yield text
 
     # Synchronous wrapper methods for backward compatibility
 
-    def classify_document(self, text: str, file_path: Path | None = None) -> dict:
+    def classify_document(
+        self,
+        text: str,
+        file_path: Path | None = None,
+        force_llm: bool = False,
+    ) -> dict:
         """Synchronous wrapper for classify_document_async."""
-        return _run_async(self.classify_document_async(text, file_path))
+        return run_async(self.classify_document_async(text, file_path, force_llm))
+
+    def classify_documents(
+        self,
+        items: list[tuple[str, Path | None]],
+        concurrency: int | None = None,
+    ) -> list[dict]:
+        """Synchronous wrapper for classify_documents_async."""
+        return run_async(self.classify_documents_async(items, concurrency))
 
     def analyze_documents(
         self,
@@ -464,14 +747,8 @@ Question/Request:
         source_dir: Path | None = None,
     ) -> str:
         """Synchronous wrapper for analyze_documents_async."""
-        chunks = []
-        async def collect():
-            async for chunk in self.analyze_documents_async(
-                documents_summary, taxpayer_info, source_dir
-            ):
-                chunks.append(chunk)
-        _run_async(collect())
-        return "".join(chunks)
+        stream = self.analyze_documents_async(documents_summary, taxpayer_info, source_dir)
+        return run_async(_collect_text(stream))
 
     def review_return(
         self,
@@ -480,14 +757,8 @@ Question/Request:
         source_dir: Path | None = None,
     ) -> str:
         """Synchronous wrapper for review_return_async."""
-        chunks = []
-        async def collect():
-            async for chunk in self.review_return_async(
-                return_text, source_documents, source_dir
-            ):
-                chunks.append(chunk)
-        _run_async(collect())
-        return "".join(chunks)
+        stream = self.review_return_async(return_text, source_documents, source_dir)
+        return run_async(_collect_text(stream))
 
     def interactive_query(
         self,
@@ -496,32 +767,193 @@ Question/Request:
         source_dir: Path | None = None,
     ) -> str:
         """Synchronous wrapper for interactive_query_async."""
-        chunks = []
-        async def collect():
-            async for chunk in self.interactive_query_async(
-                query_text, context, source_dir
-            ):
-                chunks.append(chunk)
-        _run_async(collect())
-        return "".join(chunks)
+        stream = self.interactive_query_async(query_text, context, source_dir)
+        return run_async(_collect_text(stream))
 
     def _parse_json_response(self, text: str) -> dict:
-        """Parse JSON from Claude's response, handling markdown code blocks."""
-        text = text.strip()
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
+        """
+        Parse the JSON object from Claude's response.
+
+        A fenced code block is used when present; otherwise each "{" is tried
+        in turn and the first one that starts a complete object wins, so
+        braces in surrounding prose are skipped.
+
+        Args:
+            text: Response text
+
+        Returns:
+            The parsed object, or an empty dict if none was found
+        """
+        # Cheap reject for prose-only chunks before running the regex
+        if "{" not in text:
             return {}
+        match = _FENCE_RE.search(text)
+        if match:
+            try:
+                result = _loads(match.group(1))
+            except json.JSONDecodeError:
+                result = None
+            if isinstance(result, dict):
+                return result
+
+        start = text.find("{")
+        while start != -1:
+            try:
+                result, _ = _JSON_DECODER.raw_decode(text, start)
+            except json.JSONDecodeError:
+                result = None
+            if isinstance(result, dict):
+                return result
+            start = text.find("{", start + 1)
+        return {}
 
     @property
     def is_available(self) -> bool:
         """Check if Agent SDK features are available."""
         return self._sdk_available
 
+    # Resource management
+
+    def close(self) -> None:
+        """
+        Release per-instance resources held between bursts of work.
+
+        Each SDK query runs its own CLI subprocess and reaps it when the
+        stream ends, so only cached state needs dropping. The agent stays
+        usable afterwards; caches are rebuilt on next use.
+        """
+        self._hooks = None
+        self._options_cache.clear()
+
+    async def aclose(self) -> None:
+        """Async variant of close()."""
+        self.close()
+
+    def __enter__(self) -> "TaxAgentSDK":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "TaxAgentSDK":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class SubagentCoalescer:
+    """
+    Coalesce prompts for one subagent into shared multi-task queries.
+
+    Prompts submitted within ``window_ms`` of each other (up to
+    ``max_batch``) are sent as one query that asks the subagent to tag
+    each answer with ``<task id="N">``. The response is split back per
+    prompt; any task the model fails to tag is re-run on its own.
+    """
+
+    def __init__(
+        self,
+        agent: TaxAgentSDK,
+        subagent_name: str,
+        window_ms: int = 100,
+        max_batch: int = 8,
+        source_dir: Path | None = None,
+    ):
+        """
+        Initialize the coalescer.
+
+        Args:
+            agent: SDK agent used to run queries
+            subagent_name: Name of the subagent to invoke
+            window_ms: How long to wait for more prompts before sending
+            max_batch: Maximum prompts merged into one query
+            source_dir: Directory for file access
+        """
+        self.agent = agent
+        self.subagent_name = subagent_name
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.source_dir = source_dir
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, prompt: str) -> str:
+        """
+        Queue a prompt and wait for its response.
+
+        Args:
+            prompt: Task prompt for the subagent
+
+        Returns:
+            The subagent's response to this prompt
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Send all pending prompts as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Keep a reference so the batch task isn't garbage-collected mid-run
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_one(self, prompt: str) -> str:
+        stream = self.agent.invoke_subagent_async(self.subagent_name, prompt, self.source_dir)
+        return await _collect_text(stream)
+
+    async def _run_batch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        """Run a batch and resolve each prompt's future."""
+        try:
+            if len(batch) == 1:
+                prompt, future = batch[0]
+                result = await self._run_one(prompt)
+                if not future.done():
+                    future.set_result(result)
+                return
+
+            tasks = "\n\n".join(
+                f"[{i}] {prompt}" for i, (prompt, _) in enumerate(batch, 1)
+            )
+            response = await self._run_one(COALESCED_TASKS_TMPL % tasks)
+            answers = {
+                int(task_id): answer.strip()
+                for task_id, answer in _TASK_RESPONSE_RE.findall(response)
+            }
+
+            # Callers cancelled while the batch ran need no answer, so no re-run
+            missing = [
+                i for i, (_, future) in enumerate(batch, 1)
+                if i not in answers and not future.done()
+            ]
+            if missing:
+                retried = await asyncio.gather(
+                    *[self._run_one(batch[i - 1][0]) for i in missing]
+                )
+                answers.update(zip(missing, retried))
+
+            for i, (_, future) in enumerate(batch, 1):
+                if not future.done():
+                    future.set_result(answers[i])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
 
 def get_sdk_agent() -> TaxAgentSDK:
     """Get the global SDK-based tax agent instance."""
@@ -531,8 +963,4 @@ def get_sdk_agent() -> TaxAgentSDK:
 
 def sdk_available() -> bool:
     """Check if the Claude Agent SDK is available."""
-    try:
-        from claude_code_sdk import query
-        return True
-    except ImportError:
-        return False
+    return _SDK_AVAILABLE
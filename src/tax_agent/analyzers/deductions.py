@@ -1,23 +1,362 @@
 """Deduction finder and tax optimization module with user interview."""
 
+import asyncio
+import copy
+import json
+import logging
+import re
+import sys
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
 from typing import Any
 
+from anthropic import APIError
+from pydantic import BaseModel
+
 from tax_agent.agent import get_agent
+from tax_agent.agent_sdk import get_sdk_agent, sdk_available
 from tax_agent.config import get_config
 from tax_agent.models.documents import DocumentType, TaxDocument
+from tax_agent.models.optimization import (
+    CreditsResult,
+    DeductionsResult,
+    InterviewQuestions,
+    StockCompAnalyses,
+)
 from tax_agent.models.taxpayer import FilingStatus, TaxpayerProfile
 from tax_agent.storage.database import get_database
-from tax_agent.utils import get_enum_value
+from tax_agent.tools.tax_calculations import get_standard_deduction
+from tax_agent.utils import get_enum_value, prefetch, run_async
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Interview questions are short, latency-sensitive JSON; a small model is enough.
+# Deduction finding and stock compensation analysis keep the configured model.
+INTERVIEW_MODEL = "claude-haiku-4-5"
+
+_JSON_DECODER = json.JSONDecoder()
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+
+# Static system prompts. These are sent as prompt-cache breakpoints, so keep
+# per-call data (documents, answers, profile) in the user message instead.
+_INTERVIEW_SYSTEM = """You are a tax advisor conducting an interview to find tax-saving opportunities.
+
+Based on the taxpayer's documents and any previous answers, generate 3-5 relevant questions to identify:
+1. Deductions they might be eligible for
+2. Credits they could claim
+3. Tax-advantaged accounts they could use
+4. Investment tax optimization opportunities
+5. Life events that affect taxes (marriage, children, home purchase, etc.)
+
+Pay special attention to:
+- RSU and stock compensation situations (vesting, sales, tax withholding)
+- Equity compensation from tech companies (ISOs, NSOs, ESPP)
+- Home office deductions for remote workers
+- State tax implications
+- Retirement contributions
+- Healthcare costs and HSA eligibility
+- Education expenses
+- Charitable giving
+
+Only ask questions that are relevant given the documents and previous answers.
+Focus on high-impact opportunities first.
+
+Return the questions with the return_questions tool."""
+
+_STOCK_COMP_SYSTEM = """You are an expert in equity compensation taxation. Analyze the stock compensation situation and provide:
+
+1. Tax Treatment: How this type of compensation is taxed
+2. Timing Considerations: When taxes are due (vesting, exercise, sale)
+3. Withholding Issues: Common withholding gaps with RSUs/options
+4. Optimization Strategies: Legal ways to minimize tax burden
+5. AMT Implications: Alternative Minimum Tax considerations
+6. State Tax: State-specific considerations if mentioned
+7. Wash Sale Rules: Applicability and how to avoid issues
+8. 83(b) Election: If applicable, discuss pros/cons
+
+For RSUs specifically:
+- Taxes are due at vesting (ordinary income)
+- Employers often withhold at flat rate (22%) which may be insufficient
+- Cost basis is FMV at vesting
+- Holding period for capital gains starts at vesting
+
+For ISOs specifically:
+- No regular tax at exercise (but AMT implications)
+- Qualifying disposition requires 2-year/1-year holding
+- Disqualifying disposition taxed as ordinary income
+
+Return one analysis per requested compensation type with the
+return_stock_comp_analyses tool."""
+
+_DEDUCTIONS_SYSTEM = """You are an AGGRESSIVE tax optimization expert. Your mission is to find EVERY POSSIBLE way to LEGALLY reduce this taxpayer's tax burden. Be exhaustive and creative.
+
+## MANDATORY ANALYSIS AREAS:
+
+### 1. STANDARD VS ITEMIZED DEEP DIVE
+- Calculate BOTH scenarios with actual numbers
+- Consider "bunching" strategies (alternate years)
+- SALT cap workarounds (pass-through entity elections)
+- When itemizing makes sense even if slightly lower
+
+### 2. ABOVE-THE-LINE DEDUCTIONS (These reduce AGI - VERY valuable!)
+- Traditional IRA contributions (even partial deductibility helps)
+- HSA contributions (triple tax advantage - MAXIMIZE)
+- Student loan interest ($2,500 max)
+- Self-employment tax deduction (50%)
+- Self-employed health insurance
+- Educator expenses ($300)
+- Moving expenses (military only)
+
+### 3. ITEMIZED DEDUCTIONS - MAXIMIZE EACH:
+- **SALT**: Capped at $10K but MUST claim full amount
+  - State income tax OR sales tax (whichever higher)
+  - Property taxes
+  - Consider S-Corp election for SALT workaround
+- **Mortgage Interest**: Is it fully deductible?
+- **Charitable**: Did they donate appreciated stock? Donor-advised funds?
+  - Bunching strategy for alternate years
+  - Qualified charitable distributions from IRA if 70.5+
+- **Medical**: Only over 7.5% AGI floor, but add up EVERYTHING
+  - Insurance premiums, copays, prescriptions, mileage, equipment
+
+### 4. TAX CREDITS - Often worth MORE than deductions!
+- **Child Tax Credit**: $2,000/child, partially refundable
+- **Child & Dependent Care**: Up to $3,000-$6,000 of expenses
+- **Earned Income Credit**: Check eligibility at ALL income levels
+- **Education Credits**:
+  - AOTC: $2,500 (40% refundable) - BETTER for undergrad
+  - LLC: $2,000 non-refundable - for grad school, part-time
+- **Retirement Saver's Credit**: Up to 50% of contributions
+- **Residential Energy Credits**: Solar, windows, HVAC, EV chargers
+- **EV Credit**: Up to $7,500 for new, $4,000 used
+- **Foreign Tax Credit**: For international investments
+
+### 5. RETIREMENT CONTRIBUTIONS - TAX-ADVANTAGED SAVINGS
+- 401(k): Max $23,000 + $7,500 catch-up (50+)
+- IRA: Max $7,000 + $1,000 catch-up
+- Backdoor Roth: If income too high for direct Roth
+- Mega Backdoor Roth: If plan allows after-tax contributions
+- SEP-IRA/Solo 401(k): If any self-employment income
+
+### 6. INVESTMENT TAX OPTIMIZATION
+- Tax-loss harvesting: Offset gains with losses
+- Asset location: Tax-inefficient investments in tax-advantaged accounts
+- Qualified dividends: Ensure proper classification (0%/15%/20% rates)
+- Long-term vs short-term: Hold 1+ year for better rates
+- Net Investment Income Tax: 3.8% on investment income above thresholds
+
+### 7. BUSINESS/SELF-EMPLOYMENT DEDUCTIONS
+- Home office (simplified: $5/sq ft up to 300 sq ft)
+- Business mileage (67 cents/mile for 2024)
+- Equipment and supplies
+- Professional development
+- Business portion of phone/internet
+- Qualified Business Income deduction (20% of QBI)
+
+### 8. LESS COMMON BUT VALUABLE
+- Alimony (pre-2019 divorces)
+- Gambling losses (up to winnings)
+- Casualty losses (federally declared disasters)
+- Jury duty pay given to employer
+- Work-related moving expenses (military)
+
+## OUTPUT REQUIREMENTS:
+For EACH deduction/credit found, provide:
+- **Name**: Specific deduction or credit
+- **Estimated Value**: Dollar amount of tax savings (not just deduction amount)
+- **Eligibility**: Why they likely qualify
+- **Action Required**: Specific steps to claim
+- **Documentation**: What records are needed
+- **Confidence**: High/Medium/Low
+
+Return the results with the return_deductions tool. Be AGGRESSIVE - find savings others would miss."""
+
+# Used before any documents or profile exist; only the interview answers are
+# available, so the model is asked for implied credits and nothing else.
+_CREDITS_SYSTEM = """You are a tax advisor. From the taxpayer's interview answers alone, list the federal tax credits they likely qualify for (child tax credit, dependent care, education, saver's, energy, EV, etc.) with rough dollar values, plus short action items to confirm eligibility.
+
+Only include credits the answers actually point to. Return them with the return_credits tool."""
+
+# Skeleton response for taxpayers with no documents and no profile yet.
+# The standard deduction amount and any credits are filled in per call.
+_DEFAULT_DEDUCTIONS: dict[str, Any] = {
+    "recommended_deductions": [],
+    "recommended_credits": [],
+    "standard_vs_itemized": {
+        "recommendation": "standard",
+        "standard_amount": 0.0,
+        "itemized_amount": 0.0,
+        "reasoning": (
+            "No documents have been collected yet, so there are no itemized "
+            "deductions to compare against the standard deduction."
+        ),
+    },
+    "estimated_total_savings": 0.0,
+    "action_items": [
+        "Collect your tax documents (W-2, 1099s, 1098) and run the analysis again",
+        "Save receipts for mortgage interest, property taxes, charitable gifts and medical costs",
+    ],
+    "planning_tips": [
+        "Maximize 401(k), IRA and HSA contributions to reduce taxable income",
+    ],
+    "warnings": [
+        "These recommendations are based on your interview answers only",
+    ],
+    "missed_opportunities": [],
+}
+
+
+def _tool(name: str, description: str, schema: type[BaseModel]) -> dict:
+    """Build a tool definition whose input schema is a Pydantic model."""
+    return {"name": name, "description": description, "input_schema": schema.model_json_schema()}
+
+
+# Claude is forced to answer through these tools, so responses arrive as
+# dictionaries instead of free text. The API does not enforce the schema,
+# so results are still validated against the models with _validated.
+_INTERVIEW_TOOL = _tool(
+    "return_questions", "Return the interview questions.", InterviewQuestions
+)
+_STOCK_COMP_TOOL = _tool(
+    "return_stock_comp_analyses",
+    "Return one analysis per requested stock compensation type.",
+    StockCompAnalyses,
+)
+_DEDUCTIONS_TOOL = _tool(
+    "return_deductions", "Return the deductions and credits found.", DeductionsResult
+)
+_CREDITS_TOOL = _tool(
+    "return_credits", "Return the credits implied by the answers.", CreditsResult
+)
+
+
+def _validated(result: dict[str, Any], schema: type[BaseModel]) -> dict[str, Any]:
+    """Validate a tool input against its result model, filling in defaults."""
+    return schema.model_validate(result).model_dump()
+
+
+def _tool_error(what: str, error: Exception) -> dict[str, Any]:
+    """Log a failed or malformed tool call and build the error result callers check."""
+    logger.warning("Failed to parse %s: %s", what, error)
+    return {"error": f"Failed to parse {what}", "details": str(error)}
+
+
+def _extract_json(text: str) -> Any:
+    """
+    Decode a JSON response, tolerating a surrounding Markdown code fence.
+
+    Unfenced JSON, the common case, is decoded in a single call; the fence
+    regex only runs when that fails.
+
+    Raises:
+        json.JSONDecodeError: If the text is not JSON, fenced or otherwise
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    try:
+        return loads(text)
+    except json.JSONDecodeError:
+        match = _FENCE_RE.match(text)
+        if match is None:
+            raise
+        return loads(match.group(1))
+
+
+def _iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    Incrementally decode the elements of a streamed JSON array.
+
+    Each element is yielded as soon as its closing token has arrived, so
+    callers can act on the first item while the rest is still streaming.
+    Text before the opening bracket (such as a code fence) is ignored.
+
+    Args:
+        chunks: Text fragments of a response containing a JSON array
+
+    Yields:
+        Decoded array elements
+    """
+    buf = ""
+    pos = -1
+    for chunk in chunks:
+        buf += chunk
+        if pos < 0:
+            start = buf.find("[")
+            if start < 0:
+                continue
+            pos = start + 1
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf) or buf[pos] == "]":
+                break
+            try:
+                item, pos = _JSON_DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break
+            yield item
+        if pos < len(buf) and buf[pos] == "]":
+            return
+
+
+def _fmt_w2(data: dict[str, Any]) -> str:
+    """Summarize W-2 wages and withholding."""
+    wages = data.get("box_1") or 0.0
+    withheld = data.get("box_2") or 0.0
+    text = f": Wages ${wages:,.2f}, Federal withheld ${withheld:,.2f}"
+    box12 = data.get("box_12_codes")
+    if box12:
+        text += f", Box 12 codes: {box12}"
+    return text
+
+
+def _fmt_1099_b(data: dict[str, Any]) -> str:
+    """Summarize 1099-B proceeds and gains."""
+    summary = data.get("summary") or {}
+    proceeds = summary.get("total_proceeds") or 0.0
+    st_gain = summary.get("short_term_gain_loss") or 0.0
+    lt_gain = summary.get("long_term_gain_loss") or 0.0
+    text = (
+        f": Proceeds ${proceeds:,.2f}, ST gain/loss ${st_gain:,.2f}, "
+        f"LT gain/loss ${lt_gain:,.2f}"
+    )
+    transactions = data.get("transactions")
+    if transactions:
+        text += f" ({len(transactions)} transactions)"
+    return text
+
+
+def _fmt_1099_int(data: dict[str, Any]) -> str:
+    """Summarize 1099-INT interest."""
+    return f": Interest ${data.get('box_1') or 0.0:,.2f}"
+
+
+def _fmt_1099_div(data: dict[str, Any]) -> str:
+    """Summarize 1099-DIV dividends."""
+    ordinary = data.get("box_1a") or 0.0
+    qualified = data.get("box_1b") or 0.0
+    return f": Ordinary ${ordinary:,.2f}, Qualified ${qualified:,.2f}"
+
+
+# Document summary formatters, keyed by DocumentType value (TaxDocument
+# stores enum values as plain strings)
+_DOC_FORMATTERS: dict[str, Callable[[dict[str, Any]], str]] = {
+    DocumentType.W2.value: _fmt_w2,
+    DocumentType.FORM_1099_B.value: _fmt_1099_b,
+    DocumentType.FORM_1099_INT.value: _fmt_1099_int,
+    DocumentType.FORM_1099_DIV.value: _fmt_1099_div,
+}
 
 
 def _get_sdk_agent():
     """Get SDK agent if available and enabled."""
-    config = get_config()
-    if config.use_agent_sdk:
-        from tax_agent.agent_sdk import get_sdk_agent, sdk_available
-        if sdk_available():
-            return get_sdk_agent()
+    if get_config().use_agent_sdk and sdk_available():
+        return get_sdk_agent()
     return None
 
 
@@ -42,6 +381,8 @@ class TaxOptimizer:
         self.config = config
         self._agent = None
         self._sdk_agent = None
+        self._summary_cache: dict[tuple, str] = {}
+        self._docs_cache: dict[int, list[TaxDocument]] = {}
 
     @property
     def agent(self):
@@ -61,6 +402,18 @@ class TaxOptimizer:
         """Check if SDK should be used."""
         return self.config.use_agent_sdk and self.sdk_agent is not None
 
+    def _get_docs(self) -> list[TaxDocument]:
+        """Get the documents for this tax year, querying the database only once."""
+        docs = self._docs_cache.get(self.tax_year)
+        if docs is None:
+            docs = self.db.get_documents(tax_year=self.tax_year)
+            self._docs_cache[self.tax_year] = docs
+        return docs
+
+    def invalidate_docs(self) -> None:
+        """Forget cached documents, e.g. after new documents are collected."""
+        self._docs_cache.clear()
+
     def get_interview_questions(
         self,
         documents: list[TaxDocument] | None = None,
@@ -80,44 +433,87 @@ class TaxOptimizer:
             List of question dictionaries with 'id', 'question', 'type', 'options'
         """
         if documents is None:
-            documents = self.db.get_documents(tax_year=self.tax_year)
+            documents = self._get_docs()
 
-        # Build context for Claude
-        doc_summary = self._build_document_summary(documents)
-        answers_summary = self._format_previous_answers(previous_answers or {})
+        return list(self.iter_interview_questions(documents, previous_answers))
 
-        system = """You are a tax advisor conducting an interview to find tax-saving opportunities.
+    def iter_interview_questions(
+        self,
+        documents: list[TaxDocument] | None = None,
+        previous_answers: dict[str, Any] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Stream interview questions as the model generates them.
 
-Based on the taxpayer's documents and any previous answers, generate 3-5 relevant questions to identify:
-1. Deductions they might be eligible for
-2. Credits they could claim
-3. Tax-advantaged accounts they could use
-4. Investment tax optimization opportunities
-5. Life events that affect taxes (marriage, children, home purchase, etc.)
+        Each question is yielded as soon as its JSON object is complete, so
+        an interactive interview can show the first question while the rest
+        are still being written. Falls back to the default questions if the
+        response contains none.
 
-Pay special attention to:
-- RSU and stock compensation situations (vesting, sales, tax withholding)
-- Equity compensation from tech companies (ISOs, NSOs, ESPP)
-- Home office deductions for remote workers
-- State tax implications
-- Retirement contributions
-- Healthcare costs and HSA eligibility
-- Education expenses
-- Charitable giving
+        Args:
+            documents: List of collected documents
+            previous_answers: Previously answered questions
 
-Return a JSON array of questions. Each question should have:
-- "id": Unique identifier
-- "question": The question text
-- "type": "yes_no", "number", "text", "select", or "multi_select"
-- "options": Array of options (for select/multi_select types)
-- "relevance": Brief explanation of why this question matters for taxes
+        Yields:
+            Question dictionaries with 'id', 'question', 'type', 'options'
+        """
+        if documents is None:
+            documents = self._get_docs()
+
+        user_message = self._interview_message(documents, previous_answers)
+        chunks = self.agent._stream_tool(
+            _INTERVIEW_SYSTEM,
+            user_message,
+            _INTERVIEW_TOOL,
+            cache_system=True,
+            model=INTERVIEW_MODEL,
+        )
+        found = False
+        try:
+            # The tool input is {"questions": [...]}; stream the array's items
+            for item in _iter_json_array(chunks):
+                if isinstance(item, dict) and "id" in item and "question" in item:
+                    found = True
+                    yield item
+        except APIError as e:
+            logger.warning("Interview question generation failed: %s", e)
+
+        if not found:
+            yield from self._get_default_questions(documents)
+
+    async def aget_interview_questions(
+        self,
+        documents: list[TaxDocument] | None = None,
+        previous_answers: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Async variant of get_interview_questions."""
+        if documents is None:
+            documents = self._get_docs()
 
-Only ask questions that are relevant given the documents and previous answers.
-Focus on high-impact opportunities first.
+        user_message = self._interview_message(documents, previous_answers)
+        try:
+            result = await self.agent._acall_tool(
+                _INTERVIEW_SYSTEM,
+                user_message,
+                _INTERVIEW_TOOL,
+                cache_system=True,
+                model=INTERVIEW_MODEL,
+            )
+        except APIError as e:
+            logger.warning("Interview question generation failed: %s", e)
+            return self._get_default_questions(documents)
+        return result.get("questions") or self._get_default_questions(documents)
 
-Return ONLY the JSON array, no other text."""
+    def _interview_message(
+        self,
+        documents: list[TaxDocument],
+        previous_answers: dict[str, Any] | None,
+    ) -> str:
+        """Build the user message for interview question generation."""
+        doc_summary = self._build_document_summary(documents)
+        answers_summary = self._format_previous_answers(previous_answers or {})
 
-        user_message = f"""Collected Documents:
+        return f"""Collected Documents:
 {doc_summary}
 
 Previous Answers:
@@ -125,21 +521,6 @@ Previous Answers:
 
 Generate relevant interview questions to identify tax-saving opportunities."""
 
-        response = self.agent._call(system, user_message)
-
-        # Parse JSON response
-        import json
-        try:
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Return default questions if parsing fails
-            return self._get_default_questions(documents)
-
     def _get_default_questions(self, documents: list[TaxDocument]) -> list[dict[str, Any]]:
         """Return default interview questions."""
         questions = [
@@ -193,57 +574,118 @@ Generate relevant interview questions to identify tax-saving opportunities."""
         Returns:
             Analysis with tax implications and optimization suggestions
         """
-        system = """You are an expert in equity compensation taxation. Analyze the stock compensation situation and provide:
+        items = [{"type": compensation_type, "details": details}]
+        return self.analyze_stock_compensations(items)[compensation_type]
 
-1. Tax Treatment: How this type of compensation is taxed
-2. Timing Considerations: When taxes are due (vesting, exercise, sale)
-3. Withholding Issues: Common withholding gaps with RSUs/options
-4. Optimization Strategies: Legal ways to minimize tax burden
-5. AMT Implications: Alternative Minimum Tax considerations
-6. State Tax: State-specific considerations if mentioned
-7. Wash Sale Rules: Applicability and how to avoid issues
-8. 83(b) Election: If applicable, discuss pros/cons
-
-For RSUs specifically:
-- Taxes are due at vesting (ordinary income)
-- Employers often withhold at flat rate (22%) which may be insufficient
-- Cost basis is FMV at vesting
-- Holding period for capital gains starts at vesting
-
-For ISOs specifically:
-- No regular tax at exercise (but AMT implications)
-- Qualifying disposition requires 2-year/1-year holding
-- Disqualifying disposition taxed as ordinary income
-
-Return a structured JSON response with:
-- "tax_treatment": Explanation of how it's taxed
-- "immediate_actions": Things to do now
-- "estimated_tax_impact": Rough estimate if possible
-- "optimization_tips": Specific strategies
-- "warnings": Things to watch out for
-- "questions_needed": Additional info needed for better analysis
+    def analyze_stock_compensations(
+        self,
+        items: list[dict[str, Any]],
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Analyze several stock compensation types in a single Claude call.
 
-Only return the JSON object."""
+        Args:
+            items: Dicts with 'type' (RSU, ISO, NSO, ESPP) and 'details';
+                types should be distinct
 
-        user_message = f"""Stock Compensation Analysis Request:
+        Returns:
+            Analysis per compensation type, keyed by type
+        """
+        if not items:
+            return {}
 
-Type: {compensation_type}
-Details: {details}
+        user_message, max_tokens = self._stock_comp_request(items)
+        try:
+            result = _validated(
+                self.agent._call_tool(
+                    _STOCK_COMP_SYSTEM, user_message, _STOCK_COMP_TOOL, max_tokens,
+                    cache_system=True,
+                ),
+                StockCompAnalyses,
+            )
+        except ValueError as e:
+            return self._stock_comp_error(items, e)
+        return self._split_stock_comps(items, result)
 
-Provide a comprehensive tax analysis."""
+    async def aanalyze_stock_compensation(
+        self,
+        compensation_type: str,
+        details: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Async variant of analyze_stock_compensation."""
+        items = [{"type": compensation_type, "details": details}]
+        return (await self.aanalyze_stock_compensations(items))[compensation_type]
 
-        response = self.agent._call(system, user_message, max_tokens=2000)
+    async def aanalyze_stock_compensations(
+        self,
+        items: list[dict[str, Any]],
+    ) -> dict[str, dict[str, Any]]:
+        """Async variant of analyze_stock_compensations."""
+        if not items:
+            return {}
 
-        import json
+        user_message, max_tokens = self._stock_comp_request(items)
         try:
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {"error": "Failed to parse analysis", "raw_response": response}
+            result = _validated(
+                await self.agent._acall_tool(
+                    _STOCK_COMP_SYSTEM, user_message, _STOCK_COMP_TOOL, max_tokens,
+                    cache_system=True,
+                ),
+                StockCompAnalyses,
+            )
+        except ValueError as e:
+            return self._stock_comp_error(items, e)
+        return self._split_stock_comps(items, result)
+
+    @staticmethod
+    def _stock_comp_request(items: list[dict[str, Any]]) -> tuple[str, int]:
+        """Build the user message and token budget for stock compensation analysis."""
+        if len(items) == 1:
+            return f"""Stock Compensation Analysis Request:
+
+Type: {items[0]["type"]}
+Details: {items[0]["details"]}
+
+Provide a comprehensive tax analysis.""", 2000
+
+        numbered = "\n".join(
+            f"{i}. Type: {item['type']}\n   Details: {item['details']}"
+            for i, item in enumerate(items, 1)
+        )
+        return f"""Stock Compensation Analysis Request:
+
+{numbered}
+
+Provide a comprehensive tax analysis for each type.""", 2000 + 1500 * (len(items) - 1)
+
+    @staticmethod
+    def _stock_comp_error(
+        items: list[dict[str, Any]],
+        error: Exception,
+    ) -> dict[str, dict[str, Any]]:
+        """Report a failed stock compensation call against every requested type."""
+        result = _tool_error("stock compensation analysis", error)
+        return {item["type"]: result for item in items}
+
+    @staticmethod
+    def _split_stock_comps(
+        items: list[dict[str, Any]],
+        result: dict[str, Any],
+    ) -> dict[str, dict[str, Any]]:
+        """Split a stock compensation tool result by compensation type."""
+        analyses = result.get("analyses", [])
+        if len(items) == 1 and len(analyses) == 1:
+            # A single analysis belongs to the single requested type even if
+            # the model reworded the type name
+            return {items[0]["type"]: analyses[0]}
+
+        by_type = {analysis.get("compensation_type"): analysis for analysis in analyses}
+        return {
+            item["type"]: by_type.get(
+                item["type"], {"error": f"No analysis returned for {item['type']}"}
+            )
+            for item in items
+        }
 
     def find_deductions(
         self,
@@ -270,121 +712,277 @@ Provide a comprehensive tax analysis."""
             Dictionary with found deductions and recommendations
         """
         if documents is None:
-            documents = self.db.get_documents(tax_year=self.tax_year)
+            documents = self._get_docs()
+
+        if not documents and taxpayer is None:
+            return self._default_deductions_response(interview_answers)
 
         doc_summary = self._build_document_summary(documents)
         answers_summary = self._format_previous_answers(interview_answers or {})
         profile_summary = self._format_taxpayer_profile(taxpayer)
 
-        # Get source directory for SDK tool access
-        source_dir = None
-        for doc in documents:
-            if doc.file_path:
-                source_dir = Path(doc.file_path).parent
-                break
-
         # Check if we should use SDK
         should_use_sdk = use_sdk if use_sdk is not None else self._use_sdk()
 
         if should_use_sdk and self.sdk_agent:
             return self._find_deductions_with_sdk(
-                doc_summary, answers_summary, profile_summary, source_dir
+                doc_summary, answers_summary, profile_summary, self._source_dir(documents)
             )
 
-        system = """You are an AGGRESSIVE tax optimization expert. Your mission is to find EVERY POSSIBLE way to LEGALLY reduce this taxpayer's tax burden. Be exhaustive and creative.
+        user_message = self._deductions_message(doc_summary, answers_summary, profile_summary)
+        try:
+            return _validated(
+                self.agent._call_tool(
+                    _DEDUCTIONS_SYSTEM, user_message, _DEDUCTIONS_TOOL, max_tokens=3000,
+                    cache_system=True,
+                ),
+                DeductionsResult,
+            )
+        except ValueError as e:
+            return _tool_error("deductions", e)
 
-## MANDATORY ANALYSIS AREAS:
+    async def afind_deductions(
+        self,
+        documents: list[TaxDocument] | None = None,
+        interview_answers: dict[str, Any] | None = None,
+        taxpayer: TaxpayerProfile | None = None,
+        use_sdk: bool | None = None,
+    ) -> dict[str, Any]:
+        """
+        Async variant of find_deductions.
 
-### 1. STANDARD VS ITEMIZED DEEP DIVE
-- Calculate BOTH scenarios with actual numbers
-- Consider "bunching" strategies (alternate years)
-- SALT cap workarounds (pass-through entity elections)
-- When itemizing makes sense even if slightly lower
+        The SDK path is synchronous, so it runs in a worker thread to avoid
+        blocking the other requests on the event loop.
+        """
+        if documents is None:
+            documents = self._get_docs()
 
-### 2. ABOVE-THE-LINE DEDUCTIONS (These reduce AGI - VERY valuable!)
-- Traditional IRA contributions (even partial deductibility helps)
-- HSA contributions (triple tax advantage - MAXIMIZE)
-- Student loan interest ($2,500 max)
-- Self-employment tax deduction (50%)
-- Self-employed health insurance
-- Educator expenses ($300)
-- Moving expenses (military only)
+        if not documents and taxpayer is None:
+            return await self._adefault_deductions_response(interview_answers)
 
-### 3. ITEMIZED DEDUCTIONS - MAXIMIZE EACH:
-- **SALT**: Capped at $10K but MUST claim full amount
-  - State income tax OR sales tax (whichever higher)
-  - Property taxes
-  - Consider S-Corp election for SALT workaround
-- **Mortgage Interest**: Is it fully deductible?
-- **Charitable**: Did they donate appreciated stock? Donor-advised funds?
-  - Bunching strategy for alternate years
-  - Qualified charitable distributions from IRA if 70.5+
-- **Medical**: Only over 7.5% AGI floor, but add up EVERYTHING
-  - Insurance premiums, copays, prescriptions, mileage, equipment
+        doc_summary = self._build_document_summary(documents)
+        answers_summary = self._format_previous_answers(interview_answers or {})
+        profile_summary = self._format_taxpayer_profile(taxpayer)
 
-### 4. TAX CREDITS - Often worth MORE than deductions!
-- **Child Tax Credit**: $2,000/child, partially refundable
-- **Child & Dependent Care**: Up to $3,000-$6,000 of expenses
-- **Earned Income Credit**: Check eligibility at ALL income levels
-- **Education Credits**:
-  - AOTC: $2,500 (40% refundable) - BETTER for undergrad
-  - LLC: $2,000 non-refundable - for grad school, part-time
-- **Retirement Saver's Credit**: Up to 50% of contributions
-- **Residential Energy Credits**: Solar, windows, HVAC, EV chargers
-- **EV Credit**: Up to $7,500 for new, $4,000 used
-- **Foreign Tax Credit**: For international investments
+        should_use_sdk = use_sdk if use_sdk is not None else self._use_sdk()
 
-### 5. RETIREMENT CONTRIBUTIONS - TAX-ADVANTAGED SAVINGS
-- 401(k): Max $23,000 + $7,500 catch-up (50+)
-- IRA: Max $7,000 + $1,000 catch-up
-- Backdoor Roth: If income too high for direct Roth
-- Mega Backdoor Roth: If plan allows after-tax contributions
-- SEP-IRA/Solo 401(k): If any self-employment income
+        if should_use_sdk and self.sdk_agent:
+            return await asyncio.to_thread(
+                self._find_deductions_with_sdk,
+                doc_summary, answers_summary, profile_summary, self._source_dir(documents),
+            )
 
-### 6. INVESTMENT TAX OPTIMIZATION
-- Tax-loss harvesting: Offset gains with losses
-- Asset location: Tax-inefficient investments in tax-advantaged accounts
-- Qualified dividends: Ensure proper classification (0%/15%/20% rates)
-- Long-term vs short-term: Hold 1+ year for better rates
-- Net Investment Income Tax: 3.8% on investment income above thresholds
+        user_message = self._deductions_message(doc_summary, answers_summary, profile_summary)
+        try:
+            return _validated(
+                await self.agent._acall_tool(
+                    _DEDUCTIONS_SYSTEM, user_message, _DEDUCTIONS_TOOL, max_tokens=3000,
+                    cache_system=True,
+                ),
+                DeductionsResult,
+            )
+        except ValueError as e:
+            return _tool_error("deductions", e)
 
-### 7. BUSINESS/SELF-EMPLOYMENT DEDUCTIONS
-- Home office (simplified: $5/sq ft up to 300 sq ft)
-- Business mileage (67 cents/mile for 2024)
-- Equipment and supplies
-- Professional development
-- Business portion of phone/internet
-- Qualified Business Income deduction (20% of QBI)
+    def _default_deductions_response(
+        self, interview_answers: dict[str, Any] | None
+    ) -> dict[str, Any]:
+        """
+        Cold-start deductions for a taxpayer with no documents or profile.
 
-### 8. LESS COMMON BUT VALUABLE
-- Alimony (pre-2019 divorces)
-- Gambling losses (up to winnings)
-- Casualty losses (federally declared disasters)
-- Jury duty pay given to employer
-- Work-related moving expenses (military)
+        Skips the full deductions prompt: the standard deduction comes from
+        the static tables and only the credits implied by the interview
+        answers are requested, from the small interview model.
 
-## OUTPUT REQUIREMENTS:
-For EACH deduction/credit found, provide:
-- **Name**: Specific deduction or credit
-- **Estimated Value**: Dollar amount of tax savings (not just deduction amount)
-- **Eligibility**: Why they likely qualify
-- **Action Required**: Specific steps to claim
-- **Documentation**: What records are needed
-- **Confidence**: High/Medium/Low
+        Args:
+            interview_answers: Answers from user interview
+
+        Returns:
+            Dictionary shaped like find_deductions results
+        """
+        credits = {}
+        if interview_answers:
+            try:
+                credits = _validated(
+                    self.agent._call_tool(
+                        _CREDITS_SYSTEM,
+                        self._format_previous_answers(interview_answers),
+                        _CREDITS_TOOL,
+                        max_tokens=1000,
+                        model=INTERVIEW_MODEL,
+                    ),
+                    CreditsResult,
+                )
+            except ValueError as e:
+                # The defaults still stand without the credits
+                _tool_error("credits", e)
+        return self._default_deductions(credits)
+
+    async def _adefault_deductions_response(
+        self, interview_answers: dict[str, Any] | None
+    ) -> dict[str, Any]:
+        """Async variant of _default_deductions_response."""
+        credits = {}
+        if interview_answers:
+            try:
+                credits = _validated(
+                    await self.agent._acall_tool(
+                        _CREDITS_SYSTEM,
+                        self._format_previous_answers(interview_answers),
+                        _CREDITS_TOOL,
+                        max_tokens=1000,
+                        model=INTERVIEW_MODEL,
+                    ),
+                    CreditsResult,
+                )
+            except ValueError as e:
+                _tool_error("credits", e)
+        return self._default_deductions(credits)
+
+    def _default_deductions(self, credits: dict[str, Any]) -> dict[str, Any]:
+        """Fill the default deductions skeleton with the standard deduction and credits."""
+        result = copy.deepcopy(_DEFAULT_DEDUCTIONS)
+        filing_status = self.config.get("filing_status") or FilingStatus.SINGLE.value
+        result["standard_vs_itemized"]["standard_amount"] = get_standard_deduction(
+            self.tax_year, get_enum_value(filing_status)
+        )
+
+        recommended = credits.get("recommended_credits") or []
+        result["recommended_credits"] = recommended
+        result["estimated_total_savings"] = sum(
+            c.get("estimated_value") or 0.0 for c in recommended
+        )
+        result["action_items"] = (credits.get("action_items") or []) + result["action_items"]
+        return result
+
+    async def run_full_analysis(
+        self,
+        taxpayer: TaxpayerProfile | None = None,
+        documents: list[TaxDocument] | None = None,
+        answers: dict[str, Any] | None = None,
+        stock_items: list[tuple[str, dict[str, Any]]] | None = None,
+        include_questions: bool = True,
+    ) -> dict[str, Any]:
+        """
+        Run the independent optimizer requests concurrently.
+
+        Deduction finding, stock compensation analysis (all types in one
+        request) and, optionally, follow-up interview questions are separate
+        Claude round-trips, so they are issued together and awaited with
+        asyncio.gather.
+
+        Args:
+            taxpayer: Taxpayer profile
+            documents: Collected tax documents (loaded once if omitted)
+            answers: Answers from user interview
+            stock_items: (compensation_type, details) pairs to analyze
+            include_questions: Also generate interview questions
 
-Return JSON with:
-- "recommended_deductions": [{name, estimated_value, action_needed, documentation}]
-- "recommended_credits": [{name, estimated_value, eligibility, action_needed}]
-- "standard_vs_itemized": {recommendation, standard_amount, itemized_amount, reasoning}
-- "estimated_total_savings": number (sum of ALL tax savings)
-- "action_items": ["Specific step 1", "Specific step 2", ...]
-- "planning_tips": ["Next year tip 1", ...]
-- "warnings": ["Audit risk or concern 1", ...]
-- "missed_opportunities": ["Prior year item 1", ...] (if amendable)
+        Returns:
+            Dictionary with 'deductions', 'stock_compensation' (one analysis
+            per stock item, in order) and 'questions' (None when skipped)
+        """
+        if documents is None:
+            documents = self._get_docs()
+        stock_items = stock_items or []
 
-Only return the JSON object. Be AGGRESSIVE - find savings others would miss."""
+        stock_comp = [{"type": comp_type, "details": details} for comp_type, details in stock_items]
 
-        user_message = f"""Tax Optimization Analysis:
+        tasks = [
+            self.afind_deductions(documents, answers, taxpayer),
+            self.aanalyze_stock_compensations(stock_comp),
+        ]
+        if include_questions:
+            tasks.append(self.aget_interview_questions(documents, answers))
+
+        results = await asyncio.gather(*tasks)
+
+        return {
+            "deductions": results[0],
+            "stock_compensation": [results[1][comp_type] for comp_type, _ in stock_items],
+            "questions": results[2] if include_questions else None,
+        }
+
+    def full_analysis(
+        self,
+        taxpayer: TaxpayerProfile | None = None,
+        documents: list[TaxDocument] | None = None,
+        answers: dict[str, Any] | None = None,
+        stock_items: list[tuple[str, dict[str, Any]]] | None = None,
+        include_questions: bool = True,
+    ) -> dict[str, Any]:
+        """Synchronous wrapper around run_full_analysis for CLI use."""
+        return run_async(
+            self.run_full_analysis(taxpayer, documents, answers, stock_items, include_questions)
+        )
+
+    @staticmethod
+    def _source_dir(documents: list[TaxDocument]) -> Path | None:
+        """Get the source directory of the first file-backed document for SDK tools."""
+        for doc in documents:
+            if doc.file_path:
+                return Path(doc.file_path).parent
+        return None
+
+    def find_deductions_batch(
+        self,
+        taxpayers: list[TaxpayerProfile],
+        documents: list[TaxDocument] | None = None,
+        interview_answers: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Find deductions for several taxpayer profiles in one Message Batch.
+
+        Batched requests cost half as much as regular calls but complete
+        asynchronously (usually within minutes), so this is meant for
+        offline what-if runs such as comparing filing statuses. A single
+        profile is analyzed directly with find_deductions.
+
+        Args:
+            taxpayers: Taxpayer profiles to analyze
+            documents: Collected tax documents shared by every profile
+            interview_answers: Answers from user interview
+
+        Returns:
+            One deductions dictionary per taxpayer, in input order
+        """
+        if len(taxpayers) <= 1:
+            return [
+                self.find_deductions(documents, interview_answers, taxpayer)
+                for taxpayer in taxpayers
+            ]
+
+        if documents is None:
+            documents = self._get_docs()
+
+        doc_summary = self._build_document_summary(documents)
+        answers_summary = self._format_previous_answers(interview_answers or {})
+        messages = [
+            self._deductions_message(
+                doc_summary, answers_summary, self._format_taxpayer_profile(taxpayer)
+            )
+            for taxpayer in taxpayers
+        ]
+
+        results = self.agent._call_batch(
+            _DEDUCTIONS_SYSTEM, messages, max_tokens=3000, tool=_DEDUCTIONS_TOOL
+        )
+        return [self._batch_deductions(result) for result in results]
+
+    @staticmethod
+    def _batch_deductions(result: dict[str, Any] | None) -> dict[str, Any]:
+        """Validate one batch deductions result, or report why it is missing."""
+        if result is None:
+            return {"error": "Batch request did not complete"}
+        try:
+            return _validated(result, DeductionsResult)
+        except ValueError as e:
+            return _tool_error("deductions", e)
+
+    @staticmethod
+    def _deductions_message(doc_summary: str, answers_summary: str, profile_summary: str) -> str:
+        """Build the per-taxpayer user message for deduction finding."""
+        return f"""Tax Optimization Analysis:
 
 Documents:
 {doc_summary}
@@ -397,19 +995,6 @@ Taxpayer Profile:
 
 Find all applicable deductions and credits."""
 
-        response = self.agent._call(system, user_message, max_tokens=3000)
-
-        import json
-        try:
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {"error": "Failed to parse deductions", "raw_response": response}
-
     def _find_deductions_with_sdk(
         self,
         doc_summary: str,
@@ -462,65 +1047,49 @@ Return a JSON object with:
                 source_dir=source_dir,
             )
 
-            # Parse JSON from response
-            import json
-            result = result.strip()
-            if result.startswith("```"):
-                result = result.split("```")[1]
-                if result.startswith("json"):
-                    result = result[4:]
+            try:
+                return _extract_json(result)
+            except json.JSONDecodeError:
+                pass
 
-            # Find JSON object in response
+            # The agent may wrap the JSON object in prose
             json_start = result.find("{")
             json_end = result.rfind("}") + 1
             if json_start >= 0 and json_end > json_start:
-                return json.loads(result[json_start:json_end])
+                return _extract_json(result[json_start:json_end])
 
             return {"error": "No JSON found in SDK response", "raw_response": result}
         except Exception as e:
             # Fall back to legacy method on error
-            import logging
-            logging.warning(f"SDK deduction finding failed: {e}")
+            logger.warning("SDK deduction finding failed: %s", e)
             return {"error": str(e), "fallback": "Use find_deductions with use_sdk=False"}
 
     def _build_document_summary(self, documents: list[TaxDocument]) -> str:
-        """Build a summary of documents for Claude."""
+        """
+        Build a summary of documents for Claude.
+
+        Summaries are memoized per document set. The key includes each
+        document's updated_at, so edited documents are summarized afresh.
+        """
+        key = tuple((doc.id, doc.updated_at) for doc in documents)
+        summary = self._summary_cache.get(key)
+        if summary is None:
+            summary = self._summarize_documents(documents)
+            self._summary_cache[key] = summary
+        return summary
+
+    def _summarize_documents(self, documents: list[TaxDocument]) -> str:
+        """Format one summary line per document."""
         if not documents:
             return "No documents collected yet."
 
         lines = []
         for doc in documents:
-            line = f"- {get_enum_value(doc.document_type)} from {doc.issuer_name}"
-            data = doc.extracted_data
-
-            if doc.document_type == DocumentType.W2:
-                wages = data.get("box_1", 0) or 0
-                withheld = data.get("box_2", 0) or 0
-                state_wages = data.get("box_16", 0) or 0
-                box12 = data.get("box_12_codes", [])
-                line += f": Wages ${wages:,.2f}, Federal withheld ${withheld:,.2f}"
-                if box12:
-                    line += f", Box 12 codes: {box12}"
-
-            elif doc.document_type == DocumentType.FORM_1099_B:
-                summary = data.get("summary", {})
-                transactions = data.get("transactions", [])
-                proceeds = summary.get("total_proceeds", 0) or 0
-                st_gain = summary.get("short_term_gain_loss", 0) or 0
-                lt_gain = summary.get("long_term_gain_loss", 0) or 0
-                line += f": Proceeds ${proceeds:,.2f}, ST gain/loss ${st_gain:,.2f}, LT gain/loss ${lt_gain:,.2f}"
-                if transactions:
-                    line += f" ({len(transactions)} transactions)"
-
-            elif doc.document_type == DocumentType.FORM_1099_INT:
-                interest = data.get("box_1", 0) or 0
-                line += f": Interest ${interest:,.2f}"
-
-            elif doc.document_type == DocumentType.FORM_1099_DIV:
-                ordinary = data.get("box_1a", 0) or 0
-                qualified = data.get("box_1b", 0) or 0
-                line += f": Ordinary ${ordinary:,.2f}, Qualified ${qualified:,.2f}"
-
+            doc_type = get_enum_value(doc.document_type)
+            line = f"- {doc_type} from {doc.issuer_name}"
+            fmt = _DOC_FORMATTERS.get(doc_type)
+            if fmt is not None:
+                line += fmt(doc.extracted_data)
             lines.append(line)
 
         return "\n".join(lines)
@@ -551,59 +1120,81 @@ Has HSA: {profile.has_hsa}
 Foreign Accounts: {profile.has_foreign_accounts}"""
 
 
+_ANSWER_PROMPTS = {
+    "yes_no": "  [y/n]: ",
+    "number": "  Enter amount: $",
+    "select": "  Enter number: ",
+    "multi_select": "  Enter numbers: ",
+}
+_OPTIONS_HEADERS = {
+    "select": "  Options:",
+    "multi_select": "  Options (enter numbers separated by commas):",
+}
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def _question_prompt(q: dict[str, Any]) -> str:
+    """Build the complete terminal prompt for one interview question."""
+    lines = [f"\n{q['question']}"]
+    if "relevance" in q:
+        lines.append(f"  (Why: {q['relevance']})")
+    header = _OPTIONS_HEADERS.get(q["type"])
+    if header:
+        lines.append(header)
+        lines.extend(f"    {i}. {opt}" for i, opt in enumerate(q.get("options", []), 1))
+    lines.append(_ANSWER_PROMPTS.get(q["type"], "  Answer: "))
+    return "\n".join(lines)
+
+
 def run_tax_interview(tax_year: int | None = None) -> dict[str, Any]:
     """
     Convenience function to run interactive tax interview.
 
+    Each question is written to the terminal in a single call and its
+    answer is read with one readline.
+
     Returns collected answers.
     """
     optimizer = TaxOptimizer(tax_year)
     answers: dict[str, Any] = {}
 
-    questions = optimizer.get_interview_questions()
-
-    print("\n=== Tax Optimization Interview ===\n")
-    print("Answer these questions to help identify tax-saving opportunities.\n")
+    sys.stdout.write(
+        "\n=== Tax Optimization Interview ===\n\n"
+        "Answer these questions to help identify tax-saving opportunities.\n\n"
+    )
 
-    for q in questions:
-        print(f"\n{q['question']}")
-        if "relevance" in q:
-            print(f"  (Why: {q['relevance']})")
+    # Questions stream in on a background thread; the first one is asked while
+    # the rest are generated, and the response is not held open across input
+    for q in prefetch(optimizer.iter_interview_questions()):
+        sys.stdout.write(_question_prompt(q))
+        sys.stdout.flush()
+        answer = sys.stdin.readline().strip()
+        options = q.get("options", [])
 
         if q["type"] == "yes_no":
-            answer = input("  [y/n]: ").strip().lower()
-            answers[q["id"]] = answer in ("y", "yes", "true", "1")
+            answers[q["id"]] = answer.lower() in ("y", "yes", "true", "1")
 
         elif q["type"] == "number":
-            answer = input("  Enter amount: $").strip()
             try:
                 answers[q["id"]] = float(answer.replace(",", ""))
             except ValueError:
                 answers[q["id"]] = 0
 
         elif q["type"] == "select":
-            print("  Options:")
-            for i, opt in enumerate(q.get("options", []), 1):
-                print(f"    {i}. {opt}")
-            answer = input("  Enter number: ").strip()
             try:
                 idx = int(answer) - 1
-                answers[q["id"]] = q["options"][idx]
-            except (ValueError, IndexError):
+                answers[q["id"]] = options[idx] if 0 <= idx < len(options) else None
+            except ValueError:
                 answers[q["id"]] = None
 
         elif q["type"] == "multi_select":
-            print("  Options (enter numbers separated by commas):")
-            for i, opt in enumerate(q.get("options", []), 1):
-                print(f"    {i}. {opt}")
-            answer = input("  Enter numbers: ").strip()
-            try:
-                indices = [int(x.strip()) - 1 for x in answer.split(",")]
-                answers[q["id"]] = [q["options"][i] for i in indices if 0 <= i < len(q["options"])]
-            except ValueError:
-                answers[q["id"]] = []
+            answers[q["id"]] = [
+                options[int(n) - 1]
+                for n in _NUMBER_RE.findall(answer)
+                if 0 < int(n) <= len(options)
+            ]
 
         else:  # text
-            answers[q["id"]] = input("  Answer: ").strip()
+            answers[q["id"]] = answer
 
     return answers
@@ -1,21 +1,34 @@
 """Tax implication analysis module."""
 
 import asyncio
+import functools
+from bisect import bisect_right
+from collections import Counter
+from collections.abc import Callable, Iterable
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
 
 try:
     import yaml
 except ImportError:
     yaml = None
 
-from tax_agent.agent import get_agent
+# Prefer the libyaml-backed loader; it parses the rules files several
+# times faster than the pure-Python SafeLoader.
+if yaml is not None:
+    _YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 from tax_agent.config import get_config
 from tax_agent.models.documents import DocumentType, TaxDocument
 from tax_agent.models.taxpayer import FilingStatus, TaxpayerProfile
 from tax_agent.storage.database import get_database
 from tax_agent.utils import get_enum_value
 
+# Tax rules YAML files live in the repository's data/ directory
+_RULES_DIR = Path(__file__).parents[3] / "data" / "tax_rules"
+_STATE_RULES_DIR = _RULES_DIR / "states"
+_FALLBACK_FEDERAL_RULES = _RULES_DIR / "federal_2024.yaml"
+
 
 def _get_sdk_agent():
     """Get SDK agent if available and enabled."""
@@ -41,6 +54,65 @@ def _build_bracket_list(cumulative_brackets: list[tuple[float, float]]) -> list[
     return result
 
 
+class BracketArrays(NamedTuple):
+    """Tax brackets as parallel sequences, for arithmetic without dict lookups.
+
+    The top bracket has an infinite width.
+    """
+
+    lower: tuple[float, ...]
+    width: tuple[float, ...]
+    rate: tuple[float, ...]
+
+
+def _compile_brackets(brackets: list[dict]) -> BracketArrays:
+    """Convert {min, max, rate} bracket dicts to BracketArrays."""
+    lower = tuple(float(b["min"]) for b in brackets)
+    width = tuple(
+        float("inf") if b["max"] is None else float(b["max"] - b["min"]) for b in brackets
+    )
+    rate = tuple(float(b["rate"]) for b in brackets)
+    return BracketArrays(lower, width, rate)
+
+
+def bracket_tax(income: float, brackets: BracketArrays) -> float:
+    """Calculate tax on income using compiled brackets."""
+    tax = 0.0
+    for lower, width, rate in zip(*brackets):
+        amount = income - lower
+        if amount <= 0:
+            break
+        tax += (width if amount > width else amount) * rate
+    return tax
+
+
+def bracket_tax_sweep(incomes: Iterable[float], brackets: BracketArrays) -> list[float]:
+    """Calculate tax for many incomes against the same brackets.
+
+    Meant for what-if sweeps. The tax owed on every full bracket is
+    accumulated once, so each income costs one bisect plus one multiply,
+    not a walk over the brackets.
+
+    Args:
+        incomes: Taxable incomes to evaluate
+        brackets: Compiled brackets
+
+    Returns:
+        Tax for each income, in input order
+    """
+    lower, width, rate = brackets
+    base = [0.0]
+    for w, r in zip(width[:-1], rate[:-1]):
+        base.append(base[-1] + w * r)
+
+    taxes = []
+    for income in incomes:
+        i = bisect_right(lower, income) - 1
+        taxes.append(0.0 if i < 0 else base[i] + (income - lower[i]) * rate[i])
+    return taxes
+
+
+@functools.lru_cache(maxsize=8)
 def _get_fallback_rules(tax_year: int) -> dict[str, Any]:
     """Get hardcoded tax rules when YAML files are unavailable."""
     from tax_agent.tools.tax_calculations import (
@@ -81,23 +153,24 @@ def _get_fallback_rules(tax_year: int) -> dict[str, Any]:
     }
 
 
+@functools.lru_cache(maxsize=8)
 def load_tax_rules(tax_year: int = 2024) -> dict[str, Any]:
     """Load federal tax rules for a given year.
 
     Falls back to hardcoded values from tax_calculations.py if YAML files
-    are not available (e.g. in CI or fresh deployments).
+    are not available (e.g. in CI or fresh deployments). Results are cached
+    per year and shared between callers, so treat them as read-only.
     """
-    rules_dir = Path(__file__).parent.parent.parent.parent / "data" / "tax_rules"
-    rules_file = rules_dir / f"federal_{tax_year}.yaml"
+    rules_file = _RULES_DIR / f"federal_{tax_year}.yaml"
 
     if not rules_file.exists():
-        rules_file = rules_dir / "federal_2024.yaml"
+        rules_file = _FALLBACK_FEDERAL_RULES
 
     try:
         if yaml is None:
             raise ImportError("yaml not available")
         with open(rules_file) as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=_YamlLoader)
     except (FileNotFoundError, OSError, ImportError):
         import logging
         logging.getLogger("tax_agent").info(
@@ -106,56 +179,185 @@ def load_tax_rules(tax_year: int = 2024) -> dict[str, Any]:
         return _get_fallback_rules(tax_year)
 
 
+@functools.lru_cache(maxsize=8)
 def load_state_rules(state: str, tax_year: int = 2024) -> dict[str, Any] | None:
-    """Load state tax rules if available."""
-    rules_dir = Path(__file__).parent.parent.parent.parent / "data" / "tax_rules" / "states"
-    rules_file = rules_dir / f"{state.lower()}_{tax_year}.yaml"
+    """Load state tax rules if available. Cached results are read-only."""
+    rules_file = _STATE_RULES_DIR / f"{state.lower()}_{tax_year}.yaml"
 
     if rules_file.exists() and yaml is not None:
         with open(rules_file) as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=_YamlLoader)
     return None
 
 
+@functools.lru_cache(maxsize=8)
+def _compiled_brackets(
+    tax_year: int,
+) -> tuple[dict[str, BracketArrays], dict[str, BracketArrays]]:
+    """Compile a year's ordinary and long-term capital gains brackets per filing status."""
+    rules = load_tax_rules(tax_year)
+    ordinary = {status: _compile_brackets(b) for status, b in rules["brackets"].items()}
+    long_term = {
+        status: _compile_brackets(b)
+        for status, b in rules["capital_gains"]["long_term"].items()
+    }
+    return ordinary, long_term
+
+
+def preload_tax_rules(tax_year: int, state: str | None = None) -> None:
+    """Parse the federal and state rules for a year ahead of first use.
+
+    Meant to run in a background thread when a command starts, so the first
+    analyzer finds the rules, and their compiled brackets, already cached.
+    Failures are ignored; the real load reports them.
+    """
+    try:
+        _compiled_brackets(tax_year)
+        if state:
+            load_state_rules(state, tax_year)
+    except Exception:
+        pass
+
+
+_CONTEXT_HEADER_TEMPLATE = "TAX YEAR: {year}\n\nKEY {year} FEDERAL TAX RULES:"
+_FEDERAL_CONTEXT_TEMPLATE = (
+    _CONTEXT_HEADER_TEMPLATE
+    + "\n- Standard Deduction (Single): ${sd_single:,}"
+    "\n- Standard Deduction (MFJ): ${sd_mfj:,}"
+    "\n- Top marginal rate: {top_rate:.0f}%"
+    "\n- SALT cap: $10,000"
+    "\n- 401(k) limit: ${limit_401k:,}"
+    "\n- IRA limit: ${limit_ira:,}"
+)
+_STATE_CONTEXT_TEMPLATE = (
+    "\n\nSTATE: {state_name}"
+    "\n- Standard Deduction (Single): ${sd_single:,}"
+    "\n- Top marginal rate: {top_rate:.1f}%"
+)
+_UNKNOWN_STATE_CONTEXT_TEMPLATE = (
+    "\n\nSTATE: {state} (no specific rules loaded - use general state tax knowledge)"
+)
+
+
+@functools.lru_cache(maxsize=32)
 def get_tax_year_context(tax_year: int, state: str | None = None) -> str:
-    """Generate tax year and state context for AI prompts."""
-    context_lines = [
-        f"TAX YEAR: {tax_year}",
-        "",
-        f"KEY {tax_year} FEDERAL TAX RULES:",
-    ]
+    """Generate tax year and state context for AI prompts.
 
+    The rules behind the context are fixed for a given year, so the
+    rendered text is cached per (tax_year, state).
+    """
     rules = load_tax_rules(tax_year)
     if rules:
-        context_lines.extend([
-            f"- Standard Deduction (Single): ${rules['standard_deduction']['single']:,}",
-            f"- Standard Deduction (MFJ): ${rules['standard_deduction']['married_filing_jointly']:,}",
-            f"- Top marginal rate: {rules['brackets']['single'][-1]['rate']*100:.0f}%",
-            f"- SALT cap: $10,000",
-            f"- 401(k) limit: ${rules['retirement_401k']['employee_contribution_limit']:,}",
-            f"- IRA limit: ${rules['ira']['contribution_limit']:,}",
-        ])
+        context = _FEDERAL_CONTEXT_TEMPLATE.format_map({
+            "year": tax_year,
+            "sd_single": rules["standard_deduction"]["single"],
+            "sd_mfj": rules["standard_deduction"]["married_filing_jointly"],
+            "top_rate": rules["brackets"]["single"][-1]["rate"] * 100,
+            "limit_401k": rules["retirement_401k"]["employee_contribution_limit"],
+            "limit_ira": rules["ira"]["contribution_limit"],
+        })
+    else:
+        context = _CONTEXT_HEADER_TEMPLATE.format_map({"year": tax_year})
 
     if state:
         state_rules = load_state_rules(state, tax_year)
         if state_rules:
-            context_lines.extend([
-                "",
-                f"STATE: {state_rules.get('state_name', state)}",
-                f"- Standard Deduction (Single): ${state_rules['standard_deduction']['single']:,}",
-                f"- Top marginal rate: {state_rules['brackets']['single'][-1]['rate']*100:.1f}%",
-            ])
-            if state_rules.get("special_rules", {}).get("capital_gains_treatment") == "ordinary_income":
-                context_lines.append("- Capital gains taxed as ORDINARY INCOME (no preferential rate)")
-            if not state_rules.get("special_rules", {}).get("qbi_deduction_allowed", True):
-                context_lines.append("- Does NOT conform to federal QBI deduction")
+            special_rules = state_rules.get("special_rules", {})
+            context += _STATE_CONTEXT_TEMPLATE.format_map({
+                "state_name": state_rules.get("state_name", state),
+                "sd_single": state_rules["standard_deduction"]["single"],
+                "top_rate": state_rules["brackets"]["single"][-1]["rate"] * 100,
+            })
+            if special_rules.get("capital_gains_treatment") == "ordinary_income":
+                context += "\n- Capital gains taxed as ORDINARY INCOME (no preferential rate)"
+            if not special_rules.get("qbi_deduction_allowed", True):
+                context += "\n- Does NOT conform to federal QBI deduction"
         else:
-            context_lines.extend([
-                "",
-                f"STATE: {state} (no specific rules loaded - use general state tax knowledge)",
-            ])
+            context += _UNKNOWN_STATE_CONTEXT_TEMPLATE.format_map({"state": state})
+
+    return context
+
+
+def _w2_totals(data: dict, income: dict[str, float], withholding: dict[str, float]) -> None:
+    """Add W-2 wages and withholding."""
+    income["wages"] += data.get("box_1", 0) or 0
+    withholding["federal"] += data.get("box_2", 0) or 0
+    withholding["state"] += data.get("box_17", 0) or 0
+    withholding["social_security"] += data.get("box_4", 0) or 0
+    withholding["medicare"] += data.get("box_6", 0) or 0
+
+
+def _backup_withholding(data: dict) -> float:
+    """Federal withholding reported on a 1099."""
+    return data.get("federal_tax_withheld", 0) or data.get("box_4", 0) or 0
+
+
+def _1099_int_totals(data: dict, income: dict[str, float], withholding: dict[str, float]) -> None:
+    """Add 1099-INT interest and withholding."""
+    income["interest"] += data.get("box_1", 0) or 0
+    withholding["federal"] += _backup_withholding(data)
+
+
+def _1099_div_totals(data: dict, income: dict[str, float], withholding: dict[str, float]) -> None:
+    """Add 1099-DIV dividends and withholding."""
+    income["dividends_ordinary"] += data.get("box_1a", 0) or 0
+    income["dividends_qualified"] += data.get("box_1b", 0) or 0
+    withholding["federal"] += _backup_withholding(data)
+
+
+def _1099_b_totals(data: dict, income: dict[str, float], withholding: dict[str, float]) -> None:
+    """Add 1099-B capital gains and withholding."""
+    summary = data.get("summary", {})
+    income["capital_gains_short"] += summary.get("short_term_gain_loss", 0) or 0
+    income["capital_gains_long"] += summary.get("long_term_gain_loss", 0) or 0
+    withholding["federal"] += _backup_withholding(data)
+
+
+def _1099_other_totals(data: dict, income: dict[str, float], withholding: dict[str, float]) -> None:
+    """Add 1099-NEC/MISC income."""
+    income["other"] += data.get("box_1", 0) or data.get("box_7", 0) or 0
+
+
+# Per-document-type accumulators for TaxAnalyzer._aggregate_docs, keyed by
+# DocumentType value. Each adds one document's income and withholding.
+_TOTALS_HANDLERS: dict[str, Callable[[dict, dict[str, float], dict[str, float]], None]] = {
+    DocumentType.W2.value: _w2_totals,
+    DocumentType.FORM_1099_INT.value: _1099_int_totals,
+    DocumentType.FORM_1099_DIV.value: _1099_div_totals,
+    DocumentType.FORM_1099_B.value: _1099_b_totals,
+    DocumentType.FORM_1099_NEC.value: _1099_other_totals,
+    DocumentType.FORM_1099_MISC.value: _1099_other_totals,
+}
+
+
+def _w2_summary(data: dict) -> str:
+    """Summarize W-2 wages and withholding."""
+    return f": Wages ${data.get('box_1', 0):,.2f}, Federal withheld ${data.get('box_2', 0):,.2f}"
+
+
+def _1099_int_summary(data: dict) -> str:
+    """Summarize 1099-INT interest."""
+    return f": Interest income ${data.get('box_1', 0):,.2f}"
+
+
+def _1099_div_summary(data: dict) -> str:
+    """Summarize 1099-DIV dividends."""
+    return f": Dividends ${data.get('box_1a', 0):,.2f} (Qualified: ${data.get('box_1b', 0):,.2f})"
+
+
+def _1099_b_summary(data: dict) -> str:
+    """Summarize 1099-B proceeds."""
+    return f": Total proceeds ${data.get('summary', {}).get('total_proceeds', 0):,.2f}"
+
 
-    return "\n".join(context_lines)
+# Document summary formatters for generate_ai_analysis, keyed by
+# DocumentType value
+_SUMMARY_FORMATTERS: dict[str, Callable[[dict], str]] = {
+    DocumentType.W2.value: _w2_summary,
+    DocumentType.FORM_1099_INT.value: _1099_int_summary,
+    DocumentType.FORM_1099_DIV.value: _1099_div_summary,
+    DocumentType.FORM_1099_B.value: _1099_b_summary,
+}
 
 
 class TaxAnalyzer:
@@ -166,11 +368,19 @@ class TaxAnalyzer:
         config = get_config()
         self.tax_year = tax_year or config.tax_year
         self.rules = load_tax_rules(self.tax_year)
+        self._ordinary_brackets, self._ltcg_brackets = _compiled_brackets(self.tax_year)
         self.db = get_database()
+        self._docs: list[TaxDocument] | None = None
 
     def get_documents(self) -> list[TaxDocument]:
-        """Get all documents for the tax year."""
-        return self.db.get_documents(tax_year=self.tax_year)
+        """Get all documents for the tax year, querying the database only once."""
+        if self._docs is None:
+            self._docs = self.db.get_documents(tax_year=self.tax_year)
+        return self._docs
+
+    def invalidate_docs(self) -> None:
+        """Forget cached documents, e.g. after new documents are collected."""
+        self._docs = None
 
     def calculate_income_summary(self, documents: list[TaxDocument]) -> dict[str, float]:
         """
@@ -179,6 +389,24 @@ class TaxAnalyzer:
         Returns:
             Dictionary of income by category
         """
+        return self._aggregate_docs(documents)[0]
+
+    def calculate_withholding(self, documents: list[TaxDocument]) -> dict[str, float]:
+        """Calculate total tax withholding from documents."""
+        return self._aggregate_docs(documents)[1]
+
+    def _aggregate_docs(
+        self, documents: list[TaxDocument]
+    ) -> tuple[dict[str, float], dict[str, float]]:
+        """
+        Total income and withholding in a single pass over the documents.
+
+        Args:
+            documents: Tax documents to total
+
+        Returns:
+            Tuple of (income by category, withholding by category)
+        """
         income: dict[str, float] = {
             "wages": 0.0,
             "interest": 0.0,
@@ -188,32 +416,6 @@ class TaxAnalyzer:
             "capital_gains_long": 0.0,
             "other": 0.0,
         }
-
-        for doc in documents:
-            data = doc.extracted_data
-
-            if doc.document_type == DocumentType.W2:
-                income["wages"] += data.get("box_1", 0) or 0
-
-            elif doc.document_type == DocumentType.FORM_1099_INT:
-                income["interest"] += data.get("box_1", 0) or 0
-
-            elif doc.document_type == DocumentType.FORM_1099_DIV:
-                income["dividends_ordinary"] += data.get("box_1a", 0) or 0
-                income["dividends_qualified"] += data.get("box_1b", 0) or 0
-
-            elif doc.document_type == DocumentType.FORM_1099_B:
-                summary = data.get("summary", {})
-                income["capital_gains_short"] += summary.get("short_term_gain_loss", 0) or 0
-                income["capital_gains_long"] += summary.get("long_term_gain_loss", 0) or 0
-
-            elif doc.document_type in (DocumentType.FORM_1099_NEC, DocumentType.FORM_1099_MISC):
-                income["other"] += data.get("box_1", 0) or data.get("box_7", 0) or 0
-
-        return income
-
-    def calculate_withholding(self, documents: list[TaxDocument]) -> dict[str, float]:
-        """Calculate total tax withholding from documents."""
         withholding: dict[str, float] = {
             "federal": 0.0,
             "state": 0.0,
@@ -221,23 +423,15 @@ class TaxAnalyzer:
             "medicare": 0.0,
         }
 
+        # Bind the lookups once; this runs for every document
+        get_handler = _TOTALS_HANDLERS.get
+        enum_value = get_enum_value
         for doc in documents:
-            data = doc.extracted_data
-
-            if doc.document_type == DocumentType.W2:
-                withholding["federal"] += data.get("box_2", 0) or 0
-                withholding["state"] += data.get("box_17", 0) or 0
-                withholding["social_security"] += data.get("box_4", 0) or 0
-                withholding["medicare"] += data.get("box_6", 0) or 0
+            handler = get_handler(enum_value(doc.document_type))
+            if handler is not None:
+                handler(doc.extracted_data, income, withholding)
 
-            elif doc.document_type in (
-                DocumentType.FORM_1099_INT,
-                DocumentType.FORM_1099_DIV,
-                DocumentType.FORM_1099_B,
-            ):
-                withholding["federal"] += data.get("federal_tax_withheld", 0) or data.get("box_4", 0) or 0
-
-        return withholding
+        return income, withholding
 
     def estimate_tax_liability(
         self,
@@ -284,14 +478,12 @@ class TaxAnalyzer:
         taxable_ordinary = taxable_income - preferential_income
 
         # Calculate ordinary income tax using brackets
-        brackets = self.rules["brackets"].get(filing_status, self.rules["brackets"]["single"])
-        ordinary_tax = self._calculate_tax_from_brackets(taxable_ordinary, brackets)
+        brackets = self._ordinary_brackets.get(filing_status) or self._ordinary_brackets["single"]
+        ordinary_tax = bracket_tax(taxable_ordinary, brackets)
 
         # Calculate preferential rate tax (qualified dividends + long-term gains)
-        cap_gains_brackets = self.rules["capital_gains"]["long_term"].get(
-            filing_status, self.rules["capital_gains"]["long_term"]["single"]
-        )
-        cap_gains_tax = self._calculate_tax_from_brackets(preferential_income, cap_gains_brackets)
+        cap_gains_brackets = self._ltcg_brackets.get(filing_status) or self._ltcg_brackets["single"]
+        cap_gains_tax = bracket_tax(preferential_income, cap_gains_brackets)
 
         # Total tax
         total_tax = ordinary_tax + cap_gains_tax
@@ -310,31 +502,12 @@ class TaxAnalyzer:
     def _calculate_tax_from_brackets(
         self,
         income: float,
-        brackets: list[dict],
+        brackets: list[dict] | BracketArrays,
     ) -> float:
         """Calculate tax using tax brackets."""
-        tax = 0.0
-        remaining = income
-
-        for bracket in brackets:
-            bracket_min = bracket["min"]
-            bracket_max = bracket["max"]
-            rate = bracket["rate"]
-
-            if remaining <= 0:
-                break
-
-            if bracket_max is None:
-                # Top bracket
-                taxable_in_bracket = remaining
-            else:
-                bracket_size = bracket_max - bracket_min
-                taxable_in_bracket = min(remaining, bracket_size)
-
-            tax += taxable_in_bracket * rate
-            remaining -= taxable_in_bracket
-
-        return tax
+        if not isinstance(brackets, BracketArrays):
+            brackets = _compile_brackets(brackets)
+        return bracket_tax(income, brackets)
 
     def generate_analysis(self, taxpayer: TaxpayerProfile | None = None) -> dict[str, Any]:
         """
@@ -363,8 +536,7 @@ class TaxAnalyzer:
         )
 
         # Calculate summaries
-        income = self.calculate_income_summary(documents)
-        withholding = self.calculate_withholding(documents)
+        income, withholding = self._aggregate_docs(documents)
         tax_estimate = self.estimate_tax_liability(income, filing_status)
 
         # Calculate refund or amount owed
@@ -378,7 +550,7 @@ class TaxAnalyzer:
             "documents_count": len(documents),
             "documents_by_type": self._count_by_type(documents),
             "income_summary": income,
-            "total_income": sum(income.values()),
+            "total_income": tax_estimate["total_income"],
             "withholding_summary": withholding,
             "tax_estimate": tax_estimate,
             "refund_or_owed": refund_or_owed,
@@ -388,11 +560,32 @@ class TaxAnalyzer:
 
     def _count_by_type(self, documents: list[TaxDocument]) -> dict[str, int]:
         """Count documents by type."""
-        counts: dict[str, int] = {}
+        return Counter(get_enum_value(doc.document_type) for doc in documents)
+
+    @staticmethod
+    def summarize_documents(documents: list[TaxDocument]) -> tuple[str, Path | None]:
+        """
+        Build the one-line-per-document summary sent to Claude.
+
+        Args:
+            documents: Tax documents to summarize
+
+        Returns:
+            Tuple of (summary text, directory of the first source file, if any)
+        """
+        doc_summaries = []
+        source_dir = None
         for doc in documents:
             doc_type = get_enum_value(doc.document_type)
-            counts[doc_type] = counts.get(doc_type, 0) + 1
-        return counts
+            fmt = _SUMMARY_FORMATTERS.get(doc_type) if doc.extracted_data else None
+            details = fmt(doc.extracted_data) if fmt else ""
+            doc_summaries.append(f"- {doc_type} from {doc.issuer_name}{details}")
+
+            # Track source directory for SDK tool access
+            if doc.file_path and source_dir is None:
+                source_dir = Path(doc.file_path).parent
+
+        return "\n".join(doc_summaries), source_dir
 
     def generate_ai_analysis(
         self,
@@ -416,33 +609,7 @@ class TaxAnalyzer:
         if not documents:
             return "No tax documents have been collected yet."
 
-        # Build document summary for Claude
-        doc_summaries = []
-        source_dir = None
-        for doc in documents:
-            summary = f"- {get_enum_value(doc.document_type)} from {doc.issuer_name}"
-            if doc.extracted_data:
-                if doc.document_type == DocumentType.W2:
-                    wages = doc.extracted_data.get("box_1", 0)
-                    withheld = doc.extracted_data.get("box_2", 0)
-                    summary += f": Wages ${wages:,.2f}, Federal withheld ${withheld:,.2f}"
-                elif doc.document_type == DocumentType.FORM_1099_INT:
-                    interest = doc.extracted_data.get("box_1", 0)
-                    summary += f": Interest income ${interest:,.2f}"
-                elif doc.document_type == DocumentType.FORM_1099_DIV:
-                    dividends = doc.extracted_data.get("box_1a", 0)
-                    qualified = doc.extracted_data.get("box_1b", 0)
-                    summary += f": Dividends ${dividends:,.2f} (Qualified: ${qualified:,.2f})"
-                elif doc.document_type == DocumentType.FORM_1099_B:
-                    total_proceeds = doc.extracted_data.get("summary", {}).get("total_proceeds", 0)
-                    summary += f": Total proceeds ${total_proceeds:,.2f}"
-            doc_summaries.append(summary)
-
-            # Track source directory for SDK tool access
-            if doc.file_path and source_dir is None:
-                source_dir = Path(doc.file_path).parent
-
-        documents_text = "\n".join(doc_summaries)
+        documents_text, source_dir = self.summarize_documents(documents)
 
         # Build taxpayer info
         if taxpayer:
@@ -475,6 +642,7 @@ Filing Status: {config.get('filing_status', 'Not specified')}
                 )
 
         # Fall back to legacy agent
+        from tax_agent.agent import get_agent
         agent = get_agent()
         return agent.analyze_tax_implications(documents_text, taxpayer_text)
 
@@ -1,16 +1,15 @@
 """Interactive chat mode for exploring tax strategies with the user."""
 
 import asyncio
+from collections import deque
 from pathlib import Path
 from typing import AsyncIterator
 
-from tax_agent.agent import get_agent
 from tax_agent.config import get_config
-from tax_agent.models.documents import TaxDocument
+from tax_agent.models.documents import DocumentType
 from tax_agent.models.mode import AgentMode, MODE_INFO
 from tax_agent.session import SessionManager
 from tax_agent.storage.database import get_database
-from tax_agent.utils import get_enum_value
 
 
 # Mode-specific system prompt additions
@@ -66,6 +65,70 @@ STRATEGIC CONSIDERATIONS:
 }
 
 
+# Only the most recent messages are sent back as context (10 exchanges), so
+# older ones are dropped as new ones arrive.
+MAX_HISTORY_MESSAGES = 20
+# Messages longer than this are truncated when sent back as context
+HISTORY_MESSAGE_CHARS = 500
+
+# Document type values that suggest investment (1099) topics
+_FORM_1099_TYPES = frozenset(t.value for t in DocumentType if "1099" in t.value)
+
+
+# Prompt templates. Only the per-turn parts are %-substituted; the legacy
+# template's {tax_year} is filled in once per session in TaxAdvisorChat.__init__.
+_LEGACY_SYSTEM_TEMPLATE = """You are an expert tax advisor having a conversation with a taxpayer.
+
+%(mode_prompt)s
+
+TAXPAYER CONTEXT:
+%(context)s
+
+YOUR ROLE:
+1. Answer tax questions accurately and specifically
+2. Proactively suggest tax-saving strategies relevant to their situation
+3. Explain complex topics in plain English
+4. Ask clarifying questions when needed
+5. Be AGGRESSIVE about finding savings - don't be passive
+6. When you identify a potential savings, quantify it with dollar estimates
+7. If you need more information to give better advice, ask for it
+
+CONVERSATION STYLE:
+- Be conversational but professional
+- Give specific, actionable advice
+- Cite IRS rules when relevant (Pub 17, Pub 550, etc.)
+- If something could save them $100+, emphasize it
+- Proactively explore: "Have you considered...?" "Are you aware that...?"
+
+IMPORTANT:
+- Stay current with {tax_year} tax rules
+- If a question is outside tax scope, politely redirect
+- Never give advice that could be illegal
+- Recommend professional help for complex situations
+
+Previous conversation:
+%(history)s"""
+
+_SDK_PROMPT_TEMPLATE = """You are an expert tax advisor having a conversation with a taxpayer.
+
+You have access to tools that let you:
+- Read the taxpayer's source documents to verify information
+- Search across documents for specific amounts or patterns
+- Look up current IRS rules and limits via web search
+
+Use these tools proactively to give accurate, verified advice.
+
+TAXPAYER CONTEXT:
+%(context)s
+
+Previous conversation:
+%(history)s
+
+Current question:
+%(user_message)s
+
+Provide a helpful, specific response. If you need to verify something against source documents, use your tools. Be AGGRESSIVE about finding tax savings opportunities."""
+
 
 class TaxAdvisorChat:
     """
@@ -83,17 +146,23 @@ class TaxAdvisorChat:
         self.config = get_config()
         self.tax_year = tax_year or self.config.tax_year
         self.state = self.config.state
+        self._legacy_system_template = _LEGACY_SYSTEM_TEMPLATE.format(tax_year=self.tax_year)
         self._agent = None  # Lazy initialization
         self._sdk_agent = None  # Lazy initialization
+        self._use_sdk_resolved: bool | None = None
         self.db = get_database()
         self.session = SessionManager(self.db, self.tax_year)
-        self.conversation_history: list[dict] = []
+        self.conversation_history: deque[dict] = deque(maxlen=MAX_HISTORY_MESSAGES)
         self._source_dir: Path | None = None
+        self._docs_section_cache: tuple[tuple, str] | None = None
+        self._topics_cache: tuple[tuple, list[str]] | None = None
+        self._background_tasks: set[asyncio.Task] = set()
 
     @property
     def agent(self):
         """Get the legacy agent (lazy initialization)."""
         if self._agent is None:
+            from tax_agent.agent import get_agent
             self._agent = get_agent()
         return self._agent
 
@@ -107,12 +176,32 @@ class TaxAdvisorChat:
         return self._sdk_agent
 
     def _use_sdk(self) -> bool:
-        """Check if we should use the Agent SDK."""
-        return self.config.use_agent_sdk and self.sdk_agent is not None
+        """
+        Check if we should use the Agent SDK.
+
+        Resolved on first use and then reused, so turns where the SDK is
+        unavailable don't re-probe for it.
+        """
+        if self._use_sdk_resolved is None:
+            self._use_sdk_resolved = bool(self.config.use_agent_sdk and self.sdk_agent is not None)
+        return self._use_sdk_resolved
+
+    @property
+    def source_dir(self) -> Path | None:
+        """Directory of the collected source documents, for SDK tool access."""
+        if self._source_dir is None:
+            file_path = self.db.get_any_document_path(self.tax_year)
+            if file_path:
+                self._source_dir = Path(file_path).parent
+        return self._source_dir
+
+    def invalidate_docs(self) -> None:
+        """Forget cached document summaries, e.g. after a slash command collected new ones."""
+        self._docs_section_cache = None
+        self._topics_cache = None
 
     def _build_context(self) -> str:
         """Build context from collected documents, profile, memories, and mode."""
-        documents = self.db.get_documents(tax_year=self.tax_year)
         mode = self.session.current_mode
         mode_info = MODE_INFO[mode]
 
@@ -122,28 +211,9 @@ class TaxAdvisorChat:
             f"STATE: {self.state or 'Not specified'}",
             "",
             "COLLECTED DOCUMENTS:",
+            self._documents_section(),
         ]
 
-        if documents:
-            for doc in documents:
-                summary = f"- {get_enum_value(doc.document_type)} from {doc.issuer_name}"
-                if doc.extracted_data:
-                    if get_enum_value(doc.document_type) == "W2":
-                        wages = doc.extracted_data.get("box_1", 0)
-                        summary += f" (Wages: ${wages:,.2f})"
-                    elif "1099" in get_enum_value(doc.document_type):
-                        for key in ["box_1", "box_1a", "total_proceeds"]:
-                            if key in doc.extracted_data:
-                                summary += f" (${doc.extracted_data[key]:,.2f})"
-                                break
-                context_parts.append(summary)
-
-                # Track source directory for SDK tool access
-                if doc.file_path and self._source_dir is None:
-                    self._source_dir = Path(doc.file_path).parent
-        else:
-            context_parts.append("- No documents collected yet")
-
         # Add tax context from TAX_CONTEXT.md steering document
         try:
             from tax_agent.context import get_tax_context
@@ -192,6 +262,40 @@ class TaxAdvisorChat:
 
         return "\n".join(context_parts)
 
+    def _documents_section(self) -> str:
+        """
+        Format the collected documents section of the context.
+
+        Only the handful of fields shown are read, in one projection query,
+        and the section is rebuilt only when the database's document
+        fingerprint changes (e.g. after /collect or an edit made from
+        another process). Memories, mode and TAX_CONTEXT.md can change
+        between turns, so the rest of the context is rebuilt every time.
+        """
+        fingerprint = self.db.get_document_fingerprint(self.tax_year)
+        if self._docs_section_cache is not None and self._docs_section_cache[0] == fingerprint:
+            return self._docs_section_cache[1]
+
+        lines = []
+        for doc_type, issuer_name, box_1, box_1a, total_proceeds in (
+            self.db.get_document_summaries(self.tax_year)
+        ):
+            label, amount = "", None
+            if doc_type == DocumentType.W2.value:
+                label, amount = "Wages: ", box_1
+            elif doc_type in _FORM_1099_TYPES:
+                amount = next(
+                    (v for v in (box_1, box_1a, total_proceeds) if v is not None), None
+                )
+            if amount is None:
+                lines.append(f"- {doc_type} from {issuer_name}")
+            else:
+                lines.append(f"- {doc_type} from {issuer_name} ({label}${amount:,.2f})")
+
+        section = "\n".join(lines) if lines else "- No documents collected yet"
+        self._docs_section_cache = (fingerprint, section)
+        return section
+
     def chat(self, user_message: str) -> str:
         """
         Send a message and get a response.
@@ -232,75 +336,59 @@ class TaxAdvisorChat:
     def _handle_slash_command(self, user_message: str) -> str:
         """Handle a slash command within the chat interface."""
         from tax_agent.slash_commands import parse_slash_command, execute_slash_command
-        import asyncio
 
         command_name, args = parse_slash_command(user_message)
         if not command_name:
             return "Invalid slash command. Type /help for available commands."
 
+        # Commands such as /collect can add documents
+        self.invalidate_docs()
+
         # Build context for the command
         context = {
             "tax_year": self.tax_year,
             "state": self.state,
-            "source_dir": self._source_dir,
+            "source_dir": self.source_dir,
         }
 
         # Execute the command
         result = asyncio.run(execute_slash_command(command_name, args, context))
         return result
 
+    def _legacy_system_prompt(self) -> str:
+        """Build the legacy agent's system prompt for the current turn."""
+        return self._legacy_system_template % {
+            "mode_prompt": MODE_PROMPTS.get(self.session.current_mode, ""),
+            "context": self._build_context(),
+            "history": self._format_history(),
+        }
+
     def _chat_with_legacy(self, user_message: str) -> str:
         """Chat using the legacy agent (direct Anthropic SDK)."""
-        context = self._build_context()
-        mode = self.session.current_mode
-        mode_prompt = MODE_PROMPTS.get(mode, "")
-
-        system = f"""You are an expert tax advisor having a conversation with a taxpayer.
-
-{mode_prompt}
-
-TAXPAYER CONTEXT:
-{context}
-
-YOUR ROLE:
-1. Answer tax questions accurately and specifically
-2. Proactively suggest tax-saving strategies relevant to their situation
-3. Explain complex topics in plain English
-4. Ask clarifying questions when needed
-5. Be AGGRESSIVE about finding savings - don't be passive
-6. When you identify a potential savings, quantify it with dollar estimates
-7. If you need more information to give better advice, ask for it
-
-CONVERSATION STYLE:
-- Be conversational but professional
-- Give specific, actionable advice
-- Cite IRS rules when relevant (Pub 17, Pub 550, etc.)
-- If something could save them $100+, emphasize it
-- Proactively explore: "Have you considered...?" "Are you aware that...?"
-
-IMPORTANT:
-- Stay current with {self.tax_year} tax rules
-- If a question is outside tax scope, politely redirect
-- Never give advice that could be illegal
-- Recommend professional help for complex situations
-
-Previous conversation:
-{self._format_history()}"""
+        system = self._legacy_system_prompt()
 
         # Add user message to history
-        self.conversation_history.append({"role": "user", "content": user_message})
+        self._add_to_history("user", user_message)
 
         # Get response
         response = self.agent._call(system, user_message, max_tokens=2000)
 
         # Add response to history
-        self.conversation_history.append({"role": "assistant", "content": response})
+        self._add_to_history("assistant", response)
 
         # Auto-extract memories from this exchange
         self._extract_and_save_memories(user_message, response)
 
         return response
 
+    def _build_sdk_prompt(self, context: str, user_message: str) -> str:
+        """Build the Agent SDK prompt for the current turn."""
+        return _SDK_PROMPT_TEMPLATE % {
+            "context": context,
+            "history": self._format_history(),
+            "user_message": user_message,
+        }
+
     def _chat_with_sdk(self, user_message: str) -> str:
         """
         Chat using the Agent SDK with tool access.
@@ -321,38 +409,20 @@ Previous conversation:
         }
 
         # Build the full prompt for SDK
-        prompt = f"""You are an expert tax advisor having a conversation with a taxpayer.
-
-You have access to tools that let you:
-- Read the taxpayer's source documents to verify information
-- Search across documents for specific amounts or patterns
-- Look up current IRS rules and limits via web search
-
-Use these tools proactively to give accurate, verified advice.
-
-TAXPAYER CONTEXT:
-{context}
-
-Previous conversation:
-{self._format_history()}
-
-Current question:
-{user_message}
-
-Provide a helpful, specific response. If you need to verify something against source documents, use your tools. Be AGGRESSIVE about finding tax savings opportunities."""
+        prompt = self._build_sdk_prompt(context, user_message)
 
         # Add user message to history
-        self.conversation_history.append({"role": "user", "content": user_message})
+        self._add_to_history("user", user_message)
 
         # Get response from SDK
         response = self.sdk_agent.interactive_query(
             prompt,
             context=sdk_context,
-            source_dir=self._source_dir,
+            source_dir=self.source_dir,
         )
 
         # Add response to history
-        self.conversation_history.append({"role": "assistant", "content": response})
+        self._add_to_history("assistant", response)
 
         # Auto-extract memories from this exchange
         self._extract_and_save_memories(user_message, response)
@@ -361,7 +431,7 @@ Provide a helpful, specific response. If you need to verify something against so
 
     async def chat_async(self, user_message: str) -> AsyncIterator[str]:
         """
-        Send a message and stream the response (SDK only).
+        Send a message and stream the response.
 
         Supports slash commands (e.g., /help, /status, /analyze) for
         direct access to CLI features within the chat interface.
@@ -384,16 +454,17 @@ Provide a helpful, specific response. If you need to verify something against so
             context = {
                 "tax_year": self.tax_year,
                 "state": self.state,
-                "source_dir": self._source_dir,
+                "source_dir": self.source_dir,
             }
 
+            self.invalidate_docs()
             result = await execute_slash_command(command_name, args, context)
             yield result
             return
 
         if not self._use_sdk():
-            # Fall back to sync for legacy
-            yield self._chat_with_legacy(user_message)
+            async for chunk in self._stream_with_legacy(user_message):
+                yield chunk
             return
 
         context = self._build_context()
@@ -404,42 +475,73 @@ Provide a helpful, specific response. If you need to verify something against so
             "taxpayer_situation": context,
         }
 
-        prompt = f"""You are an expert tax advisor having a conversation with a taxpayer.
-
-You have access to tools that let you:
-- Read the taxpayer's source documents to verify information
-- Search across documents for specific amounts or patterns
-- Look up current IRS rules and limits via web search
-
-TAXPAYER CONTEXT:
-{context}
-
-Previous conversation:
-{self._format_history()}
-
-Current question:
-{user_message}
-
-Provide a helpful, specific response. Be AGGRESSIVE about finding tax savings opportunities."""
+        prompt = self._build_sdk_prompt(context, user_message)
 
         # Add user message to history
-        self.conversation_history.append({"role": "user", "content": user_message})
+        self._add_to_history("user", user_message)
 
         # Stream response from SDK
         full_response = []
         async for chunk in self.sdk_agent.interactive_query_async(
             prompt,
             context=sdk_context,
-            source_dir=self._source_dir,
+            source_dir=self.source_dir,
         ):
             full_response.append(chunk)
             yield chunk
 
         # Add full response to history
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": "".join(full_response),
-        })
+        self._add_to_history("assistant", "".join(full_response))
+
+    async def _stream_with_legacy(self, user_message: str) -> AsyncIterator[str]:
+        """
+        Stream a legacy agent response without blocking the event loop.
+
+        The Anthropic client's stream is synchronous, so it is drained in a
+        worker thread that hands each text delta to the loop through a queue.
+
+        Args:
+            user_message: The user's question or message
+
+        Yields:
+            Response text deltas as they arrive
+        """
+        system = self._legacy_system_prompt()
+
+        # Add user message to history
+        self._add_to_history("user", user_message)
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def produce() -> None:
+            try:
+                for text in self.agent._stream(system, user_message, max_tokens=2000):
+                    loop.call_soon_threadsafe(queue.put_nowait, text)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        producer = asyncio.ensure_future(asyncio.to_thread(produce))
+
+        full_response = []
+        while (chunk := await queue.get()) is not done:
+            full_response.append(chunk)
+            yield chunk
+
+        # Surface any API error raised in the worker thread
+        await producer
+
+        response = "".join(full_response)
+        self._add_to_history("assistant", response)
+
+        # Memory extraction makes its own API call, so it runs in the
+        # background rather than holding the stream open after the last chunk
+        task = asyncio.create_task(
+            asyncio.to_thread(self._extract_and_save_memories, user_message, response)
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
     def _extract_and_save_memories(self, user_message: str, response: str) -> None:
         """Extract and save memories from a conversation exchange."""
@@ -454,20 +556,26 @@ Provide a helpful, specific response. Be AGGRESSIVE about finding tax savings op
         except Exception:
             pass  # Memory extraction is optional, don't fail chat
 
-    def _format_history(self) -> str:
-        """Format conversation history for context."""
-        if not self.conversation_history:
-            return "(New conversation)"
+    def _add_to_history(self, role: str, content: str) -> None:
+        """
+        Append a message to the conversation history.
 
-        # Keep last 10 exchanges
-        recent = self.conversation_history[-20:]
-        formatted = []
-        for msg in recent:
-            role = "User" if msg["role"] == "user" else "Advisor"
-            content = msg["content"][:500] + "..." if len(msg["content"]) > 500 else msg["content"]
-            formatted.append(f"{role}: {content}")
+        The prompt line for the message, with its role label and truncated
+        content, is built once here, so _format_history only joins lines.
+        """
+        short = content
+        if len(content) > HISTORY_MESSAGE_CHARS:
+            short = content[:HISTORY_MESSAGE_CHARS] + "..."
+        label = "User" if role == "user" else "Advisor"
+        self.conversation_history.append({
+            "role": role,
+            "content": content,
+            "line": f"{label}: {short}",
+        })
 
-        return "\n".join(formatted)
+    def _format_history(self) -> str:
+        """Format conversation history for context."""
+        return "\n".join(msg["line"] for msg in self.conversation_history) or "(New conversation)"
 
     def suggest_topics(self) -> list[str]:
         """
@@ -476,15 +584,18 @@ Provide a helpful, specific response. Be AGGRESSIVE about finding tax savings op
         Returns:
             List of suggested questions/topics
         """
-        documents = self.db.get_documents(tax_year=self.tax_year)
+        fingerprint = self.db.get_document_fingerprint(self.tax_year)
+        if self._topics_cache is not None and self._topics_cache[0] == fingerprint:
+            return list(self._topics_cache[1])
 
         suggestions = [
             "What deductions am I likely missing?",
             "How can I reduce my taxes for next year?",
         ]
 
-        has_w2 = any(get_enum_value(d.document_type) == "W2" for d in documents)
-        has_investments = any("1099" in get_enum_value(d.document_type) for d in documents)
+        doc_types = self.db.get_document_types(self.tax_year)
+        has_w2 = DocumentType.W2.value in doc_types
+        has_investments = not _FORM_1099_TYPES.isdisjoint(doc_types)
 
         if has_w2:
             suggestions.extend([
@@ -503,11 +614,13 @@ Provide a helpful, specific response. Be AGGRESSIVE about finding tax savings op
         if self.state in ["CA", "NY", "NJ"]:
             suggestions.append("How can I reduce my state tax burden?")
 
-        return suggestions
+        self._topics_cache = (fingerprint, suggestions)
+        return list(suggestions)
 
     def reset(self) -> None:
         """Reset conversation history."""
-        self.conversation_history = []
+        self.conversation_history.clear()
+        self.invalidate_docs()
 
     def get_current_mode(self) -> AgentMode:
         """Get the current operating mode."""
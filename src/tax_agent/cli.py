@@ -1,20 +1,23 @@
 """CLI commands for the tax prep agent."""
 
-import asyncio
+import os
 import sys
+import threading
+from collections.abc import Callable
 from enum import Enum
 from functools import wraps
+from itertools import chain
 from pathlib import Path
 from typing import Annotated, Optional
 
 import typer
+from rich import get_console
 from rich import print as rprint
-from rich.console import Console
-from rich.live import Live
-from rich.markdown import Markdown
+from rich.console import Group
 from rich.panel import Panel
 from rich.prompt import Confirm, Prompt
 from rich.table import Table
+from rich.text import Text
 
 from tax_agent.config import get_config
 from tax_agent.env import load_env
@@ -27,6 +30,8 @@ def async_command(f):
     """Decorator to run async commands with asyncio.run()."""
     @wraps(f)
     def wrapper(*args, **kwargs):
+        import asyncio
+
         return asyncio.run(f(*args, **kwargs))
     return wrapper
 
@@ -41,6 +46,7 @@ def get_enum_value(value) -> str:
 def prompt_export(content: str, default_filename: str, content_type: str = "report") -> None:
     """Prompt user to export content to MD or PDF after an operation."""
     from pathlib import Path
+
     from tax_agent.exporters import export_to_file
 
     if Confirm.ask(f"\n[cyan]Export {content_type} to file?[/cyan]", default=False):
@@ -77,6 +83,7 @@ def masked_input(prompt: str, mask_char: str = "*") -> str:
     Returns:
         The entered password
     """
+    import codecs
     import termios
     import tty
 
@@ -85,31 +92,39 @@ def masked_input(prompt: str, mask_char: str = "*") -> str:
 
     fd = sys.stdin.fileno()
     old_settings = termios.tcgetattr(fd)
+    decoder = codecs.getincrementaldecoder(sys.stdin.encoding or "utf-8")(errors="replace")
     password = []
 
     try:
         tty.setraw(fd)
-        while True:
-            char = sys.stdin.read(1)
-            if char in ('\r', '\n'):  # Enter pressed
+        done = False
+        while not done:
+            # Read whatever is waiting, so a pasted key is handled in one pass
+            # and its mask is echoed with a single write
+            data = os.read(fd, 1024)
+            if not data:  # End of input
                 break
-            elif char == '\x7f':  # Backspace
-                if password:
-                    password.pop()
-                    # Move cursor back, overwrite with space, move back again
-                    sys.stdout.write('\b \b')
-                    sys.stdout.flush()
-            elif char == '\x03':  # Ctrl+C
-                raise KeyboardInterrupt
-            elif char == '\x15':  # Ctrl+U - toggle visibility
-                # Clear current display
-                sys.stdout.write('\b' * len(password) + ' ' * len(password) + '\b' * len(password))
-                # Show actual password briefly
-                sys.stdout.write(''.join(password))
-                sys.stdout.flush()
-            elif ord(char) >= 32:  # Printable character
-                password.append(char)
-                sys.stdout.write(mask_char)
+            echo = []
+            for char in decoder.decode(data):
+                if char in ('\r', '\n'):  # Enter pressed
+                    done = True
+                    break
+                elif char == '\x7f':  # Backspace
+                    if password:
+                        password.pop()
+                        # Move cursor back, overwrite with space, move back again
+                        echo.append('\b \b')
+                elif char == '\x03':  # Ctrl+C
+                    raise KeyboardInterrupt
+                elif char == '\x15':  # Ctrl+U - toggle visibility
+                    # Clear current display, then show actual password briefly
+                    n = len(password)
+                    echo.append('\b' * n + ' ' * n + '\b' * n + ''.join(password))
+                elif char >= ' ':  # Printable character
+                    password.append(char)
+                    echo.append(mask_char)
+            if echo:
+                sys.stdout.write(''.join(echo))
                 sys.stdout.flush()
     finally:
         termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
@@ -118,6 +133,35 @@ def masked_input(prompt: str, mask_char: str = "*") -> str:
     return ''.join(password)
 
 
+def _expand_path(path: Path | str) -> Path:
+    """Expand a leading ~ and resolve to an absolute path."""
+    return Path(os.path.expanduser(path)).resolve()
+
+
+def _scan_dirs(scan: Callable[[Path], list], search_dirs: list[Path]) -> list[list]:
+    """
+    Run a directory scan over several search directories concurrently.
+
+    Listing and stat calls release the GIL, so a slow network home directory
+    no longer holds up the scans of local ones.
+
+    Args:
+        scan: Scans one directory and returns its matches
+        search_dirs: Directories to scan
+
+    Returns:
+        Each directory's matches, in search_dirs order
+    """
+    # A pool only pays off for several directories; zero workers is an error
+    if len(search_dirs) <= 1:
+        return [scan(search_dir) for search_dir in search_dirs]
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=len(search_dirs)) as pool:
+        return list(pool.map(scan, search_dirs))
+
+
 def resolve_file_path(file_path: Path, extensions: list[str] | None = None) -> tuple[Path | None, list[Path]]:
     """
     Resolve a file path with smart searching and expansion.
@@ -141,81 +185,80 @@ def resolve_file_path(file_path: Path, extensions: list[str] | None = None) -> t
     if extensions is None:
         extensions = ['.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.tif']
 
-    # Expand ~ to home directory
-    expanded = Path(str(file_path).replace('~', str(Path.home())))
-
-    # Make absolute
-    if not expanded.is_absolute():
-        expanded = Path.cwd() / expanded
-
-    # Resolve symlinks and .. components
+    # If it exists, return it with ~ expanded and symlinks and .. components
+    # resolved; strict resolution doubles as the existence check
     try:
-        expanded = expanded.resolve()
+        return Path(os.path.expanduser(file_path)).resolve(strict=True), []
     except (OSError, RuntimeError):
         pass
 
-    # If it exists, return it
-    if expanded.exists():
-        return expanded, []
-
     # Check if it's a glob pattern
     file_str = str(file_path)
     if '*' in file_str or '?' in file_str:
         # Expand ~ in glob pattern too
-        glob_pattern = file_str.replace('~', str(Path.home()))
+        glob_pattern = os.path.expanduser(file_str)
         matches = sorted(glob_module.glob(glob_pattern, recursive=True))
-        valid_matches = [Path(m) for m in matches if Path(m).is_file()]
+        valid_matches = [Path(m) for m in matches if os.path.isfile(m)]
         if valid_matches:
             return valid_matches[0] if len(valid_matches) == 1 else None, valid_matches
         return None, []
 
     # File not found - search common locations
-    suggestions = []
     filename = file_path.name
+    name_lower = filename.lower()
 
     # Common tax document locations
+    home = Path.home()
     search_dirs = [
         Path.cwd(),
-        Path.home() / "Documents",
-        Path.home() / "Downloads",
-        Path.home() / "Desktop",
-        Path.home() / "Documents" / "taxes",
-        Path.home() / "Documents" / "Taxes",
-        Path.home() / "Documents" / "Tax Documents",
-        Path.home() / "Downloads" / "taxes",
+        home / "Documents",
+        home / "Downloads",
+        home / "Desktop",
+        home / "Documents" / "taxes",
+        home / "Documents" / "Taxes",
+        home / "Documents" / "Tax Documents",
+        home / "Downloads" / "taxes",
     ]
 
-    # Search for the filename in common directories
-    for search_dir in search_dirs:
-        if search_dir.exists():
-            # Exact match
-            potential = search_dir / filename
-            if potential.exists() and potential not in suggestions:
-                suggestions.append(potential)
-
-            # Case-insensitive search
-            try:
-                for item in search_dir.iterdir():
-                    if item.is_file() and item.name.lower() == filename.lower():
-                        if item not in suggestions:
-                            suggestions.append(item)
-            except PermissionError:
-                pass
-
-    # Also search for similar files if filename has no extension
-    if not file_path.suffix:
-        for search_dir in search_dirs[:4]:  # Only search main dirs for partial matches
-            if search_dir.exists():
-                try:
-                    for item in search_dir.iterdir():
-                        if item.is_file() and item.suffix.lower() in extensions:
-                            if filename.lower() in item.name.lower():
-                                if item not in suggestions:
-                                    suggestions.append(item)
-                except PermissionError:
-                    pass
-
-    return None, suggestions[:10]  # Limit to 10 suggestions
+    # Partial name matches are only offered for names without an extension,
+    # and only from the main directories
+    partial_dirs = set() if file_path.suffix else set(search_dirs[:4])
+    suffixes = tuple(extensions)
+
+    def scan(search_dir: Path) -> list[tuple[bool, str]]:
+        # One listing finds exact, case-insensitive and partial matches. Names
+        # are compared as plain strings first, so is_file() only runs for
+        # matches (it needs a stat where the filesystem reports no file type).
+        allow_partial = search_dir in partial_dirs
+        matches = []
+        try:
+            with os.scandir(search_dir) as entries:
+                for entry in entries:
+                    entry_lower = entry.name.lower()
+                    if entry_lower == name_lower:
+                        is_partial = False
+                    elif (
+                        allow_partial
+                        and name_lower in entry_lower
+                        and entry_lower.endswith(suffixes)
+                    ):
+                        is_partial = True
+                    else:
+                        continue
+                    if entry.is_file():
+                        matches.append((is_partial, entry.path))
+        except OSError:
+            pass
+        return matches
+
+    # Partial matches are suggested after the rest
+    suggestions: dict[str, bool] = {}
+    for matches in _scan_dirs(scan, search_dirs):
+        for is_partial, path in matches:
+            suggestions.setdefault(path, is_partial)
+    ordered = sorted(suggestions, key=suggestions.__getitem__)
+
+    return None, [Path(path) for path in ordered[:10]]  # Limit to 10 suggestions
 
 
 def find_tax_documents(directory: Path | None = None, extensions: list[str] | None = None) -> list[Path]:
@@ -232,28 +275,31 @@ def find_tax_documents(directory: Path | None = None, extensions: list[str] | No
     if extensions is None:
         extensions = ['.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.tif']
 
-    found = []
-
     if directory:
         search_dirs = [directory]
     else:
-        search_dirs = [
-            Path.cwd(),
-            Path.home() / "Documents",
-            Path.home() / "Downloads",
-            Path.home() / "Desktop",
-        ]
-
-    for search_dir in search_dirs:
-        if search_dir.exists():
-            try:
-                for item in search_dir.iterdir():
-                    if item.is_file() and item.suffix.lower() in extensions:
-                        found.append(item)
-            except PermissionError:
-                pass
+        home = Path.home()
+        search_dirs = [Path.cwd(), home / "Documents", home / "Downloads", home / "Desktop"]
 
-    return sorted(found, key=lambda p: p.stat().st_mtime, reverse=True)
+    suffixes = tuple(extensions)
+
+    def scan(search_dir: Path) -> list[tuple[float, str]]:
+        # Names are filtered as plain strings before any file-type check.
+        # DirEntry reuses the file type from the directory listing and caches
+        # its stat, so each match costs one stat for the mtime sort.
+        matches = []
+        try:
+            with os.scandir(search_dir) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(suffixes) and entry.is_file():
+                        matches.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            pass
+        return matches
+
+    found = list(chain.from_iterable(_scan_dirs(scan, search_dirs)))
+    found.sort(key=lambda match: match[0], reverse=True)
+    return [Path(path) for _, path in found]
 
 
 def _run_agentic_analysis(analyzer, tax_year: int) -> str:
@@ -267,6 +313,8 @@ def _run_agentic_analysis(analyzer, tax_year: int) -> str:
     Returns:
         Complete analysis text
     """
+    import asyncio
+
     from tax_agent.agent_sdk import get_sdk_agent, sdk_available
 
     if not sdk_available():
@@ -277,32 +325,7 @@ def _run_agentic_analysis(analyzer, tax_year: int) -> str:
         raise RuntimeError("Agent SDK not available")
 
     # Build document summary
-    documents = analyzer.get_documents()
-    doc_summaries = []
-    source_dir = None
-
-    for doc in documents:
-        from tax_agent.utils import get_enum_value as _get_enum
-        from tax_agent.models.documents import DocumentType
-
-        summary = f"- {_get_enum(doc.document_type)} from {doc.issuer_name}"
-        if doc.extracted_data:
-            if doc.document_type == DocumentType.W2:
-                wages = doc.extracted_data.get("box_1", 0)
-                withheld = doc.extracted_data.get("box_2", 0)
-                summary += f": Wages ${wages:,.2f}, Federal withheld ${withheld:,.2f}"
-            elif doc.document_type == DocumentType.FORM_1099_INT:
-                interest = doc.extracted_data.get("box_1", 0)
-                summary += f": Interest income ${interest:,.2f}"
-            elif doc.document_type == DocumentType.FORM_1099_DIV:
-                dividends = doc.extracted_data.get("box_1a", 0)
-                summary += f": Dividends ${dividends:,.2f}"
-        doc_summaries.append(summary)
-
-        if doc.file_path and source_dir is None:
-            source_dir = Path(doc.file_path).parent
-
-    documents_text = "\n".join(doc_summaries)
+    documents_text, source_dir = analyzer.summarize_documents(analyzer.get_documents())
     config = get_config()
 
     taxpayer_text = f"""
@@ -335,7 +358,36 @@ app = typer.Typer(
     help="A CLI agent for tax document collection, analysis, and return review.",
     invoke_without_command=True,
 )
-console = Console()
+# Parameter annotations shared by many commands. Built once here rather than
+# allocating a new OptionInfo/ArgumentInfo in every command signature.
+_TaxYearOption = Annotated[int | None, typer.Option("--year", "-y", help="Tax year")]
+_YearFilterOption = Annotated[
+    int | None, typer.Option("--year", "-y", help="Filter by tax year")
+]
+_DocIdArgument = Annotated[str, typer.Argument(help="Document ID (can be partial)")]
+_ReturnFileArgument = Annotated[Path, typer.Argument(help="Path to completed tax return PDF")]
+
+# Display color per review finding severity. Keyed by value, which also
+# matches ReviewSeverity members since it is a str enum.
+_SEVERITY_COLORS = {
+    "error": "red",
+    "warning": "yellow",
+    "suggestion": "blue",
+    "info": "dim",
+}
+
+# Display color per AI validation issue severity
+_ISSUE_COLORS = {"error": "red", "warning": "yellow", "info": "blue"}
+
+# Display color per priority/importance level in AI recommendations
+_PRIORITY_COLORS = {"critical": "red", "high": "red", "medium": "yellow", "low": "blue"}
+
+# Key amounts shown after collecting a document: (extracted_data key, label)
+_DOC_TYPE_ROWS: dict[str, tuple[tuple[str, str], ...]] = {
+    "W2": (("box_1", "Wages (Box 1)"), ("box_2", "Fed Tax Withheld")),
+    "1099_INT": (("box_1", "Interest Income"),),
+    "1099_DIV": (("box_1a", "Dividends"),),
+}
 
 
 @app.callback()
@@ -358,10 +410,48 @@ def main(
         _start_interactive_mode()
 
 
+def _preload_tax_rules(tax_year: int, state: str | None) -> None:
+    """Import the analyzer and parse this year's tax rules off the main thread."""
+    from tax_agent.analyzers.implications import preload_tax_rules
+
+    preload_tax_rules(tax_year, state)
+
+
+def _start_rules_preload(tax_year: int, state: str | None) -> None:
+    """Start loading tax rules in the background for a command that will need them."""
+    threading.Thread(target=_preload_tax_rules, args=(tax_year, state), daemon=True).start()
+
+
+# Spinner messages shown while the interactive advisor is answering
+_THINKING_MESSAGES = (
+    "Crunching numbers...",
+    "Consulting the tax code...",
+    "Finding deductions...",
+    "Maximizing your refund...",
+    "Reading IRS publications...",
+    "Checking for credits...",
+    "Analyzing your situation...",
+    "Looking for savings...",
+)
+
+
+# How long the interactive toolbar reuses its document count
+_DOC_COUNT_TTL_SECONDS = 2.0
+
+
 def _start_interactive_mode() -> None:
     """Start the interactive Agent SDK mode with Claude Code-style UI."""
+    import random
+    import time
+    from bisect import bisect_left
+
+    from rich.markdown import Markdown
+
     from tax_agent.chat import TaxAdvisorChat
-    from tax_agent.slash_commands import get_all_command_names
+    from tax_agent.models.mode import MODE_INFO
+    from tax_agent.session import get_session_manager
+    from tax_agent.slash_commands import get_all_command_names, get_command
+    from tax_agent.storage.database import get_database
 
     config = get_config()
 
@@ -377,16 +467,24 @@ def _start_interactive_mode() -> None:
         raise typer.Exit()
 
     tax_year = config.tax_year
+    _start_rules_preload(tax_year, config.state)
     advisor = TaxAdvisorChat(tax_year)
 
-    # Get document count for status
+    # Get document count for status. The toolbar is redrawn on every
+    # keystroke, so the count is reused briefly and refreshed after each turn.
+    cached_count = 0
+    counted_at: float | None = None
+
     def get_doc_count():
-        try:
-            from tax_agent.storage.database import get_database
-            db = get_database()
-            return len(db.get_documents())
-        except Exception:
-            return 0
+        nonlocal cached_count, counted_at
+        now = time.monotonic()
+        if counted_at is None or now - counted_at >= _DOC_COUNT_TTL_SECONDS:
+            try:
+                cached_count = get_database().get_document_fingerprint()[0]
+            except Exception:
+                cached_count = 0
+            counted_at = now
+        return cached_count
 
     # Print welcome banner
     doc_count = get_doc_count()
@@ -411,19 +509,26 @@ def _start_interactive_mode() -> None:
     # Set up prompt with Claude Code-style features
     try:
         from prompt_toolkit import PromptSession
-        from prompt_toolkit.completion import Completer, Completion
         from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+        from prompt_toolkit.completion import Completer, Completion
+        from prompt_toolkit.formatted_text import HTML
         from prompt_toolkit.history import FileHistory
         from prompt_toolkit.styles import Style
-        from prompt_toolkit.formatted_text import HTML
 
         # Ensure config dir exists for history file
         config.config_dir.mkdir(parents=True, exist_ok=True)
         history_file = config.config_dir / ".command_history"
         history = FileHistory(str(history_file))
 
-        # Custom completer for slash commands
+        # Custom completer for slash commands. Names come sorted, so the
+        # matches for a prefix are one contiguous run found by bisection, and
+        # descriptions are looked up once rather than per keystroke.
         commands = get_all_command_names()
+        command_names = [cmd.lstrip('/') for cmd in commands]
+        command_meta = {}
+        for cmd in commands:
+            command = get_command(cmd)
+            command_meta[cmd] = command.description[:30] if command else ""
 
         class SlashCommandCompleter(Completer):
             """Completer that triggers on / for slash commands."""
@@ -434,25 +539,18 @@ def _start_interactive_mode() -> None:
                 # Only complete if line starts with / or is empty
                 if not text or text.startswith('/'):
                     word = text.lstrip('/')
-                    for cmd in commands:
-                        cmd_name = cmd.lstrip('/')
-                        if cmd_name.startswith(word) or not word:
-                            # Calculate how much to replace
-                            start_pos = -len(text) if text else 0
-                            yield Completion(
-                                cmd,
-                                start_position=start_pos,
-                                display=cmd,
-                                display_meta=self._get_meta(cmd),
-                            )
-
-            def _get_meta(self, cmd):
-                """Get command description for display."""
-                from tax_agent.slash_commands import get_command
-                command = get_command(cmd.lstrip('/'))
-                if command:
-                    return command.description[:30]
-                return ""
+                    # Calculate how much to replace
+                    start_pos = -len(text) if text else 0
+                    for i in range(bisect_left(command_names, word), len(commands)):
+                        if not command_names[i].startswith(word):
+                            break
+                        cmd = commands[i]
+                        yield Completion(
+                            cmd,
+                            start_position=start_pos,
+                            display=cmd,
+                            display_meta=command_meta[cmd],
+                        )
 
         command_completer = SlashCommandCompleter()
 
@@ -465,9 +563,6 @@ def _start_interactive_mode() -> None:
 
         # Bottom toolbar showing status (like Claude Code)
         def get_toolbar():
-            from tax_agent.session import get_session_manager
-            from tax_agent.models.mode import MODE_INFO
-
             doc_count = get_doc_count()
             state = config.state or "—"
 
@@ -545,20 +640,10 @@ def _start_interactive_mode() -> None:
 
         # Process the input (handles both slash commands and natural language)
         # Fun thinking spinner with tax-themed messages
-        import random
-        thinking_messages = [
-            "Crunching numbers...",
-            "Consulting the tax code...",
-            "Finding deductions...",
-            "Maximizing your refund...",
-            "Reading IRS publications...",
-            "Checking for credits...",
-            "Analyzing your situation...",
-            "Looking for savings...",
-        ]
-        spinner_msg = random.choice(thinking_messages)
-        with console.status(f"[bold cyan]{spinner_msg}[/bold cyan]", spinner="dots12"):
+        spinner_msg = random.choice(_THINKING_MESSAGES)
+        with get_console().status(f"[bold cyan]{spinner_msg}[/bold cyan]", spinner="dots12"):
             response = advisor.chat(user_input)
+        counted_at = None  # Slash commands may have added or removed documents
 
         # Render response as markdown for better formatting
         rprint("")
@@ -717,7 +802,6 @@ def init() -> None:
 @app.command()
 def status() -> None:
     """Show the current status of the tax agent."""
-    import os
     from tax_agent.config import AI_PROVIDER_AWS_BEDROCK
 
     config = get_config()
@@ -757,7 +841,7 @@ def status() -> None:
 
     table.add_row("Data Directory", str(config.data_dir))
 
-    console.print(table)
+    get_console().print(table)
 
     if not config.is_initialized:
         rprint("\n[yellow]Run 'tax-agent init' to get started.[/yellow]")
@@ -780,16 +864,14 @@ def find_docs(
         tax-agent find -p w2              # Find files containing 'w2'
         tax-agent find -p "2024"          # Find files with '2024' in name
     """
-    import glob as glob_module
+    import stat
 
     extensions = ['.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.tif']
 
     # Determine search directories
+    home = Path.home()
     if directory:
-        resolved_dir = Path(str(directory).replace('~', str(Path.home())))
-        if not resolved_dir.is_absolute():
-            resolved_dir = Path.cwd() / resolved_dir
-        resolved_dir = resolved_dir.resolve()
+        resolved_dir = _expand_path(directory)
 
         if not resolved_dir.exists():
             rprint(f"[red]Directory not found: {directory}[/red]")
@@ -798,31 +880,37 @@ def find_docs(
         search_dirs = [resolved_dir]
         rprint(f"[cyan]Searching in: {resolved_dir}[/cyan]\n")
     else:
-        search_dirs = [
-            Path.cwd(),
-            Path.home() / "Documents",
-            Path.home() / "Downloads",
-            Path.home() / "Desktop",
-        ]
+        search_dirs = [Path.cwd(), home / "Documents", home / "Downloads", home / "Desktop"]
         rprint("[cyan]Searching common locations...[/cyan]\n")
 
-    found_files = []
-    for search_dir in search_dirs:
-        if not search_dir.exists():
-            continue
+    suffixes = tuple(extensions)
+    pattern_lower = pattern.lower() if pattern else None
+
+    def scan(search_dir: Path) -> list[tuple[str, os.stat_result]]:
+        # Names are filtered as strings and only matches are stat'ed. Hidden
+        # directories (.git, .Trash, caches) are pruned, and unreadable ones skipped.
+        matches = []
+        for dirpath, dirnames, filenames in os.walk(search_dir):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                name_lower = name.lower()
+                if not name_lower.endswith(suffixes):
+                    continue
+                if pattern_lower and pattern_lower not in name_lower:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    matches.append((path, st))
+        return matches
 
-        try:
-            for item in search_dir.rglob("*"):
-                if item.is_file() and item.suffix.lower() in extensions:
-                    # Apply pattern filter if specified
-                    if pattern:
-                        if pattern.lower() not in item.name.lower():
-                            continue
-                    found_files.append(item)
-        except PermissionError:
-            continue
+    # Search roots are walked concurrently; a file under two roots is listed once
+    found = dict(chain.from_iterable(_scan_dirs(scan, search_dirs)))
 
-    if not found_files:
+    if not found:
         rprint("[yellow]No tax documents found.[/yellow]")
         if pattern:
             rprint(f"[dim]No files matching '{pattern}' with extensions: {', '.join(extensions)}[/dim]")
@@ -831,7 +919,7 @@ def find_docs(
         raise typer.Exit(0)
 
     # Sort by modification time (newest first)
-    found_files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    found_files = sorted(found.items(), key=lambda item: item[1].st_mtime, reverse=True)
 
     # Limit results
     if len(found_files) > limit:
@@ -845,8 +933,9 @@ def find_docs(
     table.add_column("Location", style="dim")
     table.add_column("Size", justify="right", style="green")
 
-    for i, f in enumerate(found_files, 1):
-        size = f.stat().st_size
+    for i, (path, st) in enumerate(found_files, 1):
+        f = Path(path)
+        size = st.st_size
         if size >= 1024 * 1024:
             size_str = f"{size / (1024*1024):.1f} MB"
         elif size >= 1024:
@@ -856,23 +945,23 @@ def find_docs(
 
         # Show path relative to home if possible
         try:
-            rel_path = f.parent.relative_to(Path.home())
+            rel_path = f.parent.relative_to(home)
             location = f"~/{rel_path}"
         except ValueError:
             location = str(f.parent)
 
         table.add_row(str(i), f.name, location, size_str)
 
-    console.print(table)
+    get_console().print(table)
 
     rprint("\n[dim]To process a file:[/dim]")
     if found_files:
-        rprint(f"  tax-agent collect \"{found_files[0]}\"")
+        rprint(f"  tax-agent collect \"{found_files[0][0]}\"")
 
 
 @app.command()
 def chat(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Start an interactive chat session to explore tax strategies."""
     from tax_agent.chat import TaxAdvisorChat
@@ -884,6 +973,7 @@ def chat(
         raise typer.Exit(1)
 
     tax_year = year or config.tax_year
+    _start_rules_preload(tax_year, config.state)
     advisor = TaxAdvisorChat(tax_year)
 
     rprint(Panel.fit(
@@ -930,7 +1020,7 @@ def chat(
             rprint("[dim]Conversation reset.[/dim]")
             continue
 
-        with console.status("[bold green]Thinking..."):
+        with get_console().status("[bold green]Thinking..."):
             response = advisor.chat(user_input)
 
         rprint(f"\n[bold blue]Advisor[/bold blue]: {response}")
@@ -939,7 +1029,7 @@ def chat(
 @app.command()
 def collect(
     file: Annotated[Path, typer.Argument(help="Path to tax document (PDF or image)")],
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
     directory: Annotated[Optional[Path], typer.Option("--dir", "-d", help="Process all files in directory")] = None,
     replace: Annotated[bool, typer.Option("--replace", "-r", help="Replace existing document if duplicate")] = False,
 ) -> None:
@@ -957,10 +1047,7 @@ def collect(
 
     if directory:
         # Process directory - resolve path first
-        resolved_dir = Path(str(directory).replace('~', str(Path.home())))
-        if not resolved_dir.is_absolute():
-            resolved_dir = Path.cwd() / resolved_dir
-        resolved_dir = resolved_dir.resolve()
+        resolved_dir = _expand_path(directory)
 
         if not resolved_dir.is_dir():
             rprint(f"[red]Not a directory: {directory}[/red]")
@@ -969,19 +1056,25 @@ def collect(
 
         rprint(f"[cyan]Processing documents in {resolved_dir} for tax year {tax_year}...[/cyan]")
 
-        with console.status("[bold green]Processing files..."):
-            results = collector.process_directory(resolved_dir, tax_year)
-
-        for file_path, result in results:
-            if isinstance(result, Exception):
-                rprint(f"[red]  {file_path.name}: {result}[/red]")
-            else:
-                confidence = "high" if result.confidence_score >= 0.8 else "low"
-                review_flag = " [yellow](needs review)[/yellow]" if result.needs_review else ""
-                rprint(f"[green]  {file_path.name}: {get_enum_value(result.document_type)} from {result.issuer_name} ({confidence} confidence){review_flag}[/green]")
-
-        success_count = sum(1 for _, r in results if not isinstance(r, Exception))
-        rprint(f"\n[cyan]Processed {success_count}/{len(results)} files successfully.[/cyan]")
+        # Report each file as soon as it is processed rather than after the whole directory
+        file_count = success_count = 0
+        with get_console().status("[bold green]Processing files...") as status:
+            for file_path, result in collector.iter_process_directory(resolved_dir, tax_year):
+                file_count += 1
+                if isinstance(result, Exception):
+                    rprint(f"[red]  {file_path.name}: {result}[/red]")
+                else:
+                    success_count += 1
+                    confidence = "high" if result.confidence_score >= 0.8 else "low"
+                    review_flag = " [yellow](needs review)[/yellow]" if result.needs_review else ""
+                    doc_type = get_enum_value(result.document_type)
+                    rprint(
+                        f"[green]  {file_path.name}: {doc_type} from {result.issuer_name} "
+                        f"({confidence} confidence){review_flag}[/green]"
+                    )
+                status.update(f"[bold green]Processing files... ({file_count} done)")
+
+        rprint(f"\n[cyan]Processed {success_count}/{file_count} files successfully.[/cyan]")
     else:
         # Process single file - use smart path resolution
         resolved_file, suggestions = resolve_file_path(file)
@@ -996,7 +1089,7 @@ def collect(
                 rprint(f"\n[cyan]Processing {len(suggestions)} files for tax year {tax_year}...[/cyan]")
                 for match in suggestions:
                     try:
-                        with console.status(f"[bold green]Processing {match.name}..."):
+                        with get_console().status(f"[bold green]Processing {match.name}..."):
                             doc = collector.process_file(match, tax_year, replace=replace)
                         rprint(f"[green]  ✓ {match.name}: {get_enum_value(doc.document_type)}[/green]")
                     except Exception as e:
@@ -1017,13 +1110,14 @@ def collect(
                 rprint(f"[dim]Tip: Use 'tax-agent collect \"*.pdf\"' to find PDF files in current directory.[/dim]")
             raise typer.Exit(1)
 
+        found_elsewhere = resolved_file != _expand_path(file)
         file = resolved_file
         rprint(f"[cyan]Processing {file.name} for tax year {tax_year}...[/cyan]")
-        if resolved_file != Path(str(file).replace('~', str(Path.home()))).resolve():
+        if found_elsewhere:
             rprint(f"[dim]Found at: {file}[/dim]")
 
         try:
-            with console.status("[bold green]Extracting and analyzing document..."):
+            with get_console().status("[bold green]Extracting and analyzing document..."):
                 doc = collector.process_file(file, tax_year, replace=replace)
 
             rprint(f"\n[green]Document processed successfully![/green]")
@@ -1047,29 +1141,45 @@ def collect(
                 table.add_row("Status", "[green]Ready[/green]")
 
             # Show key financial data
-            if doc.extracted_data:
-                if get_enum_value(doc.document_type) == "W2":
-                    if "box_1" in doc.extracted_data:
-                        table.add_row("Wages (Box 1)", f"${doc.extracted_data['box_1']:,.2f}")
-                    if "box_2" in doc.extracted_data:
-                        table.add_row("Fed Tax Withheld", f"${doc.extracted_data['box_2']:,.2f}")
-                elif "1099_INT" in get_enum_value(doc.document_type):
-                    if "box_1" in doc.extracted_data:
-                        table.add_row("Interest Income", f"${doc.extracted_data['box_1']:,.2f}")
-                elif "1099_DIV" in get_enum_value(doc.document_type):
-                    if "box_1a" in doc.extracted_data:
-                        table.add_row("Dividends", f"${doc.extracted_data['box_1a']:,.2f}")
-
-            console.print(table)
+            data = doc.extracted_data or {}
+            for key, label in _DOC_TYPE_ROWS.get(get_enum_value(doc.document_type), ()):
+                if key in data:
+                    table.add_row(label, f"${data[key]:,.2f}")
+
+            get_console().print(table)
 
         except Exception as e:
             rprint(f"[red]Error processing document: {e}[/red]")
             raise typer.Exit(1)
 
 
+# (label, key) rows of the tables printed by 'analyze'
+_INCOME_ROWS = (
+    ("Wages", "wages"),
+    ("Interest", "interest"),
+    ("Ordinary Dividends", "dividends_ordinary"),
+    ("Qualified Dividends", "dividends_qualified"),
+    ("Short-term Capital Gains", "capital_gains_short"),
+    ("Long-term Capital Gains", "capital_gains_long"),
+    ("Other Income", "other"),
+)
+_TAX_ESTIMATE_ROWS = (
+    ("Standard Deduction", "standard_deduction"),
+    ("Taxable Ordinary Income", "taxable_ordinary_income"),
+    ("Ordinary Income Tax", "ordinary_income_tax"),
+    ("Capital Gains Tax", "capital_gains_tax"),
+)
+_WITHHOLDING_ROWS = (
+    ("Federal Income Tax", "federal"),
+    ("State Income Tax", "state"),
+    ("Social Security", "social_security"),
+    ("Medicare", "medicare"),
+)
+
+
 @app.command()
 def analyze(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
     summary: Annotated[bool, typer.Option("--summary", "-s", help="Brief summary only")] = False,
     ai: Annotated[bool, typer.Option("--ai", help="Include AI-powered analysis")] = True,
     legacy: Annotated[bool, typer.Option("--legacy", help="Use legacy agent instead of Agent SDK")] = False,
@@ -1098,8 +1208,9 @@ def analyze(
             use_agentic = False
 
     tax_year = year or config.tax_year
+    _start_rules_preload(tax_year, config.state)
 
-    with console.status(f"[bold green]Analyzing tax documents for {tax_year}..."):
+    with get_console().status(f"[bold green]Analyzing tax documents for {tax_year}..."):
         analyzer = TaxAnalyzer(tax_year)
         analysis = analyzer.generate_analysis()
 
@@ -1108,60 +1219,52 @@ def analyze(
         raise typer.Exit(1)
 
     # Income Summary
-    rprint(Panel.fit(f"[bold]Tax Analysis for {tax_year}[/bold]", title="Summary"))
-
     income = analysis["income_summary"]
     income_table = Table(title="Income Summary")
     income_table.add_column("Source", style="cyan")
     income_table.add_column("Amount", style="green", justify="right")
 
-    income_table.add_row("Wages", f"${income['wages']:,.2f}")
-    income_table.add_row("Interest", f"${income['interest']:,.2f}")
-    income_table.add_row("Ordinary Dividends", f"${income['dividends_ordinary']:,.2f}")
-    income_table.add_row("Qualified Dividends", f"${income['dividends_qualified']:,.2f}")
-    income_table.add_row("Short-term Capital Gains", f"${income['capital_gains_short']:,.2f}")
-    income_table.add_row("Long-term Capital Gains", f"${income['capital_gains_long']:,.2f}")
-    income_table.add_row("Other Income", f"${income['other']:,.2f}")
+    for label, key in _INCOME_ROWS:
+        income_table.add_row(label, f"${income[key]:,.2f}")
     income_table.add_row("", "")
     income_table.add_row("[bold]Total Income[/bold]", f"[bold]${analysis['total_income']:,.2f}[/bold]")
 
-    console.print(income_table)
-
     # Tax Estimate
     tax = analysis["tax_estimate"]
     tax_table = Table(title="Tax Estimate")
     tax_table.add_column("Item", style="cyan")
     tax_table.add_column("Amount", style="white", justify="right")
 
-    tax_table.add_row("Standard Deduction", f"${tax['standard_deduction']:,.2f}")
-    tax_table.add_row("Taxable Ordinary Income", f"${tax['taxable_ordinary_income']:,.2f}")
-    tax_table.add_row("Ordinary Income Tax", f"${tax['ordinary_income_tax']:,.2f}")
-    tax_table.add_row("Capital Gains Tax", f"${tax['capital_gains_tax']:,.2f}")
+    for label, key in _TAX_ESTIMATE_ROWS:
+        tax_table.add_row(label, f"${tax[key]:,.2f}")
     tax_table.add_row("[bold]Estimated Total Tax[/bold]", f"[bold]${tax['total_tax']:,.2f}[/bold]")
 
-    console.print(tax_table)
-
     # Withholding
     withholding = analysis["withholding_summary"]
     with_table = Table(title="Withholding Summary")
     with_table.add_column("Type", style="cyan")
     with_table.add_column("Amount", style="green", justify="right")
 
-    with_table.add_row("Federal Income Tax", f"${withholding['federal']:,.2f}")
-    with_table.add_row("State Income Tax", f"${withholding['state']:,.2f}")
-    with_table.add_row("Social Security", f"${withholding['social_security']:,.2f}")
-    with_table.add_row("Medicare", f"${withholding['medicare']:,.2f}")
-
-    console.print(with_table)
+    for label, key in _WITHHOLDING_ROWS:
+        with_table.add_row(label, f"${withholding[key]:,.2f}")
 
     # Result
-    rprint("")
     if analysis["refund_or_owed"] > 0:
-        rprint(f"[bold green]Estimated Refund: ${analysis['estimated_refund']:,.2f}[/bold green]")
+        result = f"[bold green]Estimated Refund: ${analysis['estimated_refund']:,.2f}[/bold green]"
     elif analysis["refund_or_owed"] < 0:
-        rprint(f"[bold red]Estimated Amount Owed: ${analysis['estimated_owed']:,.2f}[/bold red]")
+        result = f"[bold red]Estimated Amount Owed: ${analysis['estimated_owed']:,.2f}[/bold red]"
     else:
-        rprint("[bold yellow]Estimated: Break even[/bold yellow]")
+        result = "[bold yellow]Estimated: Break even[/bold yellow]"
+
+    # Render the whole report in one pass rather than one write per table
+    get_console().print(Group(
+        Panel.fit(f"[bold]Tax Analysis for {tax_year}[/bold]", title="Summary"),
+        income_table,
+        tax_table,
+        with_table,
+        "",
+        result,
+    ))
 
     # AI Analysis
     if ai and not summary:
@@ -1174,10 +1277,10 @@ def analyze(
             except Exception as e:
                 rprint(f"[yellow]Agent SDK error: {e}[/yellow]")
                 rprint("[dim]Falling back to standard AI analysis...[/dim]")
-                with console.status("[bold green]Generating AI analysis..."):
+                with get_console().status("[bold green]Generating AI analysis..."):
                     ai_analysis = analyzer.generate_ai_analysis()
         else:
-            with console.status("[bold green]Generating AI analysis..."):
+            with get_console().status("[bold green]Generating AI analysis..."):
                 ai_analysis = analyzer.generate_ai_analysis()
 
         rprint(Panel(ai_analysis, title="AI Tax Analysis", border_style="blue"))
@@ -1207,13 +1310,130 @@ def analyze(
     prompt_export(analysis_md, f"analysis-{tax_year}", "analysis")
 
 
+# Strips currency formatting from typed amounts, e.g. "$1,200" -> "1200"
+_AMOUNT_STRIP = str.maketrans("", "", "$,")
+
+
+def _print_options(header: str, options: list[str]) -> None:
+    """Print a question's numbered options under a header in one write."""
+    rprint(Text("\n".join([header, *(f"     {j}. {opt}" for j, opt in enumerate(options, 1))])))
+
+
+def _ask_yes_no(q: dict) -> bool:
+    """Ask a yes/no question."""
+    return Confirm.ask("   Answer", default=False)
+
+
+def _ask_number(q: dict) -> float:
+    """Ask for a dollar amount, treating unparseable input as 0."""
+    answer = Prompt.ask("   Amount ($)", default="0")
+    try:
+        return float(answer.translate(_AMOUNT_STRIP))
+    except ValueError:
+        return 0
+
+
+def _ask_select(q: dict) -> str | None:
+    """Ask for one of the question's options by number."""
+    options = q.get("options", [])
+    _print_options("   Options:", options)
+    answer = Prompt.ask("   Enter number", default="1")
+    try:
+        idx = int(answer) - 1
+    except ValueError:
+        return None
+    return options[idx] if 0 <= idx < len(options) else None
+
+
+def _ask_multi_select(q: dict) -> list[str]:
+    """Ask for any number of the question's options by number."""
+    options = q.get("options", [])
+    _print_options("   Options (enter numbers separated by commas, or 'none'):", options)
+    answer = Prompt.ask("   Enter numbers", default="none")
+    if answer.lower() == "none":
+        return []
+    try:
+        indices = [int(x.strip()) - 1 for x in answer.split(",")]
+    except ValueError:
+        return []
+    return [options[i] for i in indices if 0 <= i < len(options)]
+
+
+def _ask_text(q: dict) -> str:
+    """Ask for a free-text answer."""
+    return Prompt.ask("   Answer", default="")
+
+
+# Interview answer prompts by question type; unknown types are asked as text
+_QUESTION_HANDLERS = {
+    "yes_no": _ask_yes_no,
+    "number": _ask_number,
+    "select": _ask_select,
+    "multi_select": _ask_multi_select,
+    "text": _ask_text,
+}
+
+# Stock compensation panel sections: (heading, analysis key, fallback, heading style)
+_STOCK_COMP_SECTIONS = (
+    ("Tax Treatment:", "tax_treatment", "N/A", "bold"),
+    ("Immediate Actions:", "immediate_actions", "N/A", "bold"),
+    ("Optimization Tips:", "optimization_tips", "N/A", "bold"),
+    ("Warnings:", "warnings", "None", "bold yellow"),
+)
+
+
+def _stock_comp_text(analysis: dict) -> Text:
+    """
+    Build a stock compensation panel body from an AI analysis.
+
+    The text is assembled with styled spans instead of markup, so Rich has
+    nothing to parse and brackets in the AI's answer are shown literally.
+
+    Args:
+        analysis: Stock compensation analysis from the optimizer
+
+    Returns:
+        Styled panel body
+    """
+    text = Text()
+    for i, (heading, key, default, style) in enumerate(_STOCK_COMP_SECTIONS):
+        value = analysis.get(key)
+        if isinstance(value, list):
+            value = "\n".join(f"- {v}" for v in value)
+        if i:
+            text.append("\n\n")
+        text.append(heading, style=style)
+        text.append(f"\n{value or default}")
+    return text
+
+
+def _bullet_list(heading: str, items: list, style: str = "") -> Text:
+    """
+    Build a headed bullet list to print in one write.
+
+    Args:
+        heading: List heading, shown in bold
+        items: Items to list, one per line
+        style: Style shared by the heading and the items
+
+    Returns:
+        Styled list, starting with a blank line
+    """
+    text = Text("\n")
+    text.append(heading, style=f"bold {style}".rstrip())
+    for item in items:
+        text.append(f"\n  - {item}", style=style)
+    return text
+
+
 @app.command()
 def optimize(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
     interview: Annotated[bool, typer.Option("--interview", "-i", help="Run interactive interview")] = True,
 ) -> None:
     """Find tax-saving opportunities through AI-powered analysis and interview."""
     from tax_agent.analyzers.deductions import TaxOptimizer
+    from tax_agent.utils import prefetch
 
     config = get_config()
 
@@ -1222,6 +1442,7 @@ def optimize(
         raise typer.Exit(1)
 
     tax_year = year or config.tax_year
+    _start_rules_preload(tax_year, config.state)
     optimizer = TaxOptimizer(tax_year)
 
     rprint(Panel.fit(
@@ -1233,73 +1454,37 @@ def optimize(
     ))
 
     answers: dict = {}
+    stock_items: list[tuple[str, dict]] = []
 
     if interview:
-        # Get and ask interview questions
-        with console.status("[bold green]Generating personalized questions..."):
-            questions = optimizer.get_interview_questions()
+        # Questions stream in on a background thread: wait for the first, then
+        # ask it while the rest are still being generated
+        questions = prefetch(optimizer.iter_interview_questions())
+        with get_console().status("[bold green]Generating personalized questions..."):
+            first = next(questions, None)
 
         rprint("\n[bold]Please answer these questions to help identify savings opportunities:[/bold]\n")
 
-        for i, q in enumerate(questions, 1):
-            rprint(f"\n[cyan]{i}. {q['question']}[/cyan]")
+        for i, q in enumerate(chain([first] if first else [], questions), 1):
+            heading = Text(f"\n{i}. {q['question']}", style="cyan")
             if "relevance" in q:
-                rprint(f"   [dim]({q['relevance']})[/dim]")
+                heading.append(f"\n   ({q['relevance']})", style="dim")
+            rprint(heading)
 
-            q_type = q.get("type", "text")
-
-            if q_type == "yes_no":
-                answer = Prompt.ask("   Answer", choices=["y", "n"], default="n")
-                answers[q["id"]] = answer.lower() == "y"
-
-            elif q_type == "number":
-                answer = Prompt.ask("   Amount ($)", default="0")
-                try:
-                    answers[q["id"]] = float(answer.replace(",", "").replace("$", ""))
-                except ValueError:
-                    answers[q["id"]] = 0
-
-            elif q_type == "select":
-                options = q.get("options", [])
-                rprint("   Options:")
-                for j, opt in enumerate(options, 1):
-                    rprint(f"     {j}. {opt}")
-                answer = Prompt.ask("   Enter number", default="1")
-                try:
-                    idx = int(answer) - 1
-                    answers[q["id"]] = options[idx] if 0 <= idx < len(options) else None
-                except ValueError:
-                    answers[q["id"]] = None
-
-            elif q_type == "multi_select":
-                options = q.get("options", [])
-                rprint("   Options (enter numbers separated by commas, or 'none'):")
-                for j, opt in enumerate(options, 1):
-                    rprint(f"     {j}. {opt}")
-                answer = Prompt.ask("   Enter numbers", default="none")
-                if answer.lower() == "none":
-                    answers[q["id"]] = []
-                else:
-                    try:
-                        indices = [int(x.strip()) - 1 for x in answer.split(",")]
-                        answers[q["id"]] = [options[i] for i in indices if 0 <= i < len(options)]
-                    except ValueError:
-                        answers[q["id"]] = []
-
-            else:  # text
-                answers[q["id"]] = Prompt.ask("   Answer", default="")
+            ask = _QUESTION_HANDLERS.get(q.get("type", "text"), _ask_text)
+            answers[q["id"]] = ask(q)
 
         # Check for stock compensation
         stock_comp = answers.get("stock_compensation", [])
         if stock_comp and stock_comp != ["None"]:
             rprint("\n[bold yellow]Stock Compensation Detected[/bold yellow]")
-            rprint("Let me analyze your equity compensation situation...\n")
+            rprint("Let me collect details about your equity compensation...\n")
 
             for comp_type in stock_comp:
                 if comp_type == "None":
                     continue
 
-                rprint(f"\n[cyan]Analyzing {comp_type}...[/cyan]")
+                rprint(f"\n[cyan]{comp_type}[/cyan]")
 
                 # Ask follow-up questions about the stock comp
                 details = {}
@@ -1310,23 +1495,25 @@ def optimize(
                     details["sale_price"] = Prompt.ask("   Average sale price ($)?", default="0")
                     details["company"] = Prompt.ask("   Company name?", default="")
 
-                with console.status(f"[bold green]Analyzing {comp_type} tax implications..."):
-                    analysis = optimizer.analyze_stock_compensation(comp_type, details)
+                stock_items.append((comp_type, details))
 
-                if "error" not in analysis:
-                    rprint(Panel(
-                        f"[bold]Tax Treatment:[/bold]\n{analysis.get('tax_treatment', 'N/A')}\n\n"
-                        f"[bold]Immediate Actions:[/bold]\n{analysis.get('immediate_actions', 'N/A')}\n\n"
-                        f"[bold]Optimization Tips:[/bold]\n{analysis.get('optimization_tips', 'N/A')}\n\n"
-                        f"[bold yellow]Warnings:[/bold yellow]\n{analysis.get('warnings', 'None')}",
-                        title=f"{comp_type} Analysis",
-                        border_style="yellow"
-                    ))
-
-    # Find deductions
+    # Stock compensation analyses and deduction finding are independent
+    # requests, so run them concurrently
     rprint("\n")
-    with console.status("[bold green]Finding deductions and credits..."):
-        deductions = optimizer.find_deductions(interview_answers=answers)
+    with get_console().status("[bold green]Finding deductions and credits..."):
+        results = optimizer.full_analysis(
+            answers=answers, stock_items=stock_items, include_questions=False
+        )
+
+    for (comp_type, _), analysis in zip(stock_items, results["stock_compensation"]):
+        if "error" not in analysis:
+            rprint(Panel(
+                _stock_comp_text(analysis),
+                title=f"{comp_type} Analysis",
+                border_style="yellow"
+            ))
+
+    deductions = results["deductions"]
 
     if "error" not in deductions:
         # Standard vs Itemized
@@ -1361,7 +1548,7 @@ def optimize(
                     value_str = f"${value:,.0f}" if isinstance(value, (int, float)) else str(value)
                     ded_table.add_row(name, value_str, action[:50])
 
-            console.print(ded_table)
+            get_console().print(ded_table)
 
         # Recommended credits
         rec_credits = deductions.get("recommended_credits", [])
@@ -1377,7 +1564,7 @@ def optimize(
                     value_str = f"${value:,.0f}" if isinstance(value, (int, float)) else str(value)
                     credit_table.add_row(name, value_str)
 
-            console.print(credit_table)
+            get_console().print(credit_table)
 
         # Estimated savings
         savings = deductions.get("estimated_total_savings", 0)
@@ -1387,16 +1574,12 @@ def optimize(
         # Action items
         action_items = deductions.get("action_items", [])
         if action_items:
-            rprint("\n[bold]Action Items:[/bold]")
-            for item in action_items:
-                rprint(f"  - {item}")
+            rprint(_bullet_list("Action Items:", action_items))
 
         # Warnings
         warnings = deductions.get("warnings", [])
         if warnings:
-            rprint("\n[bold yellow]Warnings:[/bold yellow]")
-            for warn in warnings:
-                rprint(f"  [yellow]- {warn}[/yellow]")
+            rprint(_bullet_list("Warnings:", warnings, style="yellow"))
 
     else:
         rprint(f"[red]Error finding deductions: {deductions.get('error')}[/red]")
@@ -1448,14 +1631,55 @@ def optimize(
     prompt_export("".join(optimization_md_parts), f"optimization-{tax_year}", "optimization report")
 
 
+# Optional detail lines under each review finding: (label, finding key, label style)
+_FINDING_DETAILS = (
+    ("Form Reference:", "line_reference", "dim"),
+    ("Expected:", "expected_value", "green"),
+    ("Actual:", "actual_value", "red"),
+    ("Potential Tax Impact:", "potential_impact", "yellow"),
+    ("Recommendation:", "recommendation", "bold"),
+    ("Related Document:", "source_document_id", "dim"),
+)
+
+
+def _findings_text(findings: list[dict]) -> Text:
+    """
+    Build the detailed review findings to print in one write.
+
+    Args:
+        findings: Review findings as dicts, fresh or loaded from a saved review
+
+    Returns:
+        Styled findings, separated by blank lines
+    """
+    text = Text()
+    for i, finding in enumerate(findings, 1):
+        severity = get_enum_value(finding.get("severity", "info")).lower()
+        if i > 1:
+            text.append("\n\n")
+        text.append(
+            f"{i}. {severity.upper()}: {finding.get('title', 'N/A')}",
+            style=_SEVERITY_COLORS.get(severity, "white"),
+        )
+        if finding.get("category"):
+            text.append("\n   ").append("Category:", style="cyan").append(f" {finding['category']}")
+        text.append(f"\n   {finding.get('description', '')}")
+        for label, key, style in _FINDING_DETAILS:
+            value = finding.get(key)
+            if value:
+                if isinstance(value, (int, float)):
+                    value = f"${value:,.2f}"
+                text.append("\n   ").append(label, style=style).append(f" {value}")
+    return text
+
+
 @app.command()
 def review(
-    return_file: Annotated[Path, typer.Argument(help="Path to completed tax return PDF")],
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    return_file: _ReturnFileArgument,
+    year: _TaxYearOption = None,
 ) -> None:
     """Review a completed tax return for errors and enhancements."""
     from tax_agent.reviewers.error_checker import ReturnReviewer
-    from tax_agent.models.returns import ReviewSeverity
 
     config = get_config()
 
@@ -1469,7 +1693,7 @@ def review(
 
     tax_year = year or config.tax_year
 
-    with console.status(f"[bold green]Reviewing tax return for {tax_year}..."):
+    with get_console().status(f"[bold green]Reviewing tax return for {tax_year}..."):
         reviewer = ReturnReviewer(tax_year)
         review_result = reviewer.review_return(return_file)
 
@@ -1486,7 +1710,8 @@ def review(
     rprint(f"\n[{summary_style}]{review_result.overall_assessment}[/{summary_style}]")
 
     # Findings table
-    if review_result.findings:
+    finding_dicts = [f.model_dump() for f in review_result.findings]
+    if finding_dicts:
         rprint("\n")
         findings_table = Table(title="Findings")
         findings_table.add_column("Severity", style="white", width=10)
@@ -1494,15 +1719,8 @@ def review(
         findings_table.add_column("Issue", style="white")
         findings_table.add_column("Impact", style="yellow", justify="right", width=12)
 
-        severity_colors = {
-            ReviewSeverity.ERROR: "red",
-            ReviewSeverity.WARNING: "yellow",
-            ReviewSeverity.SUGGESTION: "blue",
-            ReviewSeverity.INFO: "dim",
-        }
-
         for finding in review_result.findings:
-            color = severity_colors.get(finding.severity, "white")
+            color = _SEVERITY_COLORS.get(finding.severity, "white")
             impact_str = f"${finding.potential_impact:,.0f}" if finding.potential_impact else "-"
 
             findings_table.add_row(
@@ -1512,34 +1730,17 @@ def review(
                 impact_str,
             )
 
-        console.print(findings_table)
+        get_console().print(findings_table)
 
         # Detailed findings
         rprint("\n[bold]Detailed Findings:[/bold]\n")
-        for i, finding in enumerate(review_result.findings, 1):
-            color = severity_colors.get(finding.severity, "white")
-            rprint(f"[{color}]{i}. {get_enum_value(finding.severity).upper()}: {finding.title}[/{color}]")
-            rprint(f"   [cyan]Category:[/cyan] {finding.category}")
-            rprint(f"   {finding.description}")
-            if finding.line_reference:
-                rprint(f"   [dim]Form Reference:[/dim] {finding.line_reference}")
-            if finding.expected_value:
-                rprint(f"   [green]Expected:[/green] {finding.expected_value}")
-            if finding.actual_value:
-                rprint(f"   [red]Actual:[/red] {finding.actual_value}")
-            if finding.potential_impact:
-                rprint(f"   [yellow]Potential Tax Impact:[/yellow] ${finding.potential_impact:,.2f}")
-            if finding.recommendation:
-                rprint(f"   [bold]Recommendation:[/bold] {finding.recommendation}")
-            if finding.source_document_id:
-                rprint(f"   [dim]Related Document:[/dim] {finding.source_document_id}")
-            rprint("")
+        rprint(_findings_text(finding_dicts))
     else:
         rprint("\n[green]No issues found in the tax return.[/green]")
 
     # Save the review to database
-    from tax_agent.storage.database import get_database
     from tax_agent.exporters import export_review_markdown
+    from tax_agent.storage.database import get_database
     db = get_database()
     db.save_review(review_result)
     rprint(f"\n[dim]Review saved (ID: {review_result.id[:8]}...)[/dim]")
@@ -1551,7 +1752,7 @@ def review(
         "return_type": get_enum_value(review_result.return_summary.return_type),
         "overall_assessment": review_result.overall_assessment,
         "summary": review_result.return_summary.model_dump(),
-        "findings": [f.model_dump() for f in review_result.findings],
+        "findings": finding_dicts,
         "created_at": review_result.reviewed_at.isoformat(),
     }
     markdown_content = export_review_markdown(review_dict)
@@ -1560,7 +1761,7 @@ def review(
 
 @app.command()
 def reviews(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Filter by tax year")] = None,
+    year: _YearFilterOption = None,
 ) -> None:
     """List saved tax return reviews."""
     from tax_agent.storage.database import get_database
@@ -1594,7 +1795,7 @@ def reviews(
             rev["created_at"][:10],
         )
 
-    console.print(table)
+    get_console().print(table)
     rprint("\n[dim]Use 'tax-agent review-show <id>' to view details[/dim]")
 
 
@@ -1603,10 +1804,10 @@ def review_show(
     review_id: Annotated[str, typer.Argument(help="Review ID (can be partial)")],
 ) -> None:
     """Show details of a saved review."""
-    from tax_agent.storage.database import get_database
-    from tax_agent.models.returns import ReviewSeverity
     import json
 
+    from tax_agent.storage.database import get_database
+
     config = get_config()
 
     if not config.is_initialized:
@@ -1655,34 +1856,7 @@ def review_show(
     if findings:
         rprint(f"\n[bold]{len(findings)} Finding(s):[/bold]\n")
 
-        # Use lowercase keys to match enum values
-        severity_colors = {
-            "error": "red",
-            "warning": "yellow",
-            "suggestion": "blue",
-            "info": "dim",
-        }
-
-        for i, finding in enumerate(findings, 1):
-            severity = str(finding.get("severity", "info")).lower()
-            color = severity_colors.get(severity, "white")
-            rprint(f"[{color}]{i}. {severity.upper()}: {finding.get('title', 'N/A')}[/{color}]")
-            if finding.get("category"):
-                rprint(f"   [cyan]Category:[/cyan] {finding['category']}")
-            rprint(f"   {finding.get('description', '')}")
-            if finding.get("line_reference"):
-                rprint(f"   [dim]Form Reference:[/dim] {finding['line_reference']}")
-            if finding.get("expected_value"):
-                rprint(f"   [green]Expected:[/green] {finding['expected_value']}")
-            if finding.get("actual_value"):
-                rprint(f"   [red]Actual:[/red] {finding['actual_value']}")
-            if finding.get("potential_impact"):
-                rprint(f"   [yellow]Potential Tax Impact:[/yellow] ${finding['potential_impact']:,.2f}")
-            if finding.get("recommendation"):
-                rprint(f"   [bold]Recommendation:[/bold] {finding['recommendation']}")
-            if finding.get("source_document_id"):
-                rprint(f"   [dim]Related Document:[/dim] {finding['source_document_id']}")
-            rprint("")
+        rprint(_findings_text(findings))
     else:
         rprint("\n[green]No issues found in this review.[/green]")
 
@@ -1691,7 +1865,7 @@ def review_show(
 def export(
     output: Annotated[Path, typer.Argument(help="Output file path")],
     format: Annotated[str, typer.Option("--format", "-f", help="Output format: md or pdf")] = "md",
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
     review_id: Annotated[Optional[str], typer.Option("--review", "-r", help="Export specific review")] = None,
     documents_only: Annotated[bool, typer.Option("--documents", "-d", help="Export only documents")] = False,
 ) -> None:
@@ -1704,9 +1878,9 @@ def export(
         tax-agent export review.pdf -r abc123 -f pdf  # Specific review as PDF
     """
     from tax_agent.exporters import (
-        export_review_markdown,
         export_documents_markdown,
         export_full_report_markdown,
+        export_review_markdown,
         export_to_file,
     )
     from tax_agent.storage.database import get_database
@@ -1729,7 +1903,7 @@ def export(
     if format == "markdown":
         format = "md"
 
-    with console.status(f"[bold green]Generating {format.upper()} export..."):
+    with get_console().status(f"[bold green]Generating {format.upper()} export..."):
         if review_id:
             # Export specific review
             review = db.get_review(review_id)
@@ -1759,7 +1933,7 @@ def export(
 def report(
     output: Annotated[Path, typer.Argument(help="Output file path (e.g., summary.pdf)")] = Path("tax-summary.pdf"),
     format: Annotated[str, typer.Option("--format", "-f", help="Output format: md or pdf")] = "pdf",
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Generate a comprehensive tax preparation summary report.
 
@@ -1792,7 +1966,7 @@ def report(
     if format == "markdown":
         format = "md"
 
-    with console.status(f"[bold green]Generating tax summary report for {tax_year}..."):
+    with get_console().status(f"[bold green]Generating tax summary report for {tax_year}..."):
         # Run the analysis
         analyzer = TaxAnalyzer(tax_year)
         analysis = analyzer.generate_analysis()
@@ -1834,13 +2008,12 @@ def report(
     rprint(f"[dim]Tax Year: {tax_year}, Format: {format.upper()}[/dim]")
 
     # Print quick summary to console
-    income = analysis.get("income_summary", {})
     tax_est = analysis.get("tax_estimate", {})
     refund = analysis.get("refund_or_owed", 0)
 
     rprint("")
     rprint(Panel.fit(
-        f"[bold]Total Income:[/bold] ${sum(income.values()):,.2f}\n"
+        f"[bold]Total Income:[/bold] ${analysis.get('total_income', 0):,.2f}\n"
         f"[bold]Federal Tax:[/bold]  ${tax_est.get('total_tax', 0):,.2f}\n"
         f"[bold]{'Refund' if refund >= 0 else 'Owed'}:[/bold]       "
         f"{'$' + f'{refund:,.2f}' if refund >= 0 else '$' + f'{-refund:,.2f}'}",
@@ -1856,7 +2029,7 @@ def report(
 
 @ai_app.command("validate")
 def ai_validate(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Cross-validate all collected documents for consistency."""
     from tax_agent.agent import get_agent
@@ -1889,7 +2062,7 @@ def ai_validate(
     rprint(f"[cyan]Validating {len(documents)} documents for tax year {tax_year}...[/cyan]")
 
     agent = get_agent()
-    with console.status("[bold green]Running AI cross-validation analysis..."):
+    with get_console().status("[bold green]Running AI cross-validation analysis..."):
         result = agent.validate_documents_cross_reference(docs_data)
 
     # Display results
@@ -1924,7 +2097,7 @@ def ai_validate(
         if summary.get("total_capital_gains"):
             sum_table.add_row("Capital Gains", f"${summary['total_capital_gains']:,.2f}")
 
-        console.print(sum_table)
+        get_console().print(sum_table)
 
     # Show issues
     issues = result.get("issues", [])
@@ -1932,7 +2105,7 @@ def ai_validate(
         rprint("\n[bold]Issues Found:[/bold]")
         for issue in issues:
             severity = issue.get("severity", "info")
-            color = {"error": "red", "warning": "yellow", "info": "blue"}.get(severity, "white")
+            color = _ISSUE_COLORS.get(severity, "white")
             rprint(f"  [{color}]{severity.upper()}[/{color}]: {issue.get('description', '')}")
             if issue.get("recommended_action"):
                 rprint(f"    [dim]Action: {issue['recommended_action']}[/dim]")
@@ -1942,20 +2115,18 @@ def ai_validate(
     if missing:
         rprint("\n[bold yellow]Potentially Missing Documents:[/bold yellow]")
         for doc in missing:
-            importance_color = {"high": "red", "medium": "yellow", "low": "blue"}.get(
-                doc.get("importance", ""), "white"
-            )
+            importance_color = _PRIORITY_COLORS.get(doc.get("importance", ""), "white")
             rprint(f"  [{importance_color}]{doc.get('document_type', '')}[/{importance_color}]: {doc.get('reason', '')}")
 
 
 @ai_app.command("audit-risk")
 def ai_audit_risk(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Assess audit risk based on collected documents."""
     from tax_agent.agent import get_agent
-    from tax_agent.storage.database import get_database
     from tax_agent.analyzers.implications import TaxAnalyzer
+    from tax_agent.storage.database import get_database
 
     config = get_config()
 
@@ -1993,7 +2164,7 @@ def ai_audit_risk(
     rprint(f"[cyan]Assessing audit risk for tax year {tax_year}...[/cyan]")
 
     agent = get_agent()
-    with console.status("[bold green]Running AI audit risk assessment..."):
+    with get_console().status("[bold green]Running AI audit risk assessment..."):
         result = agent.assess_audit_risk(return_summary, {"documents": docs_summary})
 
     # Display results
@@ -2041,9 +2212,7 @@ def ai_audit_risk(
     if doc_recs:
         rprint("\n[bold cyan]Documentation Recommendations:[/bold cyan]")
         for rec in doc_recs:
-            priority_color = {"high": "red", "medium": "yellow", "low": "blue"}.get(
-                rec.get("priority", ""), "white"
-            )
+            priority_color = _PRIORITY_COLORS.get(rec.get("priority", ""), "white")
             rprint(f"  [{priority_color}]●[/{priority_color}] {rec.get('item', '')}")
             rprint(f"    [dim]{rec.get('reason', '')}[/dim]")
 
@@ -2054,12 +2223,12 @@ def ai_audit_risk(
 
 @ai_app.command("scenarios")
 def ai_scenarios(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Compare different filing scenarios to find optimal strategy."""
     from tax_agent.agent import get_agent
-    from tax_agent.storage.database import get_database
     from tax_agent.analyzers.implications import TaxAnalyzer
+    from tax_agent.storage.database import get_database
 
     config = get_config()
 
@@ -2092,7 +2261,7 @@ def ai_scenarios(
     rprint(f"[cyan]Comparing filing scenarios for tax year {tax_year}...[/cyan]")
 
     agent = get_agent()
-    with console.status("[bold green]Running AI scenario comparison..."):
+    with get_console().status("[bold green]Running AI scenario comparison..."):
         result = agent.compare_filing_scenarios(income_data, deductions_data, tax_year)
 
     # Display optimal strategy
@@ -2128,16 +2297,14 @@ def ai_scenarios(
                 f"[{diff_color}]{diff_str}[/{diff_color}]",
             )
 
-        console.print(table)
+        get_console().print(table)
 
     # Timing recommendations
     timing = result.get("timing_recommendations", [])
     if timing:
         rprint("\n[bold]Timing Recommendations:[/bold]")
         for rec in timing:
-            priority_color = {"high": "red", "medium": "yellow", "low": "blue"}.get(
-                rec.get("priority", ""), "white"
-            )
+            priority_color = _PRIORITY_COLORS.get(rec.get("priority", ""), "white")
             impact = rec.get("tax_impact", 0)
             impact_str = f"[green]saves ${abs(impact):,.0f}[/green]" if impact < 0 else f"[yellow]costs ${impact:,.0f}[/yellow]"
             rprint(f"  [{priority_color}]●[/{priority_color}] {rec.get('action', '')} - {impact_str}")
@@ -2151,7 +2318,7 @@ def ai_scenarios(
 
 @ai_app.command("missing")
 def ai_missing(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Identify potentially missing tax documents."""
     from tax_agent.agent import get_agent
@@ -2187,7 +2354,7 @@ def ai_missing(
     rprint(f"[cyan]Analyzing document collection for tax year {tax_year}...[/cyan]")
 
     agent = get_agent()
-    with console.status("[bold green]Running AI missing document analysis..."):
+    with get_console().status("[bold green]Running AI missing document analysis..."):
         result = agent.identify_missing_documents(docs_summary, profile)
 
     # Display completeness score
@@ -2207,7 +2374,7 @@ def ai_missing(
         rprint("\n[bold yellow]Potentially Missing Documents:[/bold yellow]")
         for doc in missing:
             importance = doc.get("importance", "medium")
-            color = {"critical": "red", "high": "red", "medium": "yellow", "low": "blue"}.get(importance, "white")
+            color = _PRIORITY_COLORS.get(importance, "white")
             irs_risk = "[red]⚠ IRS Match[/red]" if doc.get("irs_matching_risk") else ""
 
             rprint(f"\n  [{color}]{doc.get('document_type', '')}[/{color}] {irs_risk}")
@@ -2247,12 +2414,12 @@ def ai_missing(
 
 @ai_app.command("investments")
 def ai_investments(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Deep AI analysis of investment taxes (capital gains, wash sales, harvesting)."""
     from tax_agent.agent import get_agent
-    from tax_agent.storage.database import get_database
     from tax_agent.models.documents import DocumentType
+    from tax_agent.storage.database import get_database
 
     config = get_config()
 
@@ -2287,7 +2454,7 @@ def ai_investments(
     rprint(f"[cyan]Analyzing {len(all_transactions)} investment transactions for tax year {tax_year}...[/cyan]")
 
     agent = get_agent()
-    with console.status("[bold green]Running AI investment tax analysis..."):
+    with get_console().status("[bold green]Running AI investment tax analysis..."):
         result = agent.analyze_investment_taxes(all_transactions)
 
     # Capital gains summary
@@ -2354,9 +2521,7 @@ def ai_investments(
     if actions:
         rprint("\n[bold]Optimization Actions:[/bold]")
         for action in actions:
-            priority_color = {"high": "red", "medium": "yellow", "low": "blue"}.get(
-                action.get("priority", ""), "white"
-            )
+            priority_color = _PRIORITY_COLORS.get(action.get("priority", ""), "white")
             rprint(f"\n  [{priority_color}]●[/{priority_color}] {action.get('action', '')}")
             rprint(f"    [green]Potential Savings: ${action.get('potential_savings', 0):,.2f}[/green]")
             if action.get("deadline"):
@@ -2369,12 +2534,12 @@ def ai_investments(
 
 @ai_app.command("plan")
 def ai_plan(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Generate forward-looking tax planning recommendations."""
     from tax_agent.agent import get_agent
-    from tax_agent.storage.database import get_database
     from tax_agent.analyzers.implications import TaxAnalyzer
+    from tax_agent.storage.database import get_database
 
     config = get_config()
 
@@ -2405,7 +2570,7 @@ def ai_plan(
     rprint(f"[cyan]Generating tax planning recommendations for {tax_year} and beyond...[/cyan]")
 
     agent = get_agent()
-    with console.status("[bold green]Running AI tax planning analysis..."):
+    with get_console().status("[bold green]Running AI tax planning analysis..."):
         result = agent.generate_tax_planning_recommendations(current_year_data, profile)
 
     # Immediate actions
@@ -2510,7 +2675,7 @@ def ai_subagents_list() -> None:
     for agent in subagents:
         table.add_row(agent["name"], agent["description"])
 
-    console.print(table)
+    get_console().print(table)
 
     rprint("\n[dim]Example: tax-agent ai invoke deduction-finder --prompt \"Find all deductions for my W-2 income\"[/dim]")
 
@@ -2519,7 +2684,7 @@ def ai_subagents_list() -> None:
 def ai_invoke_subagent(
     name: Annotated[str, typer.Argument(help="Subagent name (e.g., deduction-finder)")],
     prompt: Annotated[Optional[str], typer.Option("--prompt", "-p", help="Task prompt for the subagent")] = None,
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Invoke a specialized subagent for targeted tax analysis."""
     from tax_agent.subagents import get_subagent, list_subagents
@@ -2586,7 +2751,7 @@ Documents collected: {len(documents)}
 Task: {prompt}"""
 
     # Run with streaming output
-    with console.status(f"[bold green]{subagent.name} is working..."):
+    with get_console().status(f"[bold green]{subagent.name} is working..."):
         result = sdk_agent.invoke_subagent(name, context_prompt, source_dir)
 
     rprint(Panel(result, title=f"{subagent.name} Analysis", border_style="blue"))
@@ -2594,8 +2759,8 @@ Task: {prompt}"""
 
 @ai_app.command("review-return")
 def ai_review_return(
-    return_file: Annotated[Path, typer.Argument(help="Path to completed tax return PDF")],
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    return_file: _ReturnFileArgument,
+    year: _TaxYearOption = None,
     thorough: Annotated[bool, typer.Option("--thorough", "-t", help="Extra thorough review with web research")] = False,
 ) -> None:
     """
@@ -2610,9 +2775,11 @@ def ai_review_return(
 
     More thorough than the basic 'review' command.
     """
+    import asyncio
+
+    from tax_agent.analyzers.implications import TaxAnalyzer
     from tax_agent.collectors.ocr import extract_text_with_ocr
     from tax_agent.storage.database import get_database
-    from tax_agent.utils import get_enum_value as _get_enum
 
     config = get_config()
 
@@ -2643,7 +2810,7 @@ def ai_review_return(
 
     # Extract return text
     rprint("\n[cyan]Extracting return content...[/cyan]")
-    with console.status("[bold green]Processing tax return..."):
+    with get_console().status("[bold green]Processing tax return..."):
         return_text = extract_text_with_ocr(return_file)
 
     if not return_text or len(return_text.strip()) < 100:
@@ -2660,32 +2827,9 @@ def ai_review_return(
         rprint(f"[yellow]Warning: No source documents collected for {tax_year}.[/yellow]")
         rprint("[dim]Review will be limited without source documents to cross-reference.[/dim]\n")
 
-    # Build source document summary
-    source_summaries = []
-    source_dir = None
-    for doc in documents:
-        summary = f"- {_get_enum(doc.document_type)} from {doc.issuer_name}"
-        if doc.extracted_data:
-            # Add key amounts for cross-reference
-            if _get_enum(doc.document_type) == "W2":
-                wages = doc.extracted_data.get("box_1", 0)
-                withheld = doc.extracted_data.get("box_2", 0)
-                summary += f": Wages ${wages:,.2f}, Fed withheld ${withheld:,.2f}"
-            elif "1099_INT" in _get_enum(doc.document_type):
-                interest = doc.extracted_data.get("box_1", 0)
-                summary += f": Interest ${interest:,.2f}"
-            elif "1099_DIV" in _get_enum(doc.document_type):
-                div = doc.extracted_data.get("box_1a", 0)
-                summary += f": Dividends ${div:,.2f}"
-            elif "1099_B" in _get_enum(doc.document_type):
-                proceeds = doc.extracted_data.get("summary", {}).get("total_proceeds", 0)
-                summary += f": Proceeds ${proceeds:,.2f}"
-        source_summaries.append(summary)
-
-        if doc.file_path and source_dir is None:
-            source_dir = Path(doc.file_path).parent
-
-    source_docs_text = "\n".join(source_summaries) if source_summaries else "No source documents available"
+    # Build source document summary with key amounts for cross-reference
+    source_docs_text, source_dir = TaxAnalyzer.summarize_documents(documents)
+    source_docs_text = source_docs_text or "No source documents available"
 
     # Check if SDK is available for enhanced review
     use_sdk = config.use_agent_sdk
@@ -2776,7 +2920,7 @@ Since thorough mode is enabled:
                 response_parts.append(chunk)
                 rprint("[dim].[/dim]", end="")
 
-        with console.status("[bold green]AI agent is reviewing..."):
+        with get_console().status("[bold green]AI agent is reviewing..."):
             asyncio.run(run_review())
 
         rprint()  # Newline after progress
@@ -2790,7 +2934,7 @@ Since thorough mode is enabled:
         from tax_agent.agent import get_agent
 
         agent = get_agent()
-        with console.status("[bold green]Running AI review..."):
+        with get_console().status("[bold green]Running AI review..."):
             review_result = agent.review_tax_return(return_text[:15000], source_docs_text)
 
     # Display results
@@ -2838,12 +2982,13 @@ Since thorough mode is enabled:
 # Document subcommands
 @documents_app.command("list")
 def documents_list(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Filter by tax year")] = None,
+    year: _YearFilterOption = None,
     folder: Annotated[bool, typer.Option("--folder", "-f", help="Show folder tree view")] = False,
     tag: Annotated[Optional[str], typer.Option("--tag", "-t", help="Filter by tag")] = None,
 ) -> None:
     """List all collected tax documents."""
     from rich.tree import Tree
+
     from tax_agent.storage.database import get_database
 
     config = get_config()
@@ -2857,18 +3002,12 @@ def documents_list(
 
     # Build filter
     tag_filter = [tag] if tag else None
-    documents = db.get_documents(tax_year=tax_year, tags=tag_filter)
-
-    if not documents:
-        if tag:
-            rprint(f"[yellow]No documents with tag '{tag}' for tax year {tax_year}.[/yellow]")
-        else:
-            rprint(f"[yellow]No documents collected for tax year {tax_year}.[/yellow]")
-        return
 
     if folder:
-        # Folder tree view
+        # Folder tree view (grouping needs every document up front)
         from tax_agent.models.documents import group_documents_by_folder
+        documents = db.get_documents(tax_year=tax_year, tags=tag_filter)
+        doc_count = len(documents)
         by_folder = group_documents_by_folder(documents)
 
         tree = Tree(f"[bold blue]{tax_year}[/bold blue]")
@@ -2881,9 +3020,8 @@ def documents_list(
                     f"{get_enum_value(doc.document_type)} from {doc.issuer_name} "
                     f"[dim]({doc.id[:8]})[/dim]{tags_str}{status}"
                 )
-        console.print(tree)
     else:
-        # Table view
+        # Table view, filled as documents stream from the database
         table = Table(title=f"Tax Documents - {tax_year}")
         table.add_column("ID", style="dim")
         table.add_column("Type", style="cyan")
@@ -2891,7 +3029,9 @@ def documents_list(
         table.add_column("Tags", style="magenta")
         table.add_column("Status", style="green")
 
-        for doc in documents:
+        doc_count = 0
+        for doc in db.iter_documents(tax_year=tax_year, tags=tag_filter):
+            doc_count += 1
             status = "[yellow]Review[/yellow]" if doc.needs_review else "[green]Ready[/green]"
             tags_str = ", ".join(doc.tags) if doc.tags else "-"
             table.add_row(
@@ -2901,22 +3041,31 @@ def documents_list(
                 tags_str[:20],
                 status,
             )
-        console.print(table)
+
+    if not doc_count:
+        if tag:
+            rprint(f"[yellow]No documents with tag '{tag}' for tax year {tax_year}.[/yellow]")
+        else:
+            rprint(f"[yellow]No documents collected for tax year {tax_year}.[/yellow]")
+        return
+
+    get_console().print(tree if folder else table)
 
     # Show summary
     all_tags = db.get_all_tags(tax_year=tax_year)
     tags_msg = f" | Tags: {', '.join(all_tags)}" if all_tags else ""
-    rprint(f"\n[dim]{len(documents)} document(s) total{tags_msg}[/dim]")
+    rprint(f"\n[dim]{doc_count} document(s) total{tags_msg}[/dim]")
 
 
 @documents_app.command("show")
 def documents_show(
-    doc_id: Annotated[str, typer.Argument(help="Document ID (can be partial)")],
+    doc_id: _DocIdArgument,
 ) -> None:
     """Show details of a specific document."""
-    from tax_agent.storage.database import get_database
     import json
 
+    from tax_agent.storage.database import get_database
+
     config = get_config()
 
     if not config.is_initialized:
@@ -2929,8 +3078,7 @@ def documents_show(
     doc = db.get_document(doc_id)
     if not doc:
         # Search for partial match
-        all_docs = db.get_documents()
-        matches = [d for d in all_docs if d.id.startswith(doc_id)]
+        matches = db.get_documents_by_id_prefix(doc_id)
         if len(matches) == 1:
             doc = matches[0]
         elif len(matches) > 1:
@@ -2962,7 +3110,7 @@ def documents_show(
     if doc.file_path:
         table.add_row("Source File", doc.file_path)
 
-    console.print(table)
+    get_console().print(table)
 
     if doc.extracted_data:
         rprint("\n[bold]Extracted Data:[/bold]")
@@ -3010,8 +3158,7 @@ def documents_delete(
         doc = db.get_document(doc_id)
         if not doc:
             # Try partial match
-            all_docs = db.get_documents()
-            matches = [d for d in all_docs if d.id.startswith(doc_id)]
+            matches = db.get_documents_by_id_prefix(doc_id)
             if len(matches) == 1:
                 doc = matches[0]
             elif len(matches) > 1:
@@ -3038,7 +3185,7 @@ def documents_delete(
 
 @documents_app.command("tag")
 def documents_tag(
-    doc_id: Annotated[str, typer.Argument(help="Document ID (can be partial)")],
+    doc_id: _DocIdArgument,
     tags: Annotated[list[str], typer.Argument(help="Tags to add")],
 ) -> None:
     """Add tags to a document."""
@@ -3061,7 +3208,7 @@ def documents_tag(
 
 @documents_app.command("untag")
 def documents_untag(
-    doc_id: Annotated[str, typer.Argument(help="Document ID (can be partial)")],
+    doc_id: _DocIdArgument,
     tags: Annotated[list[str], typer.Argument(help="Tags to remove")],
 ) -> None:
     """Remove tags from a document."""
@@ -3084,7 +3231,7 @@ def documents_untag(
 
 @documents_app.command("tags")
 def documents_tags(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Filter by tax year")] = None,
+    year: _YearFilterOption = None,
 ) -> None:
     """List all tags in use."""
     from tax_agent.storage.database import get_database
@@ -3111,15 +3258,16 @@ def documents_tags(
     for tag in sorted(tag_counts.keys()):
         table.add_row(tag, str(tag_counts[tag]))
 
-    console.print(table)
+    get_console().print(table)
 
 
 @documents_app.command("folders")
 def documents_folders(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Filter by tax year")] = None,
+    year: _YearFilterOption = None,
 ) -> None:
     """Show documents organized by folder."""
     from rich.tree import Tree
+
     from tax_agent.models.documents import group_documents_by_folder
     from tax_agent.storage.database import get_database
 
@@ -3150,7 +3298,7 @@ def documents_folders(
                 f"[dim]({doc.id[:8]})[/dim]{tags_str}{status}"
             )
 
-    console.print(tree)
+    get_console().print(tree)
     rprint(f"\n[dim]{len(documents)} document(s) total[/dim]")
 
 
@@ -3158,6 +3306,8 @@ def documents_folders(
 @context_app.command("show")
 def context_show() -> None:
     """Display the TAX_CONTEXT.md steering document."""
+    from rich.markdown import Markdown
+
     from tax_agent.context import get_tax_context
 
     ctx = get_tax_context()
@@ -3265,7 +3415,7 @@ def context_info() -> None:
     table.add_row("Modified", summary["modified"].strftime("%Y-%m-%d %H:%M") if summary["modified"] else "N/A")
     table.add_row("Has Content", "Yes" if summary["has_content"] else "No (still template)")
 
-    console.print(table)
+    get_console().print(table)
 
     # Show extracted info
     info = ctx.extract_key_info()
@@ -3329,7 +3479,7 @@ def config_get(
         for k, v in config.to_dict().items():
             table.add_row(k, str(v) if v is not None else "[dim]Not set[/dim]")
 
-        console.print(table)
+        get_console().print(table)
 
 
 @config_app.command("api-key")
@@ -3377,7 +3527,7 @@ def config_brave_key() -> None:
 @research_app.command("topic")
 def research_topic(
     topic: Annotated[str, typer.Argument(help="Tax topic to research")],
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Research a specific tax topic with current IRS guidance."""
     from tax_agent.research import TaxResearcher
@@ -3392,7 +3542,7 @@ def research_topic(
 
     rprint(f"[cyan]Researching: {topic} (Tax Year {tax_year})...[/cyan]\n")
 
-    with console.status("[bold green]Searching for current tax guidance..."):
+    with get_console().status("[bold green]Searching for current tax guidance..."):
         result = researcher.research_topic(topic)
 
     rprint(Panel(result, title=f"Research: {topic}", border_style="blue"))
@@ -3400,7 +3550,7 @@ def research_topic(
 
 @research_app.command("limits")
 def research_limits(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Verify current IRS contribution limits and thresholds."""
     from tax_agent.research import TaxResearcher
@@ -3413,7 +3563,7 @@ def research_limits(
     tax_year = year or config.tax_year
     researcher = TaxResearcher(tax_year)
 
-    with console.status(f"[bold green]Verifying {tax_year} IRS limits..."):
+    with get_console().status(f"[bold green]Verifying {tax_year} IRS limits..."):
         result = researcher.research_current_limits()
 
     if "error" in result:
@@ -3436,7 +3586,7 @@ def research_limits(
                 amount_str = f"${amount:,}" if isinstance(amount, (int, float)) else str(amount)
                 table.add_row(key.replace("_", " ").title(), amount_str, source)
 
-        console.print(table)
+        get_console().print(table)
 
     changes = result.get("recent_changes", [])
     if changes:
@@ -3447,7 +3597,7 @@ def research_limits(
 
 @research_app.command("changes")
 def research_changes(
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Check for recent tax law changes affecting this tax year."""
     from tax_agent.research import TaxResearcher
@@ -3460,7 +3610,7 @@ def research_changes(
     tax_year = year or config.tax_year
     researcher = TaxResearcher(tax_year)
 
-    with console.status(f"[bold green]Checking for {tax_year} tax law changes..."):
+    with get_console().status(f"[bold green]Checking for {tax_year} tax law changes..."):
         result = researcher.check_for_law_changes()
 
     rprint(Panel(result, title=f"Tax Law Changes for {tax_year}", border_style="yellow"))
@@ -3469,12 +3619,13 @@ def research_changes(
 @research_app.command("state")
 def research_state(
     state: Annotated[str, typer.Argument(help="State code (e.g., CA, NY, TX)")],
-    year: Annotated[Optional[int], typer.Option("--year", "-y", help="Tax year")] = None,
+    year: _TaxYearOption = None,
 ) -> None:
     """Research state-specific tax rules."""
-    from tax_agent.research import TaxResearcher
     import json
 
+    from tax_agent.research import TaxResearcher
+
     config = get_config()
     if not config.is_initialized:
         rprint("[red]Tax agent not initialized. Run 'tax-agent init' first.[/red]")
@@ -3483,7 +3634,7 @@ def research_state(
     tax_year = year or config.tax_year
     researcher = TaxResearcher(tax_year)
 
-    with console.status(f"[bold green]Researching {state.upper()} tax rules..."):
+    with get_console().status(f"[bold green]Researching {state.upper()} tax rules..."):
         result = researcher.verify_state_rules(state.upper())
 
     if "error" in result:
@@ -3503,7 +3654,7 @@ def research_state(
         table.add_row("Capital Gains", result.get("capital_gains_treatment", "Unknown"))
         table.add_row("Federal Conformity", result.get("federal_conformity", "Unknown"))
 
-        console.print(table)
+        get_console().print(table)
 
         if result.get("notable_credits"):
             rprint("\n[bold]Notable Credits:[/bold]")
@@ -3633,7 +3784,7 @@ def drive_list(
     try:
         if files:
             # List files
-            with console.status(f"[bold green]Listing files in {parent_name}..."):
+            with get_console().status(f"[bold green]Listing files in {parent_name}..."):
                 items = collector.list_files(parent)
 
             if not items:
@@ -3649,11 +3800,11 @@ def drive_list(
                 file_type = "Google Doc" if item.is_google_doc else item.mime_type.split("/")[-1].upper()
                 table.add_row(item.name, file_type, item.id)
 
-            console.print(table)
+            get_console().print(table)
             rprint(f"\n[dim]Found {len(items)} supported file(s)[/dim]")
         else:
             # List folders
-            with console.status(f"[bold green]Listing folders in {parent_name}..."):
+            with get_console().status(f"[bold green]Listing folders in {parent_name}..."):
                 items = collector.list_folders(parent)
 
             if not items:
@@ -3667,7 +3818,7 @@ def drive_list(
             for item in items:
                 table.add_row(item.name, item.id)
 
-            console.print(table)
+            get_console().print(table)
             rprint(f"\n[dim]Found {len(items)} folder(s)[/dim]")
             rprint(
                 "\n[cyan]To see files in a folder:[/cyan] tax-agent drive list <folder-id> --files"
@@ -3681,9 +3832,7 @@ def drive_list(
 @drive_app.command(name="collect")
 def drive_collect(
     folder_id: Annotated[str, typer.Argument(help="Google Drive folder ID")],
-    year: Annotated[
-        Optional[int], typer.Option("--year", "-y", help="Tax year")
-    ] = None,
+    year: _TaxYearOption = None,
     recursive: Annotated[
         bool, typer.Option("--recursive", "-r", help="Include subfolders")
     ] = False,
@@ -3719,7 +3868,7 @@ def drive_collect(
     collector = DocumentCollector()
 
     try:
-        with console.status("[bold green]Downloading and processing files..."):
+        with get_console().status("[bold green]Downloading and processing files..."):
             results = collector.process_google_drive_folder(
                 folder_id, tax_year, recursive=recursive
             )
@@ -3759,7 +3908,6 @@ def update(
     """Check for and install updates."""
     from tax_agent.updater import check_for_updates, get_install_type, perform_update
 
-    console = Console()
     install_type = get_install_type()
 
     if install_type == "pip":
@@ -3769,7 +3917,7 @@ def update(
         raise typer.Exit(1)
 
     if check:
-        with console.status("[cyan]Checking for updates...[/cyan]"):
+        with get_console().status("[cyan]Checking for updates...[/cyan]"):
             result = check_for_updates()
 
         if result.error:
@@ -3788,7 +3936,7 @@ def update(
         rprint("\nRun [cyan]tax-agent update[/cyan] to install.")
         return
 
-    with console.status("[cyan]Checking for updates...[/cyan]"):
+    with get_console().status("[cyan]Checking for updates...[/cyan]"):
         result = perform_update()
 
     if result.error:
@@ -3806,5 +3954,43 @@ def update(
             rprint(f"  {line}")
 
 
-if __name__ == "__main__":
+def _sniff_subcommand(argv: list[str]) -> str | None:
+    """Return the first non-option argument, which names the invoked command."""
+    return next((arg for arg in argv if not arg.startswith("-")), None)
+
+
+def _register_only(cli: typer.Typer, name: str) -> bool:
+    """
+    Drop every command and command group except the one called name.
+
+    Typer builds a Click command for every registered command on each run,
+    introspecting their signatures, so one-shot invocations only need the
+    command they are running.
+
+    Returns:
+        True if name matched a command or group and the others were dropped
+    """
+    commands = [
+        info for info in cli.registered_commands
+        if (info.name or typer.main.get_command_name(info.callback.__name__)) == name
+    ]
+    groups = [info for info in cli.registered_groups if info.name == name]
+    if not commands and not groups:
+        return False
+
+    cli.registered_commands = commands
+    cli.registered_groups = groups
+    return True
+
+
+def run() -> None:
+    """Console script entry point: run the CLI, registering only the invoked command."""
+    name = _sniff_subcommand(sys.argv[1:])
+    if name is not None:
+        # Unknown names keep the full command set so Click can suggest matches
+        _register_only(app, name)
     app()
+
+
+if __name__ == "__main__":
+    run()
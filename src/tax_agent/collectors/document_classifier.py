@@ -2,6 +2,7 @@
 
 import asyncio
 import uuid
+from collections.abc import Iterator
 from datetime import datetime
 from pathlib import Path
 
@@ -272,7 +273,12 @@ If you find discrepancies, return corrected JSON. Otherwise confirm the data is
             id=str(uuid.uuid4()),
             tax_year=tax_year,
             document_type=doc_type,
-            issuer_name=classification.get("issuer_name", "Unknown"),
+            issuer_name=(
+                classification.get("issuer_name")
+                or extracted_data.get("employer_name")
+                or extracted_data.get("payer_name")
+                or "Unknown"
+            ),
             issuer_ein=extracted_data.get("employer_ein") or extracted_data.get("payer_ein"),
             recipient_ssn_last4=extracted_data.get("employee_ssn_last4") or extracted_data.get("recipient_ssn_last4"),
             raw_text=raw_text,
@@ -334,37 +340,50 @@ If you find discrepancies, return corrected JSON. Otherwise confirm the data is
         else:
             return {}
 
-    def process_directory(
+    def iter_process_directory(
         self,
         directory: str | Path,
         tax_year: int | None = None,
-    ) -> list[tuple[Path, TaxDocument | Exception]]:
+    ) -> Iterator[tuple[Path, TaxDocument | Exception]]:
         """
-        Process all supported files in a directory.
+        Process the supported files in a directory, yielding each result as it is ready.
 
         Args:
             directory: Path to directory
             tax_year: Tax year (defaults to config)
 
-        Returns:
-            List of (file_path, result) tuples where result is TaxDocument or Exception
+        Yields:
+            (file_path, result) tuples where result is TaxDocument or Exception
         """
         directory = Path(directory)
         if not directory.is_dir():
             raise NotADirectoryError(f"Not a directory: {directory}")
 
-        results: list[tuple[Path, TaxDocument | Exception]] = []
         supported_extensions = {".pdf", ".png", ".jpg", ".jpeg", ".tiff", ".tif"}
 
         for file_path in directory.iterdir():
             if file_path.suffix.lower() in supported_extensions:
                 try:
-                    doc = self.process_file(file_path, tax_year)
-                    results.append((file_path, doc))
+                    yield file_path, self.process_file(file_path, tax_year)
                 except Exception as e:
-                    results.append((file_path, e))
+                    yield file_path, e
 
-        return results
+    def process_directory(
+        self,
+        directory: str | Path,
+        tax_year: int | None = None,
+    ) -> list[tuple[Path, TaxDocument | Exception]]:
+        """
+        Process all supported files in a directory.
+
+        Args:
+            directory: Path to directory
+            tax_year: Tax year (defaults to config)
+
+        Returns:
+            List of (file_path, result) tuples where result is TaxDocument or Exception
+        """
+        return list(self.iter_process_directory(directory, tax_year))
 
     def process_google_drive_folder(
         self,
@@ -2,6 +2,7 @@
 
 import json
 import os
+from functools import cached_property
 from pathlib import Path
 from typing import Any
 
@@ -50,6 +51,42 @@ class Config:
         with open(self.config_file, "w") as f:
             json.dump(self._config, f, indent=2)
 
+    @cached_property
+    def _secrets(self) -> dict[str, str | None]:
+        """Keyring values read or written by this instance, by entry name."""
+        return {}
+
+    def _get_secret(self, name: str) -> str | None:
+        """
+        Read a secret from the system keyring, once per process.
+
+        Keyring backends may go through D-Bus or the macOS keychain on every
+        lookup, so values (including missing ones) are remembered. Secrets
+        written or deleted through this instance update the cache.
+
+        Args:
+            name: Keyring entry name under KEYRING_SERVICE
+
+        Returns:
+            The stored secret, or None if not set
+        """
+        if name not in self._secrets:
+            self._secrets[name] = keyring.get_password(KEYRING_SERVICE, name)
+        return self._secrets[name]
+
+    def _set_secret(self, name: str, value: str) -> None:
+        """Store a secret in the system keyring and the in-process cache."""
+        keyring.set_password(KEYRING_SERVICE, name, value)
+        self._secrets[name] = value
+
+    def _delete_secret(self, name: str) -> None:
+        """Remove a secret from the system keyring, ignoring missing entries."""
+        self._secrets[name] = None
+        try:
+            keyring.delete_password(KEYRING_SERVICE, name)
+        except keyring.errors.PasswordDeleteError:
+            pass
+
     def _default_config(self) -> dict[str, Any]:
         """Return default configuration."""
         return {
@@ -67,6 +104,11 @@ class Config:
             "use_agent_sdk": True,  # SDK is primary, set False for legacy mode
             "agent_sdk_max_turns": 10,  # Maximum agentic turns
             "agent_sdk_allow_web": True,  # Allow web search/fetch tools
+            "agent_sdk_concurrency": 8,  # Max parallel SDK requests in batch operations
+            "coalesce_subagents": False,  # Merge batched subagent prompts into one query
+            # Direct API settings
+            "api_concurrency": 8,  # Max in-flight async Claude API requests
+            "api_max_retries": 5,  # Retries on 429/5xx/connection errors (with backoff)
         }
 
     @property
@@ -80,7 +122,7 @@ class Config:
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
         # Store the database encryption key in the system keyring
-        keyring.set_password(KEYRING_SERVICE, KEYRING_DB_PASSWORD, password)
+        self._set_secret(KEYRING_DB_PASSWORD, password)
 
         self._config["initialized"] = True
         self._save()
@@ -101,11 +143,11 @@ class Config:
         if env_key:
             return env_key
         # Fall back to keyring
-        return keyring.get_password(KEYRING_SERVICE, KEYRING_API_KEY)
+        return self._get_secret(KEYRING_API_KEY)
 
     def set_api_key(self, api_key: str) -> None:
         """Store the Anthropic API key in the system keyring."""
-        keyring.set_password(KEYRING_SERVICE, KEYRING_API_KEY, api_key)
+        self._set_secret(KEYRING_API_KEY, api_key)
 
     def get_aws_credentials(self) -> tuple[str | None, str | None]:
         """Get AWS credentials from environment or system keyring."""
@@ -115,55 +157,43 @@ class Config:
         if env_access_key and env_secret_key:
             return env_access_key, env_secret_key
         # Fall back to keyring
-        access_key = keyring.get_password(KEYRING_SERVICE, KEYRING_AWS_ACCESS_KEY)
-        secret_key = keyring.get_password(KEYRING_SERVICE, KEYRING_AWS_SECRET_KEY)
-        return access_key, secret_key
+        return self._get_secret(KEYRING_AWS_ACCESS_KEY), self._get_secret(KEYRING_AWS_SECRET_KEY)
 
     def set_aws_credentials(self, access_key: str, secret_key: str) -> None:
         """Store AWS credentials in the system keyring."""
-        keyring.set_password(KEYRING_SERVICE, KEYRING_AWS_ACCESS_KEY, access_key)
-        keyring.set_password(KEYRING_SERVICE, KEYRING_AWS_SECRET_KEY, secret_key)
+        self._set_secret(KEYRING_AWS_ACCESS_KEY, access_key)
+        self._set_secret(KEYRING_AWS_SECRET_KEY, secret_key)
 
     def clear_aws_credentials(self) -> None:
         """Remove AWS credentials from the keyring."""
-        try:
-            keyring.delete_password(KEYRING_SERVICE, KEYRING_AWS_ACCESS_KEY)
-            keyring.delete_password(KEYRING_SERVICE, KEYRING_AWS_SECRET_KEY)
-        except keyring.errors.PasswordDeleteError:
-            pass
+        self._delete_secret(KEYRING_AWS_ACCESS_KEY)
+        self._delete_secret(KEYRING_AWS_SECRET_KEY)
 
     def get_google_credentials(self) -> dict | None:
         """Get Google OAuth credentials from the system keyring."""
-        creds_json = keyring.get_password(KEYRING_SERVICE, KEYRING_GOOGLE_CREDENTIALS)
+        creds_json = self._get_secret(KEYRING_GOOGLE_CREDENTIALS)
         if creds_json:
             return json.loads(creds_json)
         return None
 
     def set_google_credentials(self, credentials: dict) -> None:
         """Store Google OAuth credentials in the system keyring."""
-        keyring.set_password(
-            KEYRING_SERVICE, KEYRING_GOOGLE_CREDENTIALS, json.dumps(credentials)
-        )
+        self._set_secret(KEYRING_GOOGLE_CREDENTIALS, json.dumps(credentials))
 
     def get_google_client_config(self) -> dict | None:
         """Get Google OAuth client configuration from the system keyring."""
-        config_json = keyring.get_password(KEYRING_SERVICE, KEYRING_GOOGLE_CLIENT_CONFIG)
+        config_json = self._get_secret(KEYRING_GOOGLE_CLIENT_CONFIG)
         if config_json:
             return json.loads(config_json)
         return None
 
     def set_google_client_config(self, client_config: dict) -> None:
         """Store Google OAuth client configuration in the system keyring."""
-        keyring.set_password(
-            KEYRING_SERVICE, KEYRING_GOOGLE_CLIENT_CONFIG, json.dumps(client_config)
-        )
+        self._set_secret(KEYRING_GOOGLE_CLIENT_CONFIG, json.dumps(client_config))
 
     def clear_google_credentials(self) -> None:
         """Remove Google credentials from the keyring."""
-        try:
-            keyring.delete_password(KEYRING_SERVICE, KEYRING_GOOGLE_CREDENTIALS)
-        except keyring.errors.PasswordDeleteError:
-            pass
+        self._delete_secret(KEYRING_GOOGLE_CREDENTIALS)
 
     def has_google_drive_configured(self) -> bool:
         """Check if Google Drive integration is configured."""
@@ -174,18 +204,15 @@ class Config:
         env_key = os.environ.get("BRAVE_API_KEY")
         if env_key:
             return env_key
-        return keyring.get_password(KEYRING_SERVICE, KEYRING_BRAVE_API_KEY)
+        return self._get_secret(KEYRING_BRAVE_API_KEY)
 
     def set_brave_api_key(self, api_key: str) -> None:
         """Store the Brave Search API key in the system keyring."""
-        keyring.set_password(KEYRING_SERVICE, KEYRING_BRAVE_API_KEY, api_key)
+        self._set_secret(KEYRING_BRAVE_API_KEY, api_key)
 
     def clear_brave_api_key(self) -> None:
         """Remove the Brave Search API key from the keyring."""
-        try:
-            keyring.delete_password(KEYRING_SERVICE, KEYRING_BRAVE_API_KEY)
-        except keyring.errors.PasswordDeleteError:
-            pass
+        self._delete_secret(KEYRING_BRAVE_API_KEY)
 
     @property
     def brave_search_enabled(self) -> bool:
@@ -216,7 +243,7 @@ class Config:
 
     def get_db_password(self) -> str | None:
         """Get the database encryption password from the system keyring."""
-        return keyring.get_password(KEYRING_SERVICE, KEYRING_DB_PASSWORD)
+        return self._get_secret(KEYRING_DB_PASSWORD)
 
     @property
     def db_path(self) -> Path:
@@ -273,6 +300,46 @@ class Config:
         """Enable or disable web tools for Agent SDK."""
         self.set("agent_sdk_allow_web", allowed)
 
+    @property
+    def agent_sdk_concurrency(self) -> int:
+        """Get the maximum number of concurrent SDK requests for batch operations."""
+        return self._config.get("agent_sdk_concurrency", 8)
+
+    @agent_sdk_concurrency.setter
+    def agent_sdk_concurrency(self, limit: int) -> None:
+        """Set the maximum number of concurrent SDK requests."""
+        self.set("agent_sdk_concurrency", max(1, min(limit, 32)))
+
+    @property
+    def coalesce_subagents(self) -> bool:
+        """Check if batched subagent prompts are merged into shared queries."""
+        return self._config.get("coalesce_subagents", False)
+
+    @coalesce_subagents.setter
+    def coalesce_subagents(self, enabled: bool) -> None:
+        """Enable or disable subagent prompt coalescing."""
+        self.set("coalesce_subagents", enabled)
+
+    @property
+    def api_concurrency(self) -> int:
+        """Get the maximum number of in-flight async Claude API requests."""
+        return self._config.get("api_concurrency", 8)
+
+    @api_concurrency.setter
+    def api_concurrency(self, limit: int) -> None:
+        """Set the maximum number of in-flight async Claude API requests."""
+        self.set("api_concurrency", max(1, min(limit, 32)))
+
+    @property
+    def api_max_retries(self) -> int:
+        """Get how many times rate-limited or failed API requests are retried."""
+        return self._config.get("api_max_retries", 5)
+
+    @api_max_retries.setter
+    def api_max_retries(self, retries: int) -> None:
+        """Set how many times rate-limited or failed API requests are retried."""
+        self.set("api_max_retries", max(0, min(retries, 10)))
+
     def to_dict(self) -> dict[str, Any]:
         """Return configuration as a dictionary (excluding secrets)."""
         return {k: v for k, v in self._config.items()}
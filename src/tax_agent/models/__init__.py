@@ -3,6 +3,7 @@
 from tax_agent.models.documents import DocumentType, TaxDocument
 from tax_agent.models.memory import Memory, MemoryCategory, MemoryType
 from tax_agent.models.mode import AgentMode, ModeState, MODE_INFO
+from tax_agent.models.optimization import DeductionsResult, InterviewQuestions, StockCompAnalysis
 from tax_agent.models.taxpayer import FilingStatus, TaxpayerProfile
 
 __all__ = [
@@ -16,4 +17,7 @@ __all__ = [
     "AgentMode",
     "ModeState",
     "MODE_INFO",
+    "DeductionsResult",
+    "InterviewQuestions",
+    "StockCompAnalysis",
 ]
@@ -14,6 +14,11 @@ class AgentMode(str, Enum):
     PLANNING = "planning"  # Long-term tax planning
 
 
+# Saved conversation history is capped so that long-running modes don't grow
+# the stored session state (rewritten on every save) without bound.
+MAX_MODE_HISTORY_MESSAGES = 200
+
+
 class ModeState(BaseModel):
     """Persistent state for a specific mode."""
 
@@ -42,12 +47,14 @@ class ModeState(BaseModel):
         self.updated_at = datetime.now()
 
     def add_message(self, role: str, content: str) -> None:
-        """Add a message to conversation history."""
+        """Add a message to conversation history, dropping the oldest past the cap."""
         self.conversation_history.append({
             "role": role,
             "content": content,
             "timestamp": datetime.now().isoformat(),
         })
+        if len(self.conversation_history) > MAX_MODE_HISTORY_MESSAGES:
+            del self.conversation_history[:-MAX_MODE_HISTORY_MESSAGES]
         self.updated_at = datetime.now()
 
     def get_recent_history(self, limit: int = 10) -> list[dict]:
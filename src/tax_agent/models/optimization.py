@@ -0,0 +1,97 @@
+"""Structured output models for tax optimization responses.
+
+These schemas are sent to Claude as tool input schemas, so the model's
+answers arrive as parsed JSON objects. The API does not enforce them, so
+the optimizer validates each answer against its model before use.
+"""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class InterviewQuestion(BaseModel):
+    """A single tax interview question."""
+
+    id: str = Field(description="Unique snake_case identifier")
+    question: str = Field(description="The question text")
+    type: Literal["yes_no", "number", "text", "select", "multi_select"]
+    options: list[str] = Field(
+        default_factory=list, description="Choices for select/multi_select questions"
+    )
+    relevance: str = Field(description="Why this question matters for taxes")
+
+
+class InterviewQuestions(BaseModel):
+    """Interview questions, most impactful first."""
+
+    questions: list[InterviewQuestion]
+
+
+class StockCompAnalysis(BaseModel):
+    """Tax analysis of one stock compensation type."""
+
+    compensation_type: str = Field(description="Compensation type exactly as given in the request")
+    tax_treatment: str = Field(description="How this compensation is taxed")
+    immediate_actions: list[str] = Field(description="Things to do now")
+    estimated_tax_impact: str = Field(description="Rough estimate of the tax impact, if possible")
+    optimization_tips: list[str] = Field(description="Specific strategies")
+    warnings: list[str] = Field(description="Things to watch out for")
+    questions_needed: list[str] = Field(
+        default_factory=list, description="Additional info needed for better analysis"
+    )
+
+
+class StockCompAnalyses(BaseModel):
+    """One analysis per requested stock compensation type."""
+
+    analyses: list[StockCompAnalysis]
+
+
+class RecommendedDeduction(BaseModel):
+    """A deduction the taxpayer should claim."""
+
+    name: str
+    estimated_value: float = Field(description="Estimated tax savings in dollars")
+    action_needed: str
+    documentation: str = Field(description="Records needed to support the deduction")
+
+
+class RecommendedCredit(BaseModel):
+    """A credit the taxpayer should claim."""
+
+    name: str
+    estimated_value: float = Field(description="Estimated tax savings in dollars")
+    eligibility: str = Field(description="Why the taxpayer likely qualifies")
+    action_needed: str
+
+
+class StandardVsItemized(BaseModel):
+    """Comparison of the standard deduction with itemizing."""
+
+    recommendation: Literal["standard", "itemized"]
+    standard_amount: float
+    itemized_amount: float
+    reasoning: str
+
+
+class DeductionsResult(BaseModel):
+    """Deductions, credits and planning advice for a taxpayer."""
+
+    recommended_deductions: list[RecommendedDeduction]
+    recommended_credits: list[RecommendedCredit]
+    standard_vs_itemized: StandardVsItemized
+    estimated_total_savings: float = Field(description="Sum of all tax savings in dollars")
+    action_items: list[str]
+    planning_tips: list[str] = Field(default_factory=list)
+    warnings: list[str] = Field(default_factory=list)
+    missed_opportunities: list[str] = Field(
+        default_factory=list, description="Prior-year items that could be amended"
+    )
+
+
+class CreditsResult(BaseModel):
+    """Credits implied by interview answers alone, before any documents."""
+
+    recommended_credits: list[RecommendedCredit]
+    action_items: list[str] = Field(default_factory=list)
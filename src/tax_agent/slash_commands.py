@@ -953,9 +953,14 @@ def cmd_config(args: list[str], context: dict) -> str:
 
         # Type conversion for known keys
         try:
-            if key in ("tax_year", "agent_sdk_max_turns"):
+            if key in (
+                "tax_year", "agent_sdk_max_turns", "agent_sdk_concurrency",
+                "api_concurrency", "api_max_retries",
+            ):
                 value = int(value)
-            elif key in ("use_agent_sdk", "agent_sdk_allow_web", "auto_redact_ssn"):
+            elif key in (
+                "use_agent_sdk", "agent_sdk_allow_web", "auto_redact_ssn", "coalesce_subagents"
+            ):
                 value = value.lower() in ("true", "1", "yes")
 
             config.set(key, value)
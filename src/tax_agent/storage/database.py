@@ -2,10 +2,11 @@
 
 import json
 import sqlite3
+from collections.abc import Generator, Iterator
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Generator
+from typing import Any
 
 from tax_agent.config import get_config
 from tax_agent.models.documents import DocumentType, TaxDocument
@@ -199,13 +200,45 @@ class TaxDatabase:
 
             return self._row_to_document(row)
 
-    def get_documents(
+    def get_documents_by_id_prefix(
+        self, prefix: str, limit: int | None = None
+    ) -> list[TaxDocument]:
+        """
+        Get documents whose ID starts with prefix (for partial IDs typed by the user).
+
+        Args:
+            prefix: Leading characters of the document ID
+            limit: Maximum number of documents to return
+
+        Returns:
+            Matching documents, in ID order
+        """
+        query = "SELECT * FROM documents WHERE id LIKE ? ORDER BY id"
+        params: list[Any] = [f"{prefix}%"]
+
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+            return [self._row_to_document(row) for row in rows]
+
+    def iter_documents(
         self,
         tax_year: int | None = None,
         document_type: DocumentType | None = None,
         tags: list[str] | None = None,
-    ) -> list[TaxDocument]:
-        """Get documents with optional filtering."""
+        batch_size: int = 200,
+    ) -> Iterator[TaxDocument]:
+        """
+        Yield documents with optional filtering, fetching rows in batches.
+
+        Documents are decoded as they are consumed, so callers that display
+        or count them never hold the whole result set in memory. The
+        database connection stays open until the iterator is exhausted or
+        closed.
+        """
         query = "SELECT * FROM documents WHERE 1=1"
         params: list[Any] = []
 
@@ -219,16 +252,102 @@ class TaxDatabase:
 
         query += " ORDER BY created_at DESC"
 
+        # Filter by tags in Python (SQLite JSON support is limited)
+        tags_lower = [t.lower() for t in tags] if tags else None
+
         with self._connection() as conn:
-            rows = conn.execute(query, params).fetchall()
-            docs = [self._row_to_document(row) for row in rows]
+            cursor = conn.execute(query, params)
+            while rows := cursor.fetchmany(batch_size):
+                for row in rows:
+                    doc = self._row_to_document(row)
+                    if tags_lower is None or any(t in doc.tags for t in tags_lower):
+                        yield doc
 
-            # Filter by tags in Python (SQLite JSON support is limited)
-            if tags:
-                tags_lower = [t.lower() for t in tags]
-                docs = [d for d in docs if any(t in d.tags for t in tags_lower)]
+    def get_documents(
+        self,
+        tax_year: int | None = None,
+        document_type: DocumentType | None = None,
+        tags: list[str] | None = None,
+    ) -> list[TaxDocument]:
+        """Get documents with optional filtering."""
+        return list(self.iter_documents(tax_year, document_type, tags))
+
+    def get_document_fingerprint(self, tax_year: int | None = None) -> tuple[int, str | None]:
+        """
+        Get a cheap fingerprint of the stored documents.
+
+        The (count, latest updated_at) pair changes whenever documents are
+        added, deleted or edited, so callers can cache get_documents()
+        results without loading every row to check.
+        """
+        query = "SELECT COUNT(*), MAX(updated_at) FROM documents"
+        params: list[Any] = []
+
+        if tax_year is not None:
+            query += " WHERE tax_year = ?"
+            params.append(tax_year)
 
-            return docs
+        with self._connection() as conn:
+            count, latest = conn.execute(query, params).fetchone()
+            return count, latest
+
+    def get_document_summaries(self, tax_year: int | None = None) -> list[tuple]:
+        """
+        Get the fields used to summarize documents, without loading full rows.
+
+        Returns:
+            (document_type, issuer_name, box_1, box_1a, total_proceeds)
+            tuples, newest first. Missing amounts are None.
+        """
+        query = """
+            SELECT document_type, issuer_name,
+                   json_extract(extracted_data, '$.box_1'),
+                   json_extract(extracted_data, '$.box_1a'),
+                   json_extract(extracted_data, '$.total_proceeds')
+            FROM documents
+        """
+        params: list[Any] = []
+
+        if tax_year is not None:
+            query += " WHERE tax_year = ?"
+            params.append(tax_year)
+
+        query += " ORDER BY created_at DESC"
+
+        with self._connection() as conn:
+            return [tuple(row) for row in conn.execute(query, params).fetchall()]
+
+    def get_any_document_path(self, tax_year: int | None = None) -> str | None:
+        """
+        Get the source file path of the most recently added document that has one.
+
+        Returns:
+            A file path, or None if no document has a source file
+        """
+        query = "SELECT file_path FROM documents WHERE file_path IS NOT NULL"
+        params: list[Any] = []
+
+        if tax_year is not None:
+            query += " AND tax_year = ?"
+            params.append(tax_year)
+
+        query += " ORDER BY created_at DESC LIMIT 1"
+
+        with self._connection() as conn:
+            row = conn.execute(query, params).fetchone()
+            return row[0] if row else None
+
+    def get_document_types(self, tax_year: int | None = None) -> set[str]:
+        """Get the distinct document types stored (queries only the type column)."""
+        query = "SELECT DISTINCT document_type FROM documents"
+        params: list[Any] = []
+
+        if tax_year is not None:
+            query += " WHERE tax_year = ?"
+            params.append(tax_year)
+
+        with self._connection() as conn:
+            return {row[0] for row in conn.execute(query, params).fetchall()}
 
     def delete_document(self, doc_id: str) -> bool:
         """Delete a document by ID."""
@@ -253,13 +372,10 @@ class TaxDatabase:
         doc = self.get_document(doc_id)
         if doc is None:
             # Try partial ID match
-            with self._connection() as conn:
-                row = conn.execute(
-                    "SELECT * FROM documents WHERE id LIKE ?", (f"{doc_id}%",)
-                ).fetchone()
-                if row is None:
-                    return False
-                doc = self._row_to_document(row)
+            matches = self.get_documents_by_id_prefix(doc_id, limit=1)
+            if not matches:
+                return False
+            doc = matches[0]
 
         # Add new tags (lowercase, no duplicates)
         existing_tags = set(doc.tags)
@@ -276,13 +392,10 @@ class TaxDatabase:
         doc = self.get_document(doc_id)
         if doc is None:
             # Try partial ID match
-            with self._connection() as conn:
-                row = conn.execute(
-                    "SELECT * FROM documents WHERE id LIKE ?", (f"{doc_id}%",)
-                ).fetchone()
-                if row is None:
-                    return False
-                doc = self._row_to_document(row)
+            matches = self.get_documents_by_id_prefix(doc_id, limit=1)
+            if not matches:
+                return False
+            doc = matches[0]
 
         # Remove specified tags (case-insensitive)
         tags_to_remove = {t.lower() for t in tags}
@@ -8,7 +8,10 @@ Each subagent has:
 - Configured behaviors for its specialty
 """
 
+from collections.abc import Mapping
 from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Any
 
 
@@ -454,17 +457,21 @@ def get_subagent(name: str) -> SubagentDefinition | None:
     return TAX_SUBAGENTS.get(name)
 
 
-def list_subagents() -> list[dict[str, str]]:
+@lru_cache(maxsize=1)
+def list_subagents() -> tuple[Mapping[str, str], ...]:
     """
     List all available subagents with descriptions.
 
+    The result is built once and shared, so the records are read-only.
+    Call ``list_subagents.cache_clear()`` after modifying TAX_SUBAGENTS.
+
     Returns:
-        List of dictionaries with name and description
+        Tuple of read-only mappings with name and description
     """
-    return [
-        {"name": agent.name, "description": agent.description}
+    return tuple(
+        MappingProxyType({"name": agent.name, "description": agent.description})
         for agent in TAX_SUBAGENTS.values()
-    ]
+    )
 
 
 def get_subagent_for_task(task_description: str) -> SubagentDefinition | None:
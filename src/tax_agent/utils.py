@@ -1,7 +1,23 @@
 """Utility functions for the tax agent."""
 
+import asyncio
+import queue
+import threading
+from collections.abc import Coroutine, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Any
+from typing import Any, TypeVar
+
+try:
+    import uvloop
+
+    _LOOP_FACTORY = uvloop.new_event_loop
+except ImportError:  # uvloop is optional and unavailable on Windows
+    _LOOP_FACTORY = None
+
+T = TypeVar("T")
+
+_DONE = object()
 
 
 def get_enum_value(value: Any) -> str:
@@ -20,3 +36,70 @@ def get_enum_value(value: Any) -> str:
     if isinstance(value, Enum):
         return value.value
     return str(value) if value is not None else ""
+
+
+def prefetch(items: Iterable[T]) -> Iterator[T]:
+    """
+    Consume an iterable on a background thread and yield its items as they arrive.
+
+    Use this when the caller blocks between items (for example on user input)
+    so a streaming producer, such as an HTTP response, runs to completion
+    instead of being held open while the caller waits.
+
+    Args:
+        items: Iterable to consume
+
+    Yields:
+        Items of the iterable, in order
+
+    Raises:
+        Exception: Whatever the iterable raised, once its earlier items are yielded
+    """
+    buffer: queue.Queue = queue.Queue()
+
+    def drain() -> None:
+        try:
+            for item in items:
+                buffer.put((item, None))
+        except Exception as e:
+            buffer.put((_DONE, e))
+        else:
+            buffer.put((_DONE, None))
+
+    threading.Thread(target=drain, daemon=True).start()
+    while True:
+        item, error = buffer.get()
+        if item is _DONE:
+            if error is not None:
+                raise error
+            return
+        yield item
+
+
+def _run_in_new_loop(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on a fresh event loop (uvloop if installed)."""
+    with asyncio.Runner(loop_factory=_LOOP_FACTORY) as runner:
+        return runner.run(coro)
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run an async coroutine from sync code, handling existing event loops.
+
+    If an event loop is already running (e.g. Jupyter, FastAPI), the
+    coroutine runs on a new loop in a worker thread. Otherwise it runs on a
+    new loop in the calling thread.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _run_in_new_loop(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_run_in_new_loop, coro).result()
@@ -0,0 +1,426 @@
+"""Tests for agent_sdk.py (SDK calls mocked)."""
+
+import asyncio
+import json
+import threading
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+from tax_agent import agent_sdk
+from tax_agent.agent_sdk import TaxAgentSDK, _dumps, _match_signature, get_sdk_agent
+
+
+@pytest.fixture
+def sdk_agent(mock_registry):
+    """Create a TaxAgentSDK backed by a mocked config."""
+    config = MagicMock()
+    config.get.return_value = "claude-sonnet-4-5"
+    config.agent_sdk_max_turns = 10
+    config.agent_sdk_allow_web = True
+    config.agent_sdk_concurrency = 2
+    config.coalesce_subagents = False
+    mock_registry.override("config", config)
+    return TaxAgentSDK(use_hooks=False)
+
+
+class TestClassifyDocuments:
+    """Tests for concurrent batch classification."""
+
+    @pytest.mark.asyncio
+    async def test_preserves_order(self, sdk_agent):
+        async def fake_classify(text, file_path=None):
+            await asyncio.sleep(0.01 if text == "a" else 0)
+            return {"document_type": text.upper()}
+
+        sdk_agent.classify_document_async = fake_classify
+        results = await sdk_agent.classify_documents_async([("a", None), ("b", None)])
+        assert [r["document_type"] for r in results] == ["A", "B"]
+
+    @pytest.mark.asyncio
+    async def test_respects_concurrency_limit(self, sdk_agent):
+        in_flight = 0
+        peak = 0
+
+        async def fake_classify(text, file_path=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"document_type": "W2"}
+
+        sdk_agent.classify_document_async = fake_classify
+        await sdk_agent.classify_documents_async([("x", None)] * 6)
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_failure_becomes_unknown(self, sdk_agent):
+        async def fake_classify(text, file_path=None):
+            if text == "bad":
+                raise RuntimeError("boom")
+            return {"document_type": "W2"}
+
+        sdk_agent.classify_document_async = fake_classify
+        results = await sdk_agent.classify_documents_async([("ok", None), ("bad", None)])
+        assert results[0]["document_type"] == "W2"
+        assert results[1]["document_type"] == "UNKNOWN"
+        assert "boom" in results[1]["reasoning"]
+
+
+class TestParseJsonResponse:
+    """Tests for _parse_json_response()."""
+
+    def test_plain_json(self, sdk_agent):
+        assert sdk_agent._parse_json_response('{"document_type": "W2"}') == {
+            "document_type": "W2"
+        }
+
+    def test_fenced_json(self, sdk_agent):
+        text = '```json\n{"document_type": "1099_INT", "nested": {"a": 1}}\n```'
+        assert sdk_agent._parse_json_response(text) == {
+            "document_type": "1099_INT",
+            "nested": {"a": 1},
+        }
+
+    def test_json_with_surrounding_prose(self, sdk_agent):
+        text = 'Here is the result:\n{"document_type": "1098"}\nLet me know.'
+        assert sdk_agent._parse_json_response(text) == {"document_type": "1098"}
+
+    def test_invalid_json_returns_empty(self, sdk_agent):
+        assert sdk_agent._parse_json_response("no json here") == {}
+        assert sdk_agent._parse_json_response("{not: valid}") == {}
+
+    def test_braces_in_prose_skipped(self, sdk_agent):
+        text = 'Box {12} looked odd.\n{"document_type": "W2"}\nThen {see notes}.'
+        assert sdk_agent._parse_json_response(text) == {"document_type": "W2"}
+
+    def test_first_of_several_objects(self, sdk_agent):
+        text = '{"document_type": "W2"} and also {"document_type": "1098"}'
+        assert sdk_agent._parse_json_response(text) == {"document_type": "W2"}
+
+    def test_never_returns_array(self, sdk_agent):
+        assert sdk_agent._parse_json_response('[{"document_type": "W2"}]') == {
+            "document_type": "W2"
+        }
+        assert sdk_agent._parse_json_response("[1, 2, 3]") == {}
+
+
+class TestJsonHelpers:
+    """Tests for the orjson/stdlib JSON helpers."""
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_dumps_handles_non_str_keys_and_defaults(self, monkeypatch, use_orjson):
+        if not use_orjson:
+            monkeypatch.setattr(agent_sdk, "orjson", None)
+        elif agent_sdk.orjson is None:
+            pytest.skip("orjson not installed")
+        encoded = _dumps({2024: {"filed": date(2025, 4, 15)}})
+        assert json.loads(encoded) == {"2024": {"filed": "2025-04-15"}}
+        assert "\n" not in encoded and ", " not in encoded
+
+
+class TestIterText:
+    """Tests for _iter_text() message text extraction."""
+
+    def test_extracts_text_blocks_only(self):
+        from claude_code_sdk.types import AssistantMessage, TextBlock, ToolUseBlock
+
+        message = AssistantMessage(
+            content=[
+                TextBlock(text="Hello "),
+                ToolUseBlock(id="t1", name="Read", input={}),
+                TextBlock(text="world"),
+            ],
+            model="claude-sonnet-4-5",
+        )
+        assert list(agent_sdk._iter_text(message)) == ["Hello ", "world"]
+
+    def test_message_without_content_yields_nothing(self):
+        from claude_code_sdk.types import SystemMessage
+
+        assert list(agent_sdk._iter_text(SystemMessage(subtype="init", data={}))) == []
+
+    def test_string_content_yields_nothing(self):
+        from claude_code_sdk.types import UserMessage
+
+        assert list(agent_sdk._iter_text(UserMessage(content="tool output"))) == []
+
+
+class TestStream:
+    """Tests for the shared _stream() query plumbing."""
+
+    @pytest.mark.asyncio
+    async def test_builds_options_and_yields_text(self, sdk_agent, monkeypatch, temp_dir):
+        from claude_code_sdk.types import AssistantMessage, TextBlock
+
+        captured = {}
+
+        async def fake_query(prompt, options):
+            captured["prompt"] = prompt
+            captured["options"] = options
+            yield AssistantMessage(content=[TextBlock(text="ok")], model="m")
+
+        monkeypatch.setattr(agent_sdk, "_sdk_query", fake_query)
+        chunks = [
+            chunk
+            async for chunk in sdk_agent._stream(
+                "hello",
+                system_prompt="sys",
+                allowed_tools=["Read"],
+                max_turns=3,
+                cwd=temp_dir,
+            )
+        ]
+        assert chunks == ["ok"]
+        assert captured["prompt"] == "hello"
+        assert captured["options"].system_prompt == "sys"
+        assert captured["options"].model == sdk_agent.model
+        assert captured["options"].cwd == str(temp_dir)
+
+
+class TestSyncWrappers:
+    """Tests for the synchronous collect-and-join wrappers."""
+
+    def test_review_return_joins_stream(self, sdk_agent):
+        async def fake_review(return_text, source_documents, source_dir=None):
+            for chunk in ("Line 1", " and ", "Line 2"):
+                yield chunk
+
+        sdk_agent.review_return_async = fake_review
+        assert sdk_agent.review_return("1040", "W-2") == "Line 1 and Line 2"
+
+
+class TestAllowedTools:
+    """Tests for _get_allowed_tools()."""
+
+    def test_explicit_web_flag(self, sdk_agent):
+        assert sdk_agent._get_allowed_tools(include_web=False) == ["Read", "Grep", "Glob"]
+        assert "WebSearch" in sdk_agent._get_allowed_tools(include_web=True)
+
+    def test_defaults_to_config_captured_at_init(self, sdk_agent):
+        sdk_agent.config.agent_sdk_allow_web = False
+        assert "WebFetch" in sdk_agent._get_allowed_tools()
+
+    def test_returns_fresh_list(self, sdk_agent):
+        tools = sdk_agent._get_allowed_tools(include_web=False)
+        tools.append("Bash")
+        assert "Bash" not in sdk_agent._get_allowed_tools(include_web=False)
+
+
+class TestGetSdkAgent:
+    """Tests for the global SDK agent accessor."""
+
+    def test_single_instance_under_contention(self, sdk_agent):
+        results = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            results.append(id(get_sdk_agent()))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(set(results)) == 1
+
+
+class TestResourceManagement:
+    """Tests for close() and the context-manager protocol."""
+
+    def test_sync_context_manager_drops_hooks(self, sdk_agent):
+        sdk_agent._hooks = {"PreToolUse": []}
+        with sdk_agent as agent:
+            assert agent is sdk_agent
+        assert sdk_agent._hooks is None
+
+    @pytest.mark.asyncio
+    async def test_async_context_manager_drops_hooks(self, sdk_agent):
+        sdk_agent._hooks = {"PreToolUse": []}
+        async with sdk_agent as agent:
+            assert agent is sdk_agent
+        assert sdk_agent._hooks is None
+
+
+class TestSubagentListing:
+    """Tests for the cached subagent listing."""
+
+    def test_listing_is_cached_and_read_only(self, sdk_agent):
+        first = sdk_agent.list_subagents()
+        assert first is sdk_agent.list_subagents()
+        assert any(agent["name"] == "deduction-finder" for agent in first)
+        with pytest.raises(TypeError):
+            first[0]["name"] = "changed"
+
+
+class TestClassifyDocument:
+    """Tests for single-document SDK classification."""
+
+    @pytest.mark.asyncio
+    async def test_parses_final_chunk_only(self, sdk_agent, monkeypatch):
+        parsed = []
+        original = sdk_agent._parse_json_response
+
+        def spy(text):
+            parsed.append(text)
+            return original(text)
+
+        async def fake_stream(prompt, **kwargs):
+            yield "Let me check the form."
+            yield '{"document_type": "W2", "confidence": 0.9}'
+
+        monkeypatch.setattr(sdk_agent, "_parse_json_response", spy)
+        monkeypatch.setattr(sdk_agent, "_stream", fake_stream)
+        result = await sdk_agent.classify_document_async("Form W-2 text", force_llm=True)
+        assert result["document_type"] == "W2"
+        assert parsed == ['{"document_type": "W2", "confidence": 0.9}']
+
+
+class TestSignatureMatch:
+    """Tests for deterministic form-title classification."""
+
+    def test_w2(self, sample_w2_text):
+        result = _match_signature(sample_w2_text)
+        assert result["document_type"] == "W2"
+        assert result["document_category"] == "SOURCE"
+        assert result["tax_year"] == 2024
+
+    def test_1099_int(self, sample_1099_int_text):
+        result = _match_signature(sample_1099_int_text)
+        assert result["document_type"] == "1099_INT"
+        assert result["tax_year"] == 2024
+
+    def test_prior_year_form(self):
+        result = _match_signature("Form W-2 Wage and Tax Statement 2022\nBox 1: $50,000.00")
+        assert result["document_type"] == "W2"
+        assert result["tax_year"] == 2022
+
+    def test_missing_year_returns_none(self):
+        assert _match_signature("Form W-2 Wage and Tax Statement") is None
+
+    def test_conflicting_years_returns_none(self):
+        assert _match_signature("Form W-2 Wage and Tax Statement 2023 (corrected 2024)") is None
+
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ("Form W-2G Certain Gambling Winnings 2024", "W2_G"),
+            ("Form 1098-T Tuition Statement 2024", "1098_T"),
+            ("Form 1098 Mortgage Interest Statement 2024", "1098"),
+            ("Schedule K-1 (Form 1065) 2024 Partner's Share of Income", "K1"),
+            ("Form 1040 U.S. Individual Income Tax Return 2024", "1040"),
+            ("SCHEDULE C (Form 1040) 2024 Profit or Loss From Business", "SCHEDULE_C"),
+        ],
+    )
+    def test_form_titles(self, text, expected):
+        assert _match_signature(text)["document_type"] == expected
+
+    def test_return_category(self):
+        result = _match_signature("Form 1040-X Amended U.S. Individual Income Tax Return 2023")
+        assert result["document_category"] == "RETURN"
+
+    def test_ambiguous_returns_none(self):
+        assert _match_signature("Form W-2 and Form 1099-INT summary") is None
+
+    def test_no_signature_returns_none(self):
+        assert _match_signature("Monthly brokerage statement") is None
+
+    @pytest.mark.asyncio
+    async def test_classify_skips_model_on_match(self, sdk_agent, monkeypatch, sample_w2_text):
+        async def fail_stream(prompt, **kwargs):
+            raise AssertionError("model should not be called")
+            yield  # pragma: no cover
+
+        monkeypatch.setattr(sdk_agent, "_stream", fail_stream)
+        result = await sdk_agent.classify_document_async(sample_w2_text)
+        assert result["document_type"] == "W2"
+
+
+class TestOptionsCache:
+    """Tests for SDK option reuse."""
+
+    def test_identical_calls_share_options(self, sdk_agent):
+        first = sdk_agent._get_options("sys", ("Read",), 3, "m", None)
+        assert sdk_agent._get_options("sys", ("Read",), 3, "m", None) is first
+        assert sdk_agent._get_options("sys", ("Read",), 4, "m", None) is not first
+
+    def test_close_clears_options(self, sdk_agent):
+        first = sdk_agent._get_options("sys", ("Read",), 3, "m", None)
+        sdk_agent.close()
+        assert sdk_agent._get_options("sys", ("Read",), 3, "m", None) is not first
+
+
+class TestSubagentCoalescer:
+    """Tests for coalescing subagent prompts into one query."""
+
+    @pytest.mark.asyncio
+    async def test_merges_prompts_and_splits_answers(self, sdk_agent):
+        calls = []
+
+        async def fake_invoke(name, prompt, source_dir=None):
+            calls.append(prompt)
+            yield '<task id="1">first answer</task>\n<task id="2">second answer</task>'
+
+        sdk_agent.invoke_subagent_async = fake_invoke
+        sdk_agent.config.coalesce_subagents = True
+        results = await sdk_agent.invoke_subagent_batch_async(
+            "deduction-finder", ["find A", "find B"]
+        )
+        assert results == ["first answer", "second answer"]
+        assert len(calls) == 1
+        assert "[1] find A" in calls[0] and "[2] find B" in calls[0]
+
+    @pytest.mark.asyncio
+    async def test_untagged_tasks_are_retried_individually(self, sdk_agent):
+        async def fake_invoke(name, prompt, source_dir=None):
+            if "[1]" in prompt:
+                yield '<task id="1">batched</task>'
+            else:
+                yield f"solo: {prompt}"
+
+        sdk_agent.invoke_subagent_async = fake_invoke
+        coalescer = agent_sdk.SubagentCoalescer(sdk_agent, "deduction-finder", window_ms=1)
+        results = await asyncio.gather(coalescer.submit("a"), coalescer.submit("b"))
+        assert results == ["batched", "solo: b"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_submitter_does_not_fail_batch(self, sdk_agent):
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = []
+
+        async def fake_invoke(name, prompt, source_dir=None):
+            calls.append(prompt)
+            started.set()
+            await release.wait()
+            yield '<task id="2">second</task>\n<task id="3">third</task>'
+
+        sdk_agent.invoke_subagent_async = fake_invoke
+        coalescer = agent_sdk.SubagentCoalescer(sdk_agent, "deduction-finder", window_ms=1)
+        first = asyncio.ensure_future(coalescer.submit("a"))
+        others = asyncio.gather(coalescer.submit("b"), coalescer.submit("c"))
+
+        await started.wait()
+        first.cancel()
+        release.set()
+
+        assert await others == ["second", "third"]
+        assert first.cancelled()
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_runs_prompts_independently(self, sdk_agent):
+        calls = []
+
+        async def fake_invoke(name, prompt, source_dir=None):
+            calls.append(prompt)
+            yield prompt.upper()
+
+        sdk_agent.invoke_subagent_async = fake_invoke
+        results = await sdk_agent.invoke_subagent_batch_async("deduction-finder", ["a", "b"])
+        assert results == ["A", "B"]
+        assert calls == ["a", "b"]
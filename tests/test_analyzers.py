@@ -52,6 +52,43 @@ class TestTaxCalculations:
         tax = analyzer._calculate_tax_from_brackets(100000, brackets)
         assert abs(tax - 12106) < 1
 
+    def test_compiled_brackets_match_dict_brackets(self, mock_database):
+        """Compiled bracket arrays give the same tax as the dict form."""
+        from tax_agent.analyzers.implications import (
+            BracketArrays,
+            TaxAnalyzer,
+            _compile_brackets,
+            bracket_tax,
+        )
+
+        analyzer = TaxAnalyzer(2024)
+        brackets = analyzer.rules["brackets"]["single"]
+        compiled = _compile_brackets(brackets)
+
+        assert isinstance(compiled, BracketArrays)
+        assert compiled.width[-1] == float("inf")
+        for income in (0, 11600, 50000, 250000, 1_000_000):
+            assert bracket_tax(income, compiled) == pytest.approx(
+                analyzer._calculate_tax_from_brackets(income, brackets)
+            )
+        assert bracket_tax(50000, compiled) == pytest.approx(6053)
+
+    def test_bracket_tax_sweep(self, mock_database):
+        """A sweep matches per-income bracket_tax, including bracket edges."""
+        from tax_agent.analyzers.implications import (
+            TaxAnalyzer,
+            _compile_brackets,
+            bracket_tax,
+            bracket_tax_sweep,
+        )
+
+        compiled = _compile_brackets(TaxAnalyzer(2024).rules["brackets"]["married_filing_jointly"])
+        incomes = [-100, 0, 23200, 23201, 100000, 731200, 2_000_000]
+
+        assert bracket_tax_sweep(incomes, compiled) == pytest.approx(
+            [bracket_tax(income, compiled) for income in incomes]
+        )
+
     def test_standard_deduction_values(self):
         """Test standard deduction values for 2024."""
         from tax_agent.analyzers.implications import load_tax_rules
@@ -62,6 +99,46 @@ class TestTaxCalculations:
         assert rules["standard_deduction"]["married_filing_jointly"] == 29200
         assert rules["standard_deduction"]["head_of_household"] == 21900
 
+    def test_tax_rules_cached(self):
+        """Rules for a year are parsed once and then shared."""
+        import yaml
+
+        from tax_agent.analyzers.implications import load_tax_rules
+
+        load_tax_rules.cache_clear()
+        with patch.object(yaml, "load", wraps=yaml.load) as load:
+            assert load_tax_rules(2024) is load_tax_rules(2024)
+        assert load.call_count == 1
+
+    def test_preload_tax_rules_fills_cache(self):
+        """Preloading parses the rules so later loads are cache hits."""
+        from tax_agent.analyzers.implications import (
+            _compiled_brackets,
+            load_tax_rules,
+            preload_tax_rules,
+        )
+
+        load_tax_rules.cache_clear()
+        _compiled_brackets.cache_clear()
+        preload_tax_rules(2024)
+
+        assert load_tax_rules.cache_info().currsize == 1
+        assert _compiled_brackets.cache_info().currsize == 1
+        load_tax_rules(2024)
+        assert load_tax_rules.cache_info().hits == 1
+
+    def test_tax_year_context_cached(self):
+        """The rendered context is built once per year and state."""
+        from tax_agent.analyzers.implications import get_tax_year_context
+
+        get_tax_year_context.cache_clear()
+        context = get_tax_year_context(2024, "CA")
+
+        assert "- Standard Deduction (Single): $14,600" in context
+        assert "STATE: California" in context.splitlines()
+        assert get_tax_year_context(2024, "CA") is context
+        assert get_tax_year_context.cache_info().hits == 1
+
     def test_income_summary_calculation(self, mock_database):
         """Test income summary calculation from documents."""
         from tax_agent.analyzers.implications import TaxAnalyzer
@@ -124,6 +201,149 @@ class TestTaxCalculations:
         assert withholding["medicare"] == 1087.50
         assert withholding["state"] == 4500.00
 
+    def test_ai_analysis_document_summaries(self, mock_database):
+        """Each document gets a one-line summary in the analysis prompt."""
+        from tax_agent.analyzers.implications import TaxAnalyzer
+
+        analyzer = TaxAnalyzer(2024)
+        analyzer.db.get_documents.return_value = [
+            TaxDocument(
+                id="w2", tax_year=2024, document_type=DocumentType.W2, issuer_name="Acme",
+                raw_text="", file_hash="w2", extracted_data={"box_1": 85000, "box_2": 12000},
+            ),
+            TaxDocument(
+                id="b", tax_year=2024, document_type=DocumentType.FORM_1099_B, issuer_name="Broker",
+                raw_text="", file_hash="b", extracted_data={"summary": {"total_proceeds": 1500}},
+            ),
+            TaxDocument(
+                id="k1", tax_year=2024, document_type=DocumentType.K1, issuer_name="LP",
+                raw_text="", file_hash="k1", extracted_data={"box_1": 10},
+            ),
+        ]
+
+        with patch("tax_agent.agent.get_agent") as get_agent:
+            analyzer.generate_ai_analysis(use_sdk=False)
+
+        documents_text = get_agent.return_value.analyze_tax_implications.call_args.args[0]
+        assert documents_text.splitlines() == [
+            "- W2 from Acme: Wages $85,000.00, Federal withheld $12,000.00",
+            "- 1099_B from Broker: Total proceeds $1,500.00",
+            "- K1 from LP",
+        ]
+
+    def test_summarize_documents_without_analyzer(self):
+        """Summaries can be built from the class for callers holding their own documents."""
+        from tax_agent.analyzers.implications import TaxAnalyzer
+
+        doc = TaxDocument(
+            id="int", tax_year=2024, document_type=DocumentType.FORM_1099_INT,
+            issuer_name="Big Bank", raw_text="", file_hash="int",
+            extracted_data={"box_1": 250}, file_path="/docs/int.pdf",
+        )
+
+        text, source_dir = TaxAnalyzer.summarize_documents([doc])
+        assert text == "- 1099_INT from Big Bank: Interest income $250.00"
+        assert str(source_dir) == "/docs"
+        assert TaxAnalyzer.summarize_documents([]) == ("", None)
+
+    def test_documents_queried_once(self, mock_database):
+        """The rule-based and AI analyses share one document query."""
+        from tax_agent.analyzers.implications import TaxAnalyzer
+
+        analyzer = TaxAnalyzer(2024)
+        analyzer.db.get_documents.return_value = []
+
+        analyzer.generate_analysis()
+        analyzer.generate_ai_analysis(use_sdk=False)
+        assert analyzer.db.get_documents.call_count == 1
+
+        analyzer.invalidate_docs()
+        analyzer.get_documents()
+        assert analyzer.db.get_documents.call_count == 2
+
+    def test_estimate_uses_compiled_brackets(self, mock_database):
+        """Estimates use brackets compiled once per year, with a single-filer fallback."""
+        from tax_agent.analyzers.implications import TaxAnalyzer
+
+        first = TaxAnalyzer(2024)
+        second = TaxAnalyzer(2024)
+        assert first._ordinary_brackets is second._ordinary_brackets
+
+        income = {
+            "wages": 64600.0, "interest": 0.0, "dividends_ordinary": 0.0,
+            "dividends_qualified": 0.0, "capital_gains_short": 0.0,
+            "capital_gains_long": 0.0, "other": 0.0,
+        }
+        single = first.estimate_tax_liability(income, FilingStatus.SINGLE)
+        assert single["ordinary_income_tax"] == pytest.approx(6053)
+        assert first.estimate_tax_liability(income, "unknown_status")["total_tax"] == pytest.approx(
+            single["total_tax"]
+        )
+
+    def test_total_income_counts_qualified_dividends_once(self, mock_database):
+        """Qualified dividends are part of ordinary dividends, not extra income."""
+        from tax_agent.analyzers.implications import TaxAnalyzer
+
+        analyzer = TaxAnalyzer(2024)
+        analyzer.db.get_documents.return_value = [
+            TaxDocument(
+                id="div", tax_year=2024, document_type=DocumentType.FORM_1099_DIV,
+                issuer_name="Fund", raw_text="", file_hash="div",
+                extracted_data={"box_1a": 1000, "box_1b": 800},
+            ),
+        ]
+
+        analysis = analyzer.generate_analysis()
+
+        assert analysis["total_income"] == 1000
+        assert analysis["total_income"] == analysis["tax_estimate"]["total_income"]
+        assert analysis["documents_by_type"] == {"1099_DIV": 1}
+
+    def test_aggregate_docs_single_pass(self, mock_database):
+        """Income and withholding come from one pass over mixed documents."""
+        from tax_agent.analyzers.implications import TaxAnalyzer
+
+        analyzer = TaxAnalyzer(2024)
+
+        def make(doc_id, doc_type, data):
+            return TaxDocument(
+                id=doc_id,
+                tax_year=2024,
+                document_type=doc_type,
+                issuer_name="Issuer",
+                raw_text="",
+                file_hash=doc_id,
+                extracted_data=data,
+            )
+
+        documents = [
+            make("w2", DocumentType.W2, {"box_1": 80000, "box_2": 9000}),
+            make("int", DocumentType.FORM_1099_INT, {"box_1": 200, "box_4": 24}),
+            make("div", DocumentType.FORM_1099_DIV, {"box_1a": 500, "box_1b": 400}),
+            make("b", DocumentType.FORM_1099_B, {
+                "summary": {"short_term_gain_loss": -100, "long_term_gain_loss": 900},
+                "federal_tax_withheld": 50,
+            }),
+            make("nec", DocumentType.FORM_1099_NEC, {"box_1": 3000}),
+            make("misc", DocumentType.FORM_1099_MISC, {"box_7": 1000}),
+            make("1098", DocumentType.FORM_1098, {"box_1": 7000}),
+        ]
+
+        income, withholding = analyzer._aggregate_docs(documents)
+
+        assert income == {
+            "wages": 80000,
+            "interest": 200,
+            "dividends_ordinary": 500,
+            "dividends_qualified": 400,
+            "capital_gains_short": -100,
+            "capital_gains_long": 900,
+            "other": 4000,
+        }
+        assert withholding["federal"] == 9074
+        assert analyzer.calculate_income_summary(documents) == income
+        assert analyzer.calculate_withholding(documents) == withholding
+
 
 class TestCapitalGains:
     """Tests for capital gains calculations."""
@@ -187,3 +407,578 @@ class TestVerification:
         errors = [i for i in issues if i["severity"] == "error"]
         assert len(errors) == 1
         assert "SS wages" in errors[0]["issue"]
+
+
+@pytest.fixture
+def optimizer(mock_registry):
+    """TaxOptimizer wired to mocked config, database and legacy agent."""
+    from tax_agent.analyzers.deductions import TaxOptimizer
+
+    config = MagicMock()
+    config.tax_year = 2024
+    config.use_agent_sdk = False
+    config.state = "CA"
+    mock_registry.override("config", config)
+    mock_registry.override("database", MagicMock())
+    mock_registry.override("agent", MagicMock())
+    return TaxOptimizer(2024)
+
+
+def _deductions_input(savings: float) -> dict:
+    """Deductions tool input that satisfies DeductionsResult."""
+    return {
+        "recommended_deductions": [],
+        "recommended_credits": [],
+        "standard_vs_itemized": {
+            "recommendation": "standard",
+            "standard_amount": 14600.0,
+            "itemized_amount": 0.0,
+            "reasoning": "No itemized deductions",
+        },
+        "estimated_total_savings": savings,
+        "action_items": [],
+    }
+
+
+def _stock_analysis(comp_type: str, treatment: str) -> dict:
+    """Stock compensation analysis that satisfies StockCompAnalysis."""
+    return {
+        "compensation_type": comp_type,
+        "tax_treatment": treatment,
+        "immediate_actions": [],
+        "estimated_tax_impact": "Unknown",
+        "optimization_tips": [],
+        "warnings": [],
+    }
+
+
+@pytest.fixture
+def profile():
+    """Minimal taxpayer profile, so find_deductions takes the full path."""
+    from tax_agent.models.taxpayer import TaxpayerProfile
+
+    return TaxpayerProfile(tax_year=2024, filing_status=FilingStatus.SINGLE, state="CA")
+
+
+class TestTaxOptimizer:
+    """Tests for the deduction optimizer."""
+
+    def test_static_prompts_are_cached(self, optimizer, profile):
+        """Each optimizer call sends its static system prompt as a cache breakpoint."""
+        from tax_agent.analyzers import deductions
+
+        optimizer.agent._call_tool.return_value = {"analyses": []}
+        optimizer.agent._stream_tool.return_value = iter(['{"questions": []}'])
+
+        optimizer.get_interview_questions(documents=[])
+        optimizer.analyze_stock_compensation("RSU", {"shares": 100})
+        optimizer.find_deductions(documents=[], taxpayer=profile, use_sdk=False)
+
+        calls = [optimizer.agent._stream_tool.call_args] + optimizer.agent._call_tool.call_args_list
+        assert [(c.args[0], c.args[2]) for c in calls] == [
+            (deductions._INTERVIEW_SYSTEM, deductions._INTERVIEW_TOOL),
+            (deductions._STOCK_COMP_SYSTEM, deductions._STOCK_COMP_TOOL),
+            (deductions._DEDUCTIONS_SYSTEM, deductions._DEDUCTIONS_TOOL),
+        ]
+        assert all(c.kwargs["cache_system"] for c in calls)
+
+    def test_tool_schemas(self):
+        """Tool input schemas come from the Pydantic result models."""
+        from tax_agent.analyzers import deductions
+
+        schema = deductions._DEDUCTIONS_TOOL["input_schema"]
+        assert "recommended_deductions" in schema["required"]
+        assert deductions._INTERVIEW_TOOL["input_schema"]["required"] == ["questions"]
+
+    def test_interview_questions_stream(self, optimizer):
+        """Questions are yielded before the tool input has finished streaming."""
+        from tax_agent.analyzers.deductions import INTERVIEW_MODEL
+
+        received = []
+
+        def chunks():
+            yield '{"questions": [{"id": "q1", "question": "Own a home?", '
+            yield '"type": "yes_no", "options": []}, {"id": "q2",'
+            received.append("more")
+            yield ' "question": "HSA?", "type": "yes_no"}]}'
+
+        optimizer.agent._stream_tool.return_value = chunks()
+        questions = optimizer.iter_interview_questions(documents=[])
+
+        assert next(questions)["id"] == "q1"
+        assert received == []
+        assert [q["id"] for q in questions] == ["q2"]
+        assert optimizer.agent._stream_tool.call_args.kwargs["model"] == INTERVIEW_MODEL
+
+    def test_interview_questions_default_on_api_error(self, optimizer):
+        """A transport failure falls back to the default questions."""
+        import httpx
+        from anthropic import APIConnectionError
+
+        def chunks():
+            raise APIConnectionError(request=httpx.Request("POST", "https://api.anthropic.com"))
+            yield  # pragma: no cover
+
+        optimizer.agent._stream_tool.return_value = chunks()
+
+        questions = optimizer.get_interview_questions(documents=[])
+
+        assert questions == optimizer._get_default_questions([])
+
+    def test_find_deductions_returns_tool_input(self, optimizer, profile):
+        """The deductions result is the validated tool input, with no text parsing."""
+        optimizer.agent._call_tool.return_value = _deductions_input(1200.0)
+
+        result = optimizer.find_deductions(documents=[], taxpayer=profile, use_sdk=False)
+
+        assert result["estimated_total_savings"] == 1200.0
+        assert result["planning_tips"] == []
+        optimizer.agent._call.assert_not_called()
+
+    def test_find_deductions_invalid_tool_input_is_error(self, optimizer, profile):
+        """Tool input that does not match the schema becomes an error result."""
+        optimizer.agent._call_tool.return_value = {"estimated_total_savings": 1200.0}
+
+        result = optimizer.find_deductions(documents=[], taxpayer=profile, use_sdk=False)
+
+        assert result["error"] == "Failed to parse deductions"
+        assert "recommended_deductions" in result["details"]
+
+    def test_find_deductions_missing_tool_call_is_error(self, optimizer, profile):
+        """A truncated or tool-less response is reported, not raised."""
+        optimizer.agent._call_tool.side_effect = ValueError(
+            "Claude response was cut off at max_tokens"
+        )
+
+        result = optimizer.find_deductions(documents=[], taxpayer=profile, use_sdk=False)
+
+        assert result == {
+            "error": "Failed to parse deductions",
+            "details": "Claude response was cut off at max_tokens",
+        }
+
+    def test_find_deductions_cold_start_without_answers(self, optimizer):
+        """No documents, profile or answers needs no API call at all."""
+        optimizer.config.get.return_value = "married_filing_jointly"
+
+        result = optimizer.find_deductions(documents=[], use_sdk=False)
+
+        optimizer.agent._call_tool.assert_not_called()
+        assert result["standard_vs_itemized"]["standard_amount"] == 29200
+        assert result["recommended_credits"] == []
+
+    def test_find_deductions_cold_start_asks_for_credits(self, optimizer):
+        """With only interview answers, a small credits-only request is made."""
+        from tax_agent.analyzers import deductions
+
+        optimizer.config.get.return_value = "single"
+        optimizer.agent._call_tool.return_value = {
+            "recommended_credits": [
+                {
+                    "name": "Child Tax Credit",
+                    "estimated_value": 2000.0,
+                    "eligibility": "One qualifying child",
+                    "action_needed": "Claim on Schedule 8812",
+                },
+            ],
+            "action_items": ["Gather dependent SSNs"],
+        }
+
+        result = optimizer.find_deductions(
+            documents=[], interview_answers={"dependents": "1"}, use_sdk=False
+        )
+
+        call = optimizer.agent._call_tool.call_args
+        assert call.args[0] == deductions._CREDITS_SYSTEM
+        assert call.args[2] == deductions._CREDITS_TOOL
+        assert call.kwargs["model"] == deductions.INTERVIEW_MODEL
+        assert result["standard_vs_itemized"]["standard_amount"] == 14600
+        assert result["estimated_total_savings"] == 2000.0
+        assert result["action_items"][0] == "Gather dependent SSNs"
+        assert result["recommended_deductions"] == []
+        assert not deductions._DEFAULT_DEDUCTIONS["recommended_credits"]
+
+    def test_find_deductions_batch(self, optimizer):
+        """Multiple profiles go through one batch and keep their order."""
+        from tax_agent.analyzers.deductions import _DEDUCTIONS_TOOL
+        from tax_agent.models.taxpayer import TaxpayerProfile
+
+        profiles = [
+            TaxpayerProfile(tax_year=2024, filing_status=status, state="CA")
+            for status in (FilingStatus.SINGLE, FilingStatus.HEAD_OF_HOUSEHOLD)
+        ]
+        optimizer.agent._call_batch.return_value = [_deductions_input(1.0), None]
+
+        results = optimizer.find_deductions_batch(profiles, documents=[])
+
+        assert results[0]["estimated_total_savings"] == 1.0
+        assert "error" in results[1]
+        call = optimizer.agent._call_batch.call_args
+        assert call.kwargs["tool"] == _DEDUCTIONS_TOOL
+        assert "Filing Status: single" in call.args[1][0]
+        assert "Filing Status: head_of_household" in call.args[1][1]
+        optimizer.agent._call_tool.assert_not_called()
+
+    def test_stock_compensations_single_call(self, optimizer):
+        """Several compensation types share one call and are split by type."""
+        optimizer.agent._call_tool.return_value = {
+            "analyses": [_stock_analysis("RSU", "ordinary income at vest")]
+        }
+
+        results = optimizer.analyze_stock_compensations([
+            {"type": "RSU", "details": {"shares_vested": "100"}},
+            {"type": "ISO", "details": {}},
+        ])
+
+        optimizer.agent._call_tool.assert_called_once()
+        call = optimizer.agent._call_tool.call_args
+        assert "1. Type: RSU" in call.args[1] and "2. Type: ISO" in call.args[1]
+        assert call.args[3] == 3500
+        assert results["RSU"]["tax_treatment"] == "ordinary income at vest"
+        assert "error" in results["ISO"]
+
+    def test_stock_compensation_shim(self, optimizer):
+        """The single-type entry point returns the bare analysis."""
+        optimizer.agent._call_tool.return_value = {
+            "analyses": [_stock_analysis("ISOs", "AMT preference item")]
+        }
+
+        analysis = optimizer.analyze_stock_compensation("ISO", {})
+
+        assert analysis["tax_treatment"] == "AMT preference item"
+
+    def test_stock_compensation_failure_reported_per_type(self, optimizer):
+        """A failed call marks every requested type with the error."""
+        optimizer.agent._call_tool.side_effect = ValueError("no tool call")
+
+        results = optimizer.analyze_stock_compensations([
+            {"type": "RSU", "details": {}},
+            {"type": "ISO", "details": {}},
+        ])
+
+        assert results["RSU"]["error"] == "Failed to parse stock compensation analysis"
+        assert results["ISO"] == results["RSU"]
+
+    def test_documents_fetched_once(self, optimizer):
+        """Optimizer calls share one database query until invalidated."""
+        optimizer.db.get_documents.return_value = []
+        optimizer.agent._call_tool.return_value = {}
+        optimizer.agent._stream_tool.return_value = iter(['{"questions": []}'])
+
+        optimizer.get_interview_questions()
+        optimizer.find_deductions(use_sdk=False)
+        assert optimizer.db.get_documents.call_count == 1
+
+        optimizer.invalidate_docs()
+        optimizer.find_deductions(use_sdk=False)
+        assert optimizer.db.get_documents.call_count == 2
+
+    def test_document_summary_memoized(self, optimizer):
+        """Summaries are reused until a document changes."""
+        from datetime import datetime
+
+        doc = TaxDocument(
+            id="int-1",
+            tax_year=2024,
+            document_type=DocumentType.FORM_1099_INT,
+            issuer_name="Bank",
+            raw_text="",
+            file_hash="hash",
+            extracted_data={"box_1": 500.00},
+        )
+
+        with patch.object(
+            optimizer, "_summarize_documents", wraps=optimizer._summarize_documents
+        ) as summarize:
+            first = optimizer._build_document_summary([doc])
+            assert optimizer._build_document_summary([doc]) == first
+            assert summarize.call_count == 1
+
+            edited = doc.model_copy(
+                update={"extracted_data": {"box_1": 750.00}, "updated_at": datetime(2025, 2, 1)}
+            )
+            assert "$750.00" in optimizer._build_document_summary([edited])
+            assert summarize.call_count == 2
+
+    def test_summarize_documents_per_type(self, optimizer):
+        """Each known document type gets its own summary details."""
+
+        def make(doc_id, doc_type, data):
+            return TaxDocument(
+                id=doc_id,
+                tax_year=2024,
+                document_type=doc_type,
+                issuer_name="Issuer",
+                raw_text="",
+                file_hash=doc_id,
+                extracted_data=data,
+            )
+
+        docs = [
+            make("w2", DocumentType.W2, {"box_1": 85000, "box_2": 12000, "box_12_codes": ["D"]}),
+            make(
+                "b",
+                DocumentType.FORM_1099_B,
+                {
+                    "summary": {"total_proceeds": 1000, "long_term_gain_loss": 250},
+                    "transactions": [{}, {}],
+                },
+            ),
+            make("int", DocumentType.FORM_1099_INT, {"box_1": 42.5}),
+            make("div", DocumentType.FORM_1099_DIV, {"box_1a": 300, "box_1b": None}),
+            make("misc", DocumentType.FORM_1099_MISC, {"box_3": 100}),
+        ]
+
+        lines = optimizer._summarize_documents(docs).splitlines()
+
+        assert lines[0] == (
+            "- W2 from Issuer: Wages $85,000.00, Federal withheld $12,000.00, "
+            "Box 12 codes: ['D']"
+        )
+        assert lines[1].endswith(
+            ": Proceeds $1,000.00, ST gain/loss $0.00, LT gain/loss $250.00 (2 transactions)"
+        )
+        assert lines[2].endswith(": Interest $42.50")
+        assert lines[3].endswith(": Ordinary $300.00, Qualified $0.00")
+        assert lines[4].endswith("from Issuer")
+
+    @pytest.mark.asyncio
+    async def test_run_full_analysis_overlaps_requests(self, optimizer, profile):
+        """All optimizer requests are in flight before any of them completes."""
+        import asyncio
+
+        from tax_agent.analyzers import deductions
+
+        in_flight = 0
+        peak = 0
+
+        async def fake_acall_tool(system, user_message, tool, *args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            if tool is deductions._INTERVIEW_TOOL:
+                return {"questions": [{"id": "q1"}]}
+            if tool is deductions._STOCK_COMP_TOOL:
+                return {"analyses": [
+                    _stock_analysis("RSU", "RSU"), _stock_analysis("ESPP", "ESPP"),
+                ]}
+            return _deductions_input(500.0)
+
+        optimizer.agent._acall_tool = fake_acall_tool
+
+        results = await optimizer.run_full_analysis(
+            taxpayer=profile,
+            documents=[],
+            stock_items=[("RSU", {}), ("ESPP", {})],
+        )
+
+        assert peak == 3
+        assert results["deductions"]["estimated_total_savings"] == 500.0
+        assert [a["tax_treatment"] for a in results["stock_compensation"]] == ["RSU", "ESPP"]
+        assert results["questions"] == [{"id": "q1"}]
+
+    @pytest.mark.asyncio
+    async def test_full_analysis_inside_running_loop(self, optimizer, profile):
+        """The sync wrapper also works when called from a running event loop."""
+
+        async def fake_acall_tool(system, user_message, tool, *args, **kwargs):
+            return _deductions_input(500.0)
+
+        optimizer.agent._acall_tool = fake_acall_tool
+
+        results = optimizer.full_analysis(
+            taxpayer=profile, documents=[], include_questions=False
+        )
+
+        assert results["deductions"]["estimated_total_savings"] == 500.0
+        assert results["questions"] is None
+
+
+class TestAgentCall:
+    """Tests for the legacy agent's Messages API call."""
+
+    def _agent(self):
+        from tax_agent.agent import TaxAgent
+
+        agent = object.__new__(TaxAgent)
+        agent.model = "claude-sonnet-4-5-20250929"
+        agent.client = MagicMock()
+        agent.client.messages.create.return_value.content = [MagicMock(text="ok")]
+        return agent
+
+    def test_plain_system_prompt(self):
+        agent = self._agent()
+        assert agent._call("system", "hi") == "ok"
+        assert agent.client.messages.create.call_args.kwargs["system"] == "system"
+
+    def test_cached_system_prompt(self):
+        agent = self._agent()
+        usage = agent.client.messages.create.return_value.usage
+        usage.cache_read_input_tokens = 900
+        usage.cache_creation_input_tokens = 0
+        usage.input_tokens = 100
+
+        assert agent._call("system", "hi", cache_system=True) == "ok"
+        assert agent.client.messages.create.call_args.kwargs["system"] == [
+            {"type": "text", "text": "system", "cache_control": {"type": "ephemeral"}}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_async_calls_are_throttled(self):
+        import asyncio
+
+        agent = self._agent()
+        agent.config = MagicMock(api_concurrency=2)
+        agent._async_client = None
+        agent._async_client_loop = None
+
+        in_flight = 0
+        peak = 0
+
+        async def create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return MagicMock(content=[MagicMock(text="ok")])
+
+        client = MagicMock()
+        client.messages.create = create
+        agent._async_client_factory = lambda: client
+
+        results = await asyncio.gather(*(agent._acall("system", str(i)) for i in range(5)))
+
+        assert results == ["ok"] * 5
+        assert peak == 2
+
+    def test_call_tool_forces_tool_and_returns_input(self):
+        from types import SimpleNamespace
+
+        agent = self._agent()
+        agent.client.messages.create.return_value.content = [
+            SimpleNamespace(type="tool_use", input={"questions": []})
+        ]
+        tool = {"name": "return_questions", "description": "", "input_schema": {}}
+
+        assert agent._call_tool("system", "hi", tool) == {"questions": []}
+        kwargs = agent.client.messages.create.call_args.kwargs
+        assert kwargs["tools"] == [tool]
+        assert kwargs["tool_choice"] == {"type": "tool", "name": "return_questions"}
+
+    def test_call_tool_rejects_truncated_response(self):
+        from types import SimpleNamespace
+
+        agent = self._agent()
+        response = agent.client.messages.create.return_value
+        response.stop_reason = "max_tokens"
+        response.content = [SimpleNamespace(type="tool_use", input={"questions": []})]
+        tool = {"name": "return_questions", "description": "", "input_schema": {}}
+
+        with pytest.raises(ValueError, match="max_tokens"):
+            agent._call_tool("system", "hi", tool)
+
+    def test_call_batch_reconciles_by_custom_id(self):
+        from types import SimpleNamespace
+
+        agent = self._agent()
+        agent.provider = "anthropic"
+        batches = agent.client.messages.batches
+        batches.create.return_value = SimpleNamespace(id="b1", processing_status="in_progress")
+        batches.retrieve.return_value = SimpleNamespace(id="b1", processing_status="ended")
+
+        def entry(custom_id, text=None):
+            if text is None:
+                result = SimpleNamespace(type="errored")
+            else:
+                message = SimpleNamespace(content=[SimpleNamespace(text=text)])
+                result = SimpleNamespace(type="succeeded", message=message)
+            return SimpleNamespace(custom_id=custom_id, result=result)
+
+        batches.results.return_value = iter(
+            [entry("req-2", "c"), entry("req-0", "a"), entry("req-1")]
+        )
+
+        assert agent._call_batch("system", ["x", "y", "z"], poll_interval=0) == ["a", None, "c"]
+        requests = batches.create.call_args.kwargs["requests"]
+        assert [r["custom_id"] for r in requests] == ["req-0", "req-1", "req-2"]
+
+    def test_call_batch_cancels_after_timeout(self):
+        from types import SimpleNamespace
+
+        agent = self._agent()
+        agent.provider = "anthropic"
+        batches = agent.client.messages.batches
+        pending = SimpleNamespace(id="b1", processing_status="in_progress")
+        batches.create.return_value = pending
+        batches.retrieve.return_value = pending
+
+        with pytest.raises(TimeoutError, match="b1"):
+            agent._call_batch("system", ["x", "y"], poll_interval=0, timeout=0.01)
+
+        batches.cancel.assert_called_once_with("b1")
+        batches.results.assert_not_called()
+
+
+class TestExtractJson:
+    """Tests for optimizer response decoding."""
+
+    def test_plain_json(self):
+        from tax_agent.analyzers.deductions import _extract_json
+
+        assert _extract_json(' {"a": 1}\n') == {"a": 1}
+
+    @pytest.mark.parametrize("text", [
+        '```json\n{"a": 1}\n```',
+        '```\n{"a": 1}\n```',
+        '  ```json{"a": 1}```  ',
+    ])
+    def test_fenced_json(self, text):
+        from tax_agent.analyzers.deductions import _extract_json
+
+        assert _extract_json(text) == {"a": 1}
+
+    def test_invalid_json_raises(self):
+        import json
+
+        from tax_agent.analyzers.deductions import _extract_json
+
+        with pytest.raises(json.JSONDecodeError):
+            _extract_json("Here are your deductions")
+
+
+class TestRunTaxInterview:
+    """Tests for the plain-terminal interview loop."""
+
+    def test_answers_parsed_by_type(self, optimizer, monkeypatch, capsys):
+        import io
+
+        from tax_agent.analyzers.deductions import TaxOptimizer, run_tax_interview
+
+        questions = [
+            {"id": "home", "question": "Own a home?", "type": "yes_no", "relevance": "Mortgage"},
+            {"id": "hsa", "question": "HSA contributions?", "type": "number"},
+            {"id": "plan", "question": "Health plan?", "type": "select", "options": ["A", "B"]},
+            {"id": "equity", "question": "Equity?", "type": "multi_select",
+             "options": ["RSU", "ISO", "ESPP"]},
+            {"id": "notes", "question": "Anything else?", "type": "text"},
+        ]
+        monkeypatch.setattr(
+            TaxOptimizer, "iter_interview_questions", lambda self: iter(questions)
+        )
+        monkeypatch.setattr("sys.stdin", io.StringIO("y\n1,250\n0\n1, 3 ,9\nmoved states\n"))
+
+        answers = run_tax_interview(2024)
+
+        assert answers == {
+            "home": True,
+            "hsa": 1250.0,
+            "plan": None,
+            "equity": ["RSU", "ESPP"],
+            "notes": "moved states",
+        }
+        out = capsys.readouterr().out
+        assert "  (Why: Mortgage)\n  [y/n]: " in out
+        assert "  Options (enter numbers separated by commas):\n    1. RSU\n" in out
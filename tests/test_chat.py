@@ -0,0 +1,281 @@
+"""Tests for the interactive tax advisor chat."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def chat(mock_registry):
+    """TaxAdvisorChat wired to mocked config and database."""
+    from tax_agent.chat import TaxAdvisorChat
+
+    config = MagicMock()
+    config.tax_year = 2024
+    config.state = "CA"
+    config.use_agent_sdk = False
+    mock_registry.override("config", config)
+    mock_registry.override("database", MagicMock())
+    return TaxAdvisorChat(2024)
+
+
+class TestConversationHistory:
+    """Tests for the bounded conversation history."""
+
+    def test_history_is_bounded(self, chat):
+        """Old messages are dropped once the history is full."""
+        from tax_agent.chat import MAX_HISTORY_MESSAGES
+
+        for i in range(MAX_HISTORY_MESSAGES + 6):
+            chat._add_to_history("user", f"message {i}")
+
+        assert len(chat.conversation_history) == MAX_HISTORY_MESSAGES
+        formatted = chat._format_history().splitlines()
+        assert formatted[0] == "User: message 6"
+        assert formatted[-1] == f"User: message {MAX_HISTORY_MESSAGES + 5}"
+
+    def test_long_messages_truncated_once(self, chat):
+        """Messages are shortened when added, and formatting reuses that form."""
+        from tax_agent.chat import HISTORY_MESSAGE_CHARS
+
+        long_message = "x" * (HISTORY_MESSAGE_CHARS + 100)
+        chat._add_to_history("assistant", long_message)
+
+        entry = chat.conversation_history[0]
+        assert entry["content"] == long_message
+        assert entry["line"] == "Advisor: " + "x" * HISTORY_MESSAGE_CHARS + "..."
+        assert chat._format_history() == entry["line"]
+
+    def test_reset_clears_history(self, chat):
+        """reset() empties the history but keeps it bounded."""
+        chat._add_to_history("user", "hi")
+
+        chat.reset()
+
+        assert chat._format_history() == "(New conversation)"
+        assert chat.conversation_history.maxlen is not None
+
+
+class TestBuildContext:
+    """Tests for the chat context builder."""
+
+    def test_documents_section_cached_until_documents_change(self, chat):
+        """The documents section is reused until the document fingerprint changes."""
+        chat.db.get_document_fingerprint.return_value = (1, "2025-01-01T00:00:00")
+        chat.db.get_document_summaries.return_value = [
+            ("W2", "Acme", 85000, None, None),
+        ]
+
+        first = chat._documents_section()
+        assert chat._documents_section() is first
+        assert chat.db.get_document_summaries.call_count == 1
+        assert first == "- W2 from Acme (Wages: $85,000.00)"
+
+        chat.db.get_document_fingerprint.return_value = (1, "2025-02-01T00:00:00")
+        chat.db.get_document_summaries.return_value = [
+            ("W2", "Acme", 90000, None, None),
+        ]
+        assert chat._documents_section() == "- W2 from Acme (Wages: $90,000.00)"
+
+    def test_documents_section_formats_summaries(self, chat):
+        """1099s show their first available amount; W-2s without wages show none."""
+        chat.db.get_document_fingerprint.return_value = (3, "2025-01-01T00:00:00")
+        chat.db.get_document_summaries.return_value = [
+            ("1099_DIV", "Vanguard", None, 1200.5, None),
+            ("1099_B", "Schwab", None, None, 15000),
+            ("W2", "Acme", None, None, None),
+        ]
+
+        assert chat._documents_section().splitlines() == [
+            "- 1099_DIV from Vanguard ($1,200.50)",
+            "- 1099_B from Schwab ($15,000.00)",
+            "- W2 from Acme",
+        ]
+        chat.db.get_documents.assert_not_called()
+
+    def test_source_dir_resolved_once(self, chat):
+        """The source directory is looked up until found, then reused."""
+        chat.db.get_any_document_path.return_value = None
+        assert chat.source_dir is None
+
+        chat.db.get_any_document_path.return_value = "/docs/w2.pdf"
+        assert str(chat.source_dir) == "/docs"
+        assert str(chat.source_dir) == "/docs"
+        assert chat.db.get_any_document_path.call_count == 2
+
+    def test_no_documents(self, chat):
+        """An empty document set is reported as such."""
+        chat.db.get_document_fingerprint.return_value = (0, None)
+        chat.db.get_document_summaries.return_value = []
+        assert chat._documents_section() == "- No documents collected yet"
+
+
+class TestDocumentCache:
+    """Tests for per-session document caching."""
+
+    def test_topics_cached_per_fingerprint(self, chat):
+        """Suggestions are reused until the documents change."""
+        chat.db.get_document_fingerprint.return_value = (0, None)
+        chat.db.get_document_types.return_value = set()
+
+        first = chat.suggest_topics()
+        first.append("mutated by caller")
+
+        assert chat.suggest_topics() == first[:-1]
+        assert chat.db.get_document_types.call_count == 1
+        chat.db.get_documents.assert_not_called()
+
+    def test_slash_command_invalidates_documents(self, chat):
+        """A slash command may collect documents, so the cache is dropped."""
+        chat.db.get_document_fingerprint.return_value = (0, None)
+        chat.db.get_document_summaries.return_value = []
+        chat._documents_section()
+
+        with patch(
+            "tax_agent.slash_commands.execute_slash_command", new=AsyncMock(return_value="done")
+        ):
+            assert chat._handle_slash_command("/status") == "done"
+
+        chat._documents_section()
+        assert chat.db.get_document_summaries.call_count == 2
+
+
+class TestSuggestTopics:
+    """Tests for document-based topic suggestions."""
+
+    def test_topics_follow_document_types(self, chat):
+        """W-2 and 1099 documents each add their own suggestions."""
+        chat.db.get_document_fingerprint.return_value = (1, "2025-01-01T00:00:00")
+        chat.db.get_document_types.return_value = {"1099_R"}
+        topics = chat.suggest_topics()
+        assert "Should I do tax-loss harvesting?" in topics
+        assert "Should I contribute more to my 401(k)?" not in topics
+
+        chat.db.get_document_fingerprint.return_value = (2, "2025-01-02T00:00:00")
+        chat.db.get_document_types.return_value = {"W2"}
+        topics = chat.suggest_topics()
+        assert "Should I contribute more to my 401(k)?" in topics
+        assert "Should I do tax-loss harvesting?" not in topics
+
+
+class TestPromptTemplates:
+    """Tests for the precomposed chat prompts."""
+
+    def test_legacy_system_prompt(self, chat):
+        """The session's tax year is baked in; per-turn parts are substituted as-is."""
+        chat._agent = MagicMock()
+        chat._agent._call.return_value = "Sure."
+        chat._add_to_history("user", "Is 100% of my HSA deductible?")
+
+        context = "STATE: CA {braces} 50%"
+        with patch.object(chat, "_build_context", return_value=context), patch.object(
+            chat, "_extract_and_save_memories"
+        ):
+            assert chat._chat_with_legacy("next question") == "Sure."
+
+        system = chat._agent._call.call_args.args[0]
+        assert "- Stay current with 2024 tax rules" in system
+        assert "TAXPAYER CONTEXT:\nSTATE: CA {braces} 50%\n" in system
+        assert system.endswith("Previous conversation:\nUser: Is 100% of my HSA deductible?")
+
+
+class TestChatAsync:
+    """Tests for streaming responses from chat_async."""
+
+    @staticmethod
+    async def _collect(chat, message):
+        return [chunk async for chunk in chat.chat_async(message)]
+
+    @pytest.mark.asyncio
+    async def test_chat_async_streams_legacy_response(self, chat):
+        """Legacy text deltas are yielded as they arrive and recorded once complete."""
+        chat._agent = MagicMock()
+        chat._agent._stream.return_value = iter(["You may ", "qualify."])
+
+        with patch.object(chat, "_build_context", return_value=""), patch.object(
+            chat, "_extract_and_save_memories"
+        ) as extract:
+            chunks = await self._collect(chat, "Can I deduct my home office?")
+            await asyncio.gather(*chat._background_tasks)
+
+        assert chunks == ["You may ", "qualify."]
+        chat._agent._call.assert_not_called()
+        assert [m["content"] for m in chat.conversation_history] == [
+            "Can I deduct my home office?",
+            "You may qualify.",
+        ]
+        extract.assert_called_once_with("Can I deduct my home office?", "You may qualify.")
+
+    @pytest.mark.asyncio
+    async def test_memory_extraction_does_not_hold_the_stream(self, chat):
+        """The stream finishes while memories are still being extracted."""
+        import threading
+
+        release = threading.Event()
+        chat._agent = MagicMock()
+        chat._agent._stream.return_value = iter(["Done."])
+
+        with patch.object(chat, "_build_context", return_value=""), patch.object(
+            chat, "_extract_and_save_memories", side_effect=lambda *a: release.wait(5)
+        ):
+            assert await self._collect(chat, "hi") == ["Done."]
+            assert len(chat._background_tasks) == 1
+
+            release.set()
+            await asyncio.gather(*chat._background_tasks)
+
+        assert not chat._background_tasks
+
+    @pytest.mark.asyncio
+    async def test_chat_async_propagates_stream_errors(self, chat):
+        """An API error raised mid-stream reaches the caller."""
+
+        def failing_stream(*args, **kwargs):
+            yield "partial"
+            raise RuntimeError("overloaded")
+
+        chat._agent = MagicMock()
+        chat._agent._stream.side_effect = failing_stream
+
+        with patch.object(chat, "_build_context", return_value=""):
+            with pytest.raises(RuntimeError, match="overloaded"):
+                await self._collect(chat, "hello")
+
+    @pytest.mark.asyncio
+    async def test_sdk_paths_share_prompt(self, chat):
+        """The streaming and blocking SDK paths send the same prompt."""
+
+        async def fake_stream(prompt, **kwargs):
+            yield "ok"
+
+        chat.config.use_agent_sdk = True
+        chat._sdk_agent = MagicMock()
+        chat._sdk_agent.interactive_query.return_value = "ok"
+        chat._sdk_agent.interactive_query_async.side_effect = fake_stream
+
+        with patch.object(chat, "_build_context", return_value="STATE: CA"), patch.object(
+            chat, "_extract_and_save_memories"
+        ):
+            chat._chat_with_sdk("What about Roth conversions?")
+            chat.reset()
+            assert await self._collect(chat, "What about Roth conversions?") == ["ok"]
+
+        blocking_prompt = chat._sdk_agent.interactive_query.call_args.args[0]
+        streaming_prompt = chat._sdk_agent.interactive_query_async.call_args.args[0]
+        assert streaming_prompt == blocking_prompt
+        assert "Use these tools proactively" in streaming_prompt
+
+
+class TestUseSdk:
+    """Tests for Agent SDK selection."""
+
+    def test_sdk_availability_probed_once(self, chat):
+        """An unavailable SDK is not re-probed on every turn."""
+        chat.config.use_agent_sdk = True
+
+        with patch("tax_agent.agent_sdk.sdk_available", return_value=False) as available:
+            assert chat._use_sdk() is False
+            assert chat._use_sdk() is False
+
+        assert available.call_count == 1
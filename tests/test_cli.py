@@ -0,0 +1,484 @@
+"""Tests for the command-line interface."""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from tax_agent import cli as cli_module
+from tax_agent.cli import (
+    _register_only,
+    _sniff_subcommand,
+    find_tax_documents,
+    resolve_file_path,
+)
+
+
+def _make_app() -> typer.Typer:
+    cli = typer.Typer()
+    group = typer.Typer()
+    cli.add_typer(group, name="documents")
+
+    @cli.command()
+    def status() -> None:
+        """Show status."""
+
+    @cli.command("review-show")
+    def review_show() -> None:
+        """Show a review."""
+
+    @cli.command()
+    def find_docs() -> None:
+        """Find documents."""
+
+    return cli
+
+
+class TestSniffSubcommand:
+    """Tests for picking the invoked command out of argv."""
+
+    def test_first_non_option(self):
+        """Options before the command are skipped."""
+        assert _sniff_subcommand(["--verbose", "status", "--help"]) == "status"
+
+    def test_no_command(self):
+        """Bare invocations and option-only invocations name no command."""
+        assert _sniff_subcommand([]) is None
+        assert _sniff_subcommand(["--help"]) is None
+
+
+class TestRegisterOnly:
+    """Tests for pruning the app down to the invoked command."""
+
+    def test_keeps_only_matching_command(self):
+        """Explicit and derived command names both match."""
+        cli = _make_app()
+        assert _register_only(cli, "review-show")
+        assert [c.name for c in cli.registered_commands] == ["review-show"]
+        assert cli.registered_groups == []
+
+        cli = _make_app()
+        assert _register_only(cli, "find-docs")
+        assert [c.callback.__name__ for c in cli.registered_commands] == ["find_docs"]
+
+    def test_keeps_only_matching_group(self):
+        """Command groups are matched by name."""
+        cli = _make_app()
+        assert _register_only(cli, "documents")
+        assert cli.registered_commands == []
+        assert [g.name for g in cli.registered_groups] == ["documents"]
+
+    def test_unknown_name_keeps_everything(self):
+        """Unrecognised names leave the app intact for Click's error message."""
+        cli = _make_app()
+        assert not _register_only(cli, "bogus")
+        assert len(cli.registered_commands) == 3
+        assert len(cli.registered_groups) == 1
+
+
+class TestAnalyzeCommand:
+    """Tests for the analyze command's report output."""
+
+    def test_report_rendered_in_one_print(self):
+        """The summary panel, tables and result are written together."""
+        income_keys = [
+            "wages", "interest", "dividends_ordinary", "dividends_qualified",
+            "capital_gains_short", "capital_gains_long", "other",
+        ]
+        analysis = {
+            "income_summary": dict.fromkeys(income_keys, 1000.0),
+            "total_income": 7000.0,
+            "tax_estimate": {
+                "standard_deduction": 14600.0,
+                "taxable_ordinary_income": 0.0,
+                "ordinary_income_tax": 0.0,
+                "capital_gains_tax": 0.0,
+                "total_tax": 0.0,
+            },
+            "withholding_summary": {
+                "federal": 500.0, "state": 0.0, "social_security": 0.0, "medicare": 0.0,
+            },
+            "refund_or_owed": 500.0,
+            "estimated_refund": 500.0,
+        }
+        config = MagicMock(is_initialized=True, use_agent_sdk=False, tax_year=2024)
+
+        with patch.object(cli_module, "get_config", return_value=config), patch(
+            "tax_agent.analyzers.implications.TaxAnalyzer"
+        ) as analyzer_cls, patch.object(cli_module, "prompt_export"), patch.object(
+            cli_module.get_console(), "print", wraps=cli_module.get_console().print
+        ) as console_print:
+            analyzer_cls.return_value.generate_analysis.return_value = analysis
+            result = CliRunner().invoke(cli_module.app, ["analyze", "--summary"])
+
+        assert result.exit_code == 0, result.output
+        assert console_print.call_count == 1
+        assert "Total Income" in result.output
+        assert "Long-term Capital Gains" in result.output
+        assert "$14,600.00" in result.output
+        assert "Estimated Refund: $500.00" in result.output
+
+
+class TestRulesPreload:
+    """Tests for starting the tax-rule preload only where rules are used."""
+
+    def test_started_by_analyze(self):
+        config = MagicMock(is_initialized=True, use_agent_sdk=False, tax_year=2024, state="CA")
+
+        with patch.object(cli_module, "get_config", return_value=config), patch(
+            "tax_agent.analyzers.implications.TaxAnalyzer"
+        ), patch.object(cli_module, "prompt_export"), patch.object(
+            cli_module, "_start_rules_preload"
+        ) as preload:
+            CliRunner().invoke(cli_module.app, ["analyze", "--summary"])
+
+        preload.assert_called_once_with(2024, "CA")
+
+    def test_not_started_by_other_commands(self):
+        config = MagicMock(is_initialized=True, tax_year=2024)
+
+        with patch.object(cli_module, "get_config", return_value=config), patch(
+            "tax_agent.storage.database.get_database"
+        ), patch.object(cli_module, "_start_rules_preload") as preload:
+            CliRunner().invoke(cli_module.app, ["documents", "list"])
+
+        preload.assert_not_called()
+
+
+class TestCollectCommand:
+    """Tests for the collect command's document details."""
+
+    def test_key_amounts_shown_for_document_type(self, tmp_path):
+        """Only the amounts registered for the document's type are listed."""
+        from tax_agent.models.documents import DocumentType, TaxDocument
+
+        pdf = tmp_path / "w2.pdf"
+        pdf.write_bytes(b"%PDF")
+        doc = TaxDocument(
+            id="abcdef123456",
+            tax_year=2024,
+            document_type=DocumentType.W2,
+            issuer_name="Acme Corp",
+            raw_text="",
+            file_hash="hash",
+            extracted_data={"box_1": 85000, "box_2": 12000, "box_1a": 5},
+        )
+        config = MagicMock(is_initialized=True, tax_year=2024)
+
+        with patch.object(cli_module, "get_config", return_value=config), patch(
+            "tax_agent.collectors.document_classifier.DocumentCollector"
+        ) as collector_cls:
+            collector_cls.return_value.process_file.return_value = doc
+            result = CliRunner().invoke(cli_module.app, ["collect", str(pdf)])
+
+        assert result.exit_code == 0, result.output
+        assert "$85,000.00" in result.output
+        assert "$12,000.00" in result.output
+        assert "Dividends" not in result.output
+
+    def test_directory_results_reported_as_processed(self, tmp_path):
+        """Each file is reported from the streaming iterator and counted."""
+        config = MagicMock(is_initialized=True, tax_year=2024)
+        results = [
+            (tmp_path / "w2.pdf", MagicMock(
+                confidence_score=0.9, needs_review=False, document_type="W2",
+                issuer_name="Acme Corp",
+            )),
+            (tmp_path / "scan.png", ValueError("unreadable")),
+        ]
+
+        with patch.object(cli_module, "get_config", return_value=config), patch(
+            "tax_agent.collectors.document_classifier.DocumentCollector"
+        ) as collector_cls:
+            collector_cls.return_value.iter_process_directory.return_value = iter(results)
+            result = CliRunner().invoke(
+                cli_module.app, ["collect", "unused", "--dir", str(tmp_path)]
+            )
+
+        assert result.exit_code == 0, result.output
+        assert "w2.pdf: W2 from Acme Corp (high confidence)" in result.output
+        assert "scan.png: unreadable" in result.output
+        assert "Processed 1/2 files successfully." in result.output
+        collector_cls.return_value.process_directory.assert_not_called()
+
+
+class TestInterviewPrompts:
+    """Tests for the optimize interview's per-type answer prompts."""
+
+    def test_number_strips_currency_formatting(self):
+        """Dollar signs and thousands separators are ignored."""
+        with patch.object(cli_module.Prompt, "ask", return_value="$1,250.50"):
+            assert cli_module._ask_number({}) == 1250.50
+        with patch.object(cli_module.Prompt, "ask", return_value="about ten"):
+            assert cli_module._ask_number({}) == 0
+
+    def test_select_and_multi_select(self):
+        """Options are chosen by 1-based number; out-of-range picks are dropped."""
+        q = {"options": ["Single", "Married filing jointly", "Head of household"]}
+        with patch.object(cli_module.Prompt, "ask", return_value="2"):
+            assert cli_module._ask_select(q) == "Married filing jointly"
+        with patch.object(cli_module.Prompt, "ask", return_value="9"):
+            assert cli_module._ask_select(q) is None
+        with patch.object(cli_module.Prompt, "ask", return_value="1, 3, 7"):
+            assert cli_module._ask_multi_select(q) == ["Single", "Head of household"]
+        with patch.object(cli_module.Prompt, "ask", return_value="none"):
+            assert cli_module._ask_multi_select(q) == []
+
+    def test_options_printed_verbatim_in_one_write(self):
+        """AI-written options are printed as plain text, brackets included."""
+        with patch.object(cli_module, "rprint") as rprint:
+            cli_module._print_options("   Options:", ["ISO [incentive]", "NSO"])
+
+        (text,), _ = rprint.call_args
+        assert rprint.call_count == 1
+        assert text.plain == "   Options:\n     1. ISO [incentive]\n     2. NSO"
+
+
+class TestStockCompText:
+    """Tests for the stock compensation panel body."""
+
+    def test_sections_styled_without_markup(self):
+        """Headings carry styles; AI text with brackets is kept verbatim."""
+        text = cli_module._stock_comp_text({
+            "tax_treatment": "Ordinary income at vest [see Pub 525]",
+            "immediate_actions": ["Check W-2 box 12", "Track basis"],
+            "warnings": [],
+        })
+
+        assert text.plain.split("\n\n") == [
+            "Tax Treatment:\nOrdinary income at vest [see Pub 525]",
+            "Immediate Actions:\n- Check W-2 box 12\n- Track basis",
+            "Optimization Tips:\nN/A",
+            "Warnings:\nNone",
+        ]
+        assert [str(span.style) for span in text.spans] == ["bold"] * 3 + ["bold yellow"]
+
+
+class TestReportText:
+    """Tests for the bullet lists and review findings printed in one write."""
+
+    def test_bullet_list(self):
+        """The heading and items share a style, with the heading in bold."""
+        text = cli_module._bullet_list("Warnings:", ["Keep receipts", "Check [box 12]"], "yellow")
+
+        assert text.plain == "\nWarnings:\n  - Keep receipts\n  - Check [box 12]"
+        assert [str(span.style) for span in text.spans] == ["bold yellow", "yellow", "yellow"]
+
+    def test_findings_text(self):
+        """Findings list their set details; saved dicts and enum severities both work."""
+        from tax_agent.models.returns import ReviewSeverity
+
+        text = cli_module._findings_text([
+            {
+                "severity": ReviewSeverity.ERROR, "title": "Missing 1099-INT",
+                "category": "income", "description": "Interest not reported.",
+                "potential_impact": 120, "recommendation": "Add Schedule B",
+            },
+            {"severity": "info", "title": "Looks good", "description": ""},
+        ])
+
+        assert text.plain.split("\n\n") == [
+            "1. ERROR: Missing 1099-INT\n   Category: income\n   Interest not reported.\n"
+            "   Potential Tax Impact: $120.00\n   Recommendation: Add Schedule B",
+            "2. INFO: Looks good\n   ",
+        ]
+        assert str(text.spans[0].style) == "red"
+
+
+class TestDocumentsShowCommand:
+    """Tests for resolving partial document IDs."""
+
+    def test_ambiguous_prefix_lists_matches_from_prefix_query(self):
+        """Partial IDs are matched in the database, not by loading every document."""
+        config = MagicMock(is_initialized=True, tax_year=2024)
+        db = MagicMock()
+        db.get_document.return_value = None
+        db.get_documents_by_id_prefix.return_value = [
+            MagicMock(id="abc12345-1", document_type="W2", issuer_name="Acme Corp"),
+            MagicMock(id="abc12345-2", document_type="1099_INT", issuer_name="Big Bank"),
+        ]
+
+        with patch.object(cli_module, "get_config", return_value=config), patch(
+            "tax_agent.storage.database.get_database", return_value=db
+        ):
+            result = CliRunner().invoke(cli_module.app, ["documents", "show", "abc"])
+
+        assert result.exit_code == 0, result.output
+        assert "Multiple documents match 'abc'" in result.output
+        assert "1099_INT from Big Bank" in result.output
+        db.get_documents_by_id_prefix.assert_called_once_with("abc")
+        db.get_documents.assert_not_called()
+
+
+class TestDocumentsListCommand:
+    """Tests for the documents list table."""
+
+    def test_rows_streamed_from_database(self):
+        """The table is filled from the document iterator and counted as it goes."""
+        config = MagicMock(is_initialized=True, tax_year=2024)
+        db = MagicMock()
+        db.iter_documents.return_value = iter([
+            MagicMock(id="abc12345-1", document_type="W2", issuer_name="Acme Corp",
+                      tags=[], needs_review=False),
+            MagicMock(id="def67890-2", document_type="1099_INT", issuer_name="Big Bank",
+                      tags=["bank"], needs_review=True),
+        ])
+        db.get_all_tags.return_value = ["bank"]
+
+        with patch.object(cli_module, "get_config", return_value=config), patch(
+            "tax_agent.storage.database.get_database", return_value=db
+        ):
+            result = CliRunner().invoke(cli_module.app, ["documents", "list"])
+
+        assert result.exit_code == 0, result.output
+        assert "Big Bank" in result.output
+        assert "2 document(s) total | Tags: bank" in result.output
+        db.get_documents.assert_not_called()
+
+    def test_no_documents(self):
+        """An empty result is reported without printing a table."""
+        config = MagicMock(is_initialized=True, tax_year=2024)
+        db = MagicMock()
+        db.iter_documents.return_value = iter([])
+
+        with patch.object(cli_module, "get_config", return_value=config), patch(
+            "tax_agent.storage.database.get_database", return_value=db
+        ):
+            result = CliRunner().invoke(cli_module.app, ["documents", "list"])
+
+        assert result.exit_code == 0, result.output
+        assert "No documents collected for tax year 2024." in result.output
+        assert "Tax Documents" not in result.output
+
+
+class TestFileSearch:
+    """Tests for locating documents on disk."""
+
+    @pytest.fixture
+    def home(self, tmp_path, monkeypatch):
+        """Empty home directory that is also the working directory."""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "Documents").mkdir()
+        (tmp_path / "Downloads").mkdir()
+        return tmp_path
+
+    def test_scan_dirs_runs_concurrently_in_order(self):
+        """Directories are scanned at the same time; results keep their order."""
+        import threading
+
+        started = threading.Barrier(3, timeout=5)
+
+        def scan(search_dir):
+            started.wait()  # Only passes once all three scans are running
+            return [search_dir.name]
+
+        dirs = [Path("/a"), Path("/b"), Path("/c")]
+        assert cli_module._scan_dirs(scan, dirs) == [["a"], ["b"], ["c"]]
+
+    def test_scan_dirs_single_or_no_directory_inline(self):
+        """One directory is scanned on the calling thread; none yields no results."""
+        import threading
+
+        def scan(search_dir):
+            return [threading.current_thread() is threading.main_thread()]
+
+        with patch("concurrent.futures.ThreadPoolExecutor") as pool_cls:
+            assert cli_module._scan_dirs(scan, [Path("/a")]) == [[True]]
+            assert cli_module._scan_dirs(scan, []) == []
+        pool_cls.assert_not_called()
+
+    def test_resolve_suggests_exact_then_partial_matches(self, home):
+        """Case-insensitive file matches come first, then partial ones; each once."""
+        (home / "Downloads" / "W2.PDF").write_bytes(b"")
+        (home / "Documents" / "acme_w2.pdf").write_bytes(b"")
+        (home / "Documents" / "w2_notes.txt").write_bytes(b"")
+        (home / "Documents" / "w2").mkdir()
+
+        resolved, suggestions = resolve_file_path(Path("missing/w2.pdf"))
+        assert resolved is None
+        assert suggestions == [home / "Downloads" / "W2.PDF"]
+
+        resolved, suggestions = resolve_file_path(Path("missing/w2"))
+        assert resolved is None
+        assert suggestions == [home / "Documents" / "acme_w2.pdf", home / "Downloads" / "W2.PDF"]
+
+    def test_resolve_existing_file(self, home):
+        """Existing paths are returned resolved, with no suggestions."""
+        (home / "Documents" / "w2.pdf").write_bytes(b"")
+        (home / "latest.pdf").symlink_to(home / "Documents" / "w2.pdf")
+
+        assert resolve_file_path(Path("~/Documents/../latest.pdf")) == (
+            (home / "Documents" / "w2.pdf").resolve(), []
+        )
+
+    def test_find_tax_documents_newest_first(self, home):
+        """Only document files are returned, most recently modified first."""
+        import os
+
+        docs = home / "Documents"
+        for name, mtime in (("old.pdf", 100), ("new.PNG", 300), ("mid.jpg", 200)):
+            (docs / name).write_bytes(b"")
+            os.utime(docs / name, (mtime, mtime))
+        (docs / "notes.txt").write_bytes(b"")
+        (docs / "folder.pdf").mkdir()
+
+        assert find_tax_documents(docs) == [docs / "new.PNG", docs / "mid.jpg", docs / "old.pdf"]
+        assert find_tax_documents(home / "missing") == []
+
+    def test_find_command_walks_tree(self, home):
+        """Nested matches are listed newest first; hidden directories are skipped."""
+        import os
+
+        taxes = home / "taxes" / "2024"
+        taxes.mkdir(parents=True)
+        (home / "taxes" / ".cache").mkdir()
+        for path, mtime in (
+            (taxes / "w2_acme.pdf", 200),
+            (home / "taxes" / "W2_old.PDF", 100),
+            (home / "taxes" / ".cache" / "w2_copy.pdf", 300),
+            (taxes / "w2_notes.txt", 300),
+            (taxes / "1099.pdf", 300),
+        ):
+            path.write_bytes(b"x" * 2048)
+            os.utime(path, (mtime, mtime))
+
+        result = CliRunner().invoke(cli_module.app, ["find", str(home / "taxes"), "-p", "w2"])
+
+        assert result.exit_code == 0, result.output
+        assert "Found 2 Document(s)" in result.output
+        assert "2.0 KB" in result.output
+        assert result.output.index("w2_acme.pdf") < result.output.index("W2_old.PDF")
+        assert "w2_copy" not in result.output
+        assert f'"{taxes / "w2_acme.pdf"}"' in result.output.replace("\n", "")
+
+
+class TestMaskedInput:
+    """Tests for masked password entry."""
+
+    def test_pasted_input_masked_in_one_write(self, monkeypatch):
+        """A burst of keystrokes is decoded, edited and echoed together."""
+        import os
+        import pty
+        import tty
+
+        master, slave = pty.openpty()
+        setraw = tty.setraw
+
+        def setraw_then_paste(fd):
+            setraw(fd)  # Flushes pending input, so paste only once in raw mode
+            os.write(master, "pässw\x7fo\x01rd\rignored".encode())
+
+        try:
+            with open(slave, closefd=False) as stdin, patch.object(
+                tty, "setraw", side_effect=setraw_then_paste
+            ), patch.object(cli_module.sys.stdout, "write") as write:
+                monkeypatch.setattr("sys.stdin", stdin)
+                assert cli_module.masked_input("Password") == "pässord"
+        finally:
+            os.close(master)
+            os.close(slave)
+
+        assert [c.args[0] for c in write.call_args_list] == ["Password: ", "*****\b \b***", "\n"]
@@ -0,0 +1,44 @@
+"""Tests for configuration management."""
+
+from unittest.mock import patch
+
+import keyring
+import pytest
+
+from tax_agent.config import KEYRING_API_KEY, KEYRING_SERVICE, Config
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Config in a temporary directory with no credentials in the environment."""
+    for var in ("ANTHROPIC_API_KEY", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.delenv(var, raising=False)
+    return Config(tmp_path)
+
+
+class TestSecretCache:
+    """Tests for per-process caching of keyring secrets."""
+
+    def test_secrets_read_from_keyring_once(self, config):
+        """Repeated reads, including of missing secrets, hit the keyring once each."""
+        with patch.object(keyring, "get_password", return_value=None) as get_password:
+            assert config.get_api_key() is None
+            assert config.get_api_key() is None
+            assert config.get_aws_credentials() == (None, None)
+            assert config.get_aws_credentials() == (None, None)
+
+        assert get_password.call_count == 3
+        get_password.assert_any_call(KEYRING_SERVICE, KEYRING_API_KEY)
+
+    def test_writes_and_deletes_update_cache(self, config):
+        """Values set or cleared through the config are served without a lookup."""
+        with patch.object(keyring, "set_password"), patch.object(
+            keyring, "delete_password", side_effect=keyring.errors.PasswordDeleteError
+        ), patch.object(keyring, "get_password") as get_password:
+            config.set_aws_credentials("AKIA", "secret")
+            assert config.get_aws_credentials() == ("AKIA", "secret")
+
+            config.clear_aws_credentials()
+            assert config.get_aws_credentials() == (None, None)
+
+        get_password.assert_not_called()
@@ -4,6 +4,7 @@ import pytest
 from datetime import datetime
 
 from tax_agent.models.documents import DocumentType, TaxDocument, W2Data
+from tax_agent.models.mode import MAX_MODE_HISTORY_MESSAGES, AgentMode, ModeState
 from tax_agent.models.taxpayer import FilingStatus, TaxpayerProfile, Dependent
 
 
@@ -132,3 +133,20 @@ class TestW2Data:
         assert w2.wages_tips_other == 75000.00
         assert w2.federal_income_tax_withheld == 12500.00
         assert w2.social_security_wages == 75000.00
+
+
+class TestModeState:
+    """Tests for ModeState model."""
+
+    def test_history_is_capped(self):
+        """Only the most recent messages are kept once the cap is reached."""
+        state = ModeState(id="s1", mode=AgentMode.PREP, tax_year=2024)
+
+        for i in range(MAX_MODE_HISTORY_MESSAGES + 5):
+            state.add_message("user", f"message {i}")
+
+        assert len(state.conversation_history) == MAX_MODE_HISTORY_MESSAGES
+        assert state.conversation_history[0]["content"] == "message 5"
+        assert state.get_recent_history(1)[0]["content"] == (
+            f"message {MAX_MODE_HISTORY_MESSAGES + 4}"
+        )
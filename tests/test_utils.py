@@ -4,7 +4,7 @@ import pytest
 from datetime import datetime
 from enum import Enum
 
-from tax_agent.utils import get_enum_value
+from tax_agent.utils import get_enum_value, prefetch, run_async
 from tax_agent.models.documents import (
     DocumentType,
     TaxDocument,
@@ -47,6 +47,54 @@ class TestGetEnumValue:
         assert get_enum_value(Color.RED) == "red"
 
 
+class TestPrefetch:
+    """Tests for prefetch()."""
+
+    def test_yields_items_in_order(self):
+        assert list(prefetch(iter(range(5)))) == [0, 1, 2, 3, 4]
+
+    def test_drains_without_waiting_for_consumer(self):
+        import threading
+
+        finished = threading.Event()
+
+        def produce():
+            yield from ("a", "b")
+            finished.set()
+
+        items = prefetch(produce())
+        assert next(items) == "a"
+        assert finished.wait(timeout=5)
+        assert list(items) == ["b"]
+
+    def test_reraises_after_earlier_items(self):
+        def produce():
+            yield 1
+            raise ValueError("stream failed")
+
+        items = prefetch(produce())
+        assert next(items) == 1
+        with pytest.raises(ValueError, match="stream failed"):
+            next(items)
+
+
+class TestRunAsync:
+    """Tests for the sync-to-async bridge."""
+
+    def test_runs_without_running_loop(self):
+        async def value():
+            return 42
+
+        assert run_async(value()) == 42
+
+    @pytest.mark.asyncio
+    async def test_runs_inside_running_loop(self):
+        async def value():
+            return "ok"
+
+        assert run_async(value()) == "ok"
+
+
 class TestGetDocumentFolder:
     """Tests for get_document_folder()."""
 